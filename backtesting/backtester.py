@@ -1,22 +1,36 @@
 import backtrader as bt
 import pandas as pd
-from strategy import MovingAverageCrossStrategy
+from backtesting.strategy import MovingAverageCrossStrategy
+from backtesting.vectorized import VectorizedBacktestEngine
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+ENGINES = ('backtrader', 'vectorized')
+
 class Backtester:
-    def __init__(self, data: pd.DataFrame, cash: float = 100000.0, commission: float = 0.001):
+    def __init__(self, data: pd.DataFrame, cash: float = 100000.0, commission: float = 0.001,
+                 engine: str = 'backtrader'):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown backtest engine '{engine}', expected one of {ENGINES}")
         self.data = data
         self.cash = cash
         self.commission = commission
-        self.cerebro = bt.Cerebro()
+        self.engine = engine
+        self.cerebro = bt.Cerebro() if engine == 'backtrader' else None
+        self.strategy_params = None
+        self.result = None
         self.logger = logger
 
     def setup(self, strategy_params: dict = None):
         if strategy_params is None:
             strategy_params = {}
 
+        if self.engine == 'vectorized':
+            self.strategy_params = {**dict(MovingAverageCrossStrategy.params._getitems()), **strategy_params}
+            self.vectorized_engine = VectorizedBacktestEngine(self.data, cash=self.cash, commission=self.commission)
+            return
+
         self.cerebro.addstrategy(MovingAverageCrossStrategy, **strategy_params)
 
         data_feed = bt.feeds.PandasData(
@@ -30,13 +44,22 @@ class Backtester:
         self.cerebro.addsizer(bt.sizers.FixedSize, stake=10)
         self.cerebro.addobserver(bt.observers.Broker)
 
-    def run(self):
-        self.logger.info("Starting backtest...")
+    def run(self, plot: bool = False):
+        self.logger.info(f"Starting backtest ({self.engine} engine)...")
+        if self.engine == 'vectorized':
+            self.result = self.vectorized_engine.run(self.strategy_params)
+            self.logger.info(f"Final Portfolio Value: {self.result.final_value}")
+            if plot:
+                self.result.equity_series().plot(title='Equity curve')
+            return self.result
         results = self.cerebro.run()
         final_value = self.cerebro.broker.getvalue()
         self.logger.info(f"Final Portfolio Value: {final_value}")
-        self.cerebro.plot()
+        if plot:
+            self.cerebro.plot()
         return results
 
     def get_final_value(self) -> float:
+        if self.engine == 'vectorized':
+            return self.result.final_value
         return self.cerebro.broker.getvalue()
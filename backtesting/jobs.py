@@ -0,0 +1,18 @@
+# backtesting/jobs.py
+
+import pandas as pd
+from typing import Dict
+from backtesting.backtester import Backtester
+from utils.jobs import JobContext
+
+
+def run_backtest(context: JobContext, data_path: str, strategy_params: Dict = None, engine: str = 'backtrader',
+                 cash: float = 100000.0, commission: float = 0.001) -> Dict:
+    # utils.jobs job: the CSV is read in the worker, and only the summary
+    # comes back (backtrader results don't pickle)
+    data = pd.read_csv(data_path, parse_dates=True, index_col='Date')
+    context.report(0.1)
+    backtester = Backtester(data=data, cash=cash, commission=commission, engine=engine)
+    backtester.setup(strategy_params=strategy_params)
+    backtester.run()
+    return {'engine': engine, 'bars': len(data), 'final_value': backtester.get_final_value()}
@@ -0,0 +1,139 @@
+# backtesting/sweep.py
+
+import itertools
+import os
+import random
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+from backtesting.vectorized import simulate_crossover, price_column
+from data_acquisition.indicators import rolling_mean
+from utils.helpers import calculate_sharpe_ratio, calculate_max_drawdown
+from utils.shared_memory import SharedArray
+from utils.logger import configure_logging, get_logger, worker_log_queue
+
+logger = get_logger(__name__)
+
+RANK_COLUMNS = ['sharpe_ratio', 'max_drawdown', 'total_return', 'final_value', 'trades']
+
+# Per-worker state, set up once by _init_worker
+_market = None
+_sma_cache: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+_sma_cache_size = 64
+_settings: Dict = {}
+
+
+def grid(space: Dict[str, Sequence]) -> List[Dict]:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_samples(space: Dict[str, Union[Sequence, Tuple]], samples: int, seed: int = None) -> List[Dict]:
+    # A tuple (low, high) is sampled uniformly (ints stay ints, high inclusive);
+    # a list is sampled by choice
+    rng = random.Random(seed)
+    param_sets = []
+    for _ in range(samples):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(list(values))
+        param_sets.append(params)
+    return param_sets
+
+
+def _init_worker(market_spec, settings: Dict, log_queue):
+    global _market, _settings, _sma_cache_size
+    configure_logging(log_queue=log_queue)
+    _market = SharedArray.attach(market_spec)
+    _settings = settings
+    _sma_cache_size = settings['sma_cache_size']
+    _sma_cache.clear()
+
+
+def _cached_sma(period: int) -> np.ndarray:
+    sma = _sma_cache.get(period)
+    if sma is None:
+        sma = rolling_mean(_market.array[1], period)
+        _sma_cache[period] = sma
+        if len(_sma_cache) > _sma_cache_size:
+            _sma_cache.popitem(last=False)
+    else:
+        _sma_cache.move_to_end(period)
+    return sma
+
+
+def _run_one(params: Dict, open_: np.ndarray, close: np.ndarray, fast_ma: np.ndarray,
+             slow_ma: np.ndarray, settings: Dict) -> Dict:
+    result = simulate_crossover(
+        open_, close, fast_ma, slow_ma,
+        slow_period=max(params['fast_period'], params['slow_period']),
+        order_percentage=params['order_percentage'],
+        cash=settings['cash'], commission=settings['commission']
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = float(calculate_sharpe_ratio(result.returns)) if len(result.returns) else float('nan')
+    return {
+        **params,
+        'sharpe_ratio': sharpe if np.isfinite(sharpe) else float('nan'),
+        'max_drawdown': float(calculate_max_drawdown(result.equity_curve)),
+        'total_return': result.final_value / settings['cash'] - 1.0,
+        'final_value': result.final_value,
+        'trades': len(result.trades),
+    }
+
+
+def _run_chunk(param_sets: List[Dict]) -> List[Dict]:
+    open_, close = _market.array
+    return [
+        _run_one(params, open_, close, _cached_sma(params['fast_period']),
+                 _cached_sma(params['slow_period']), _settings)
+        for params in param_sets
+    ]
+
+
+# Runs MovingAverageCrossStrategy over many parameter sets on a process pool.
+# Open/close prices are copied into shared memory once and every worker maps
+# them; each worker keeps an LRU cache of SMAs by period, and runs are ordered
+# by period so neighbouring runs reuse them.
+class ParameterSweep:
+    def __init__(self, data: pd.DataFrame, cash: float = 100000.0, commission: float = 0.001,
+                 workers: int = None, sma_cache_size: int = 64):
+        self.data = data
+        self.workers = workers or os.cpu_count() or 1
+        self.settings = {'cash': cash, 'commission': commission, 'sma_cache_size': sma_cache_size}
+        self.prices = np.vstack((price_column(data, 'open'), price_column(data, 'close')))
+
+    def run(self, param_sets: Iterable[Dict], chunk_size: int = None) -> pd.DataFrame:
+        param_sets = sorted(param_sets, key=lambda p: (p['fast_period'], p['slow_period']))
+        if not param_sets:
+            return pd.DataFrame(columns=RANK_COLUMNS)
+        if chunk_size is None:
+            chunk_size = max(1, len(param_sets) // (self.workers * 8))
+        chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+        logger.info(f"Sweeping {len(param_sets)} parameter sets over {self.workers} workers "
+                    f"in {len(chunks)} chunks.")
+
+        rows = []
+        with SharedArray.from_array(self.prices) as market:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(market.spec, self.settings, worker_log_queue())) as pool:
+                for chunk_rows in pool.map(_run_chunk, chunks):
+                    rows.extend(chunk_rows)
+        return self.rank(rows)
+
+    @staticmethod
+    def rank(rows: List[Dict]) -> pd.DataFrame:
+        results = pd.DataFrame(rows)
+        results = results.sort_values(['sharpe_ratio', 'max_drawdown'], ascending=[False, True],
+                                      na_position='last', kind='mergesort')
+        results.index = pd.RangeIndex(1, len(results) + 1, name='rank')
+        return results
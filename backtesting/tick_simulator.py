@@ -0,0 +1,537 @@
+# backtesting/tick_simulator.py
+
+import numpy as np
+import pandas as pd
+from typing import List
+from data_acquisition.polygon_decoder import EVENT_DTYPE, EVENT_QUOTE, EVENT_TRADE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BUY = 1
+SELL = -1
+
+ORDER_PENDING = 0     # sent, not yet at the exchange
+ORDER_OPEN = 1
+ORDER_FILLED = 2
+ORDER_CANCELLED = 3
+
+LIQUIDITY_MAKER = 1
+LIQUIDITY_TAKER = 2
+
+FILL_DTYPE = np.dtype([
+    ('timestamp', np.int64),  # exchange time of the fill, ns
+    ('order_id', np.int64),
+    ('symbol_id', np.int32),
+    ('side', np.int8),
+    ('liquidity', np.uint8),
+    ('price', np.float64),
+    ('quantity', np.int64),
+    ('fee', np.float64),
+])
+
+ORDER_DTYPE = np.dtype([
+    ('symbol_id', np.int32),
+    ('side', np.int8),
+    ('status', np.uint8),
+    ('price', np.float64),
+    ('quantity', np.int64),
+    ('filled', np.int64),
+])
+
+_ACTION_NEW = 0
+_ACTION_CANCEL = 1
+
+_NOTICE_FILL = 0
+_NOTICE_CANCELLED = 1
+_NOTICE_CANCEL_REJECTED = 2
+
+_NEVER = 1 << 62            # later than any timestamp
+_QUEUE_UNKNOWN = -1         # resting behind the touch, queue ahead not yet known
+
+
+# Callbacks run on the strategy's clock (exchange time + market data latency).
+# Orders sent from a callback reach the exchange order_latency_ns later; fills
+# and cancel acks come back with the market data latency. Callback arguments
+# are plain scalars so the replay loop never builds a per-event object.
+class TickStrategy:
+    def on_start(self, sim: 'TickSimulator'):
+        pass
+
+    def on_quote(self, sim: 'TickSimulator', symbol_id: int, timestamp: int,
+                 bid: float, bid_size: int, ask: float, ask_size: int):
+        pass
+
+    def on_trade(self, sim: 'TickSimulator', symbol_id: int, timestamp: int, price: float, size: int):
+        pass
+
+    def on_fill(self, sim: 'TickSimulator', order_id: int, symbol_id: int, side: int,
+                price: float, quantity: int, timestamp: int):
+        pass
+
+    def on_cancel(self, sim: 'TickSimulator', order_id: int, timestamp: int):
+        pass
+
+    def on_cancel_reject(self, sim: 'TickSimulator', order_id: int, timestamp: int):
+        pass
+
+    def on_finish(self, sim: 'TickSimulator'):
+        pass
+
+
+class TickBacktestResult:
+    def __init__(self, fills: np.ndarray, orders: np.ndarray, positions: np.ndarray, marks: np.ndarray,
+                 cash: float, fees: float, pnl_timestamps: np.ndarray, pnl_curve: np.ndarray, events: int):
+        self.fills = fills
+        self.orders = orders
+        self.positions = positions
+        self.marks = marks
+        self.cash = cash
+        self.fees = fees
+        self.pnl_timestamps = pnl_timestamps
+        self.pnl_curve = pnl_curve
+        self.events = events
+
+    @property
+    def pnl(self) -> float:
+        # Net of fees: cash already has them deducted
+        return float(self.cash + np.dot(self.positions, self.marks))
+
+    def pnl_series(self) -> pd.Series:
+        return pd.Series(self.pnl_curve, index=pd.to_datetime(self.pnl_timestamps, unit='ns'), name='pnl')
+
+
+# Replays EVENT_DTYPE trade/quote records (from PolygonDecoder or a
+# TickJournal) against a simulated top-of-book per symbol. The strategy's own
+# orders are not added to the book; each resting order tracks how much
+# displayed size is ahead of it at its price (FIFO). Trades at the order's
+# price eat that queue first, trades through the price fill it outright, and
+# a shrinking displayed size at the price is treated as cancels from ahead.
+# Polygon quotes are NBBO, so an order behind the touch has an unknown queue
+# until its price becomes the touch, at which point it joins behind the
+# whole displayed size.
+#
+# Latencies are constant, so new/cancel arrivals, market data deliveries and
+# fill notices each form a FIFO: the loop merges three cursors instead of
+# keeping a heap, and all order state lives in flat lists indexed by order id.
+class TickSimulator:
+    def __init__(self, strategy: TickStrategy, order_latency_ns: int = 50_000,
+                 market_data_latency_ns: int = 20_000, maker_fee: float = -0.002,
+                 taker_fee: float = 0.003, pnl_interval_ns: int = 1_000_000_000,
+                 chunk_size: int = 1 << 16):
+        # Fees are per share; negative is a rebate
+        self.strategy = strategy
+        self.order_latency_ns = int(order_latency_ns)
+        self.market_data_latency_ns = int(market_data_latency_ns)
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.pnl_interval_ns = int(pnl_interval_ns)
+        self.chunk_size = chunk_size
+        self._reset(1)
+
+    def _reset(self, symbols: int):
+        self.now = 0
+        self.bid = [0.0] * symbols
+        self.bid_size = [0] * symbols
+        self.ask = [0.0] * symbols
+        self.ask_size = [0] * symbols
+        self.last_price = [0.0] * symbols
+        self.position = [0] * symbols
+        self.cash = 0.0
+        self.fees = 0.0
+        self.resting: List[List[int]] = [[] for _ in range(symbols)]
+        self._traded = [False] * symbols
+        self._traded_symbols: List[int] = []
+
+        self.order_symbol: List[int] = []
+        self.order_side: List[int] = []
+        self.order_price: List[float] = []
+        self.order_quantity: List[int] = []
+        self.order_filled: List[int] = []
+        self.order_status: List[int] = []
+        self.order_ioc: List[bool] = []
+        self._order_queue: List[int] = []
+
+        # Ring of order actions on their way to the exchange
+        self._action_mask = 1023
+        self._action_head = 0
+        self._action_tail = 0
+        self._action_time = [0] * 1024
+        self._action_kind = [0] * 1024
+        self._action_order = [0] * 1024
+
+        # Ring of fills/acks on their way back to the strategy
+        self._notice_mask = 1023
+        self._notice_head = 0
+        self._notice_tail = 0
+        self._notice_time = [0] * 1024
+        self._notice_kind = [0] * 1024
+        self._notice_order = [0] * 1024
+        self._notice_price = [0.0] * 1024
+        self._notice_quantity = [0] * 1024
+
+        self._fills = np.zeros(1024, dtype=FILL_DTYPE)
+        self._fill_count = 0
+        self._pnl_timestamps: List[int] = []
+        self._pnl_curve: List[float] = []
+        self._next_sample = 0
+
+    # ---- strategy API -------------------------------------------------
+
+    def submit(self, symbol_id: int, side: int, price: float, quantity: int, ioc: bool = False) -> int:
+        order_id = len(self.order_symbol)
+        self.order_symbol.append(symbol_id)
+        self.order_side.append(side)
+        self.order_price.append(price)
+        self.order_quantity.append(quantity)
+        self.order_filled.append(0)
+        self.order_status.append(ORDER_PENDING)
+        self.order_ioc.append(ioc)
+        self._order_queue.append(_QUEUE_UNKNOWN)
+        self._push_action(self.now + self.order_latency_ns, _ACTION_NEW, order_id)
+        return order_id
+
+    def cancel(self, order_id: int):
+        self._push_action(self.now + self.order_latency_ns, _ACTION_CANCEL, order_id)
+
+    # ---- rings --------------------------------------------------------
+
+    @staticmethod
+    def _unroll(ring: list, head: int, mask: int):
+        # Grow in place (callers hold references to the lists) and lay the
+        # live entries out from index 0 in the larger ring
+        start = head & mask
+        ring[:] = ring[start:] + ring[:start] + [ring[0]] * len(ring)
+
+    def _push_action(self, timestamp: int, kind: int, order_id: int):
+        if self._action_tail - self._action_head > self._action_mask:
+            for ring in (self._action_time, self._action_kind, self._action_order):
+                self._unroll(ring, self._action_head, self._action_mask)
+            self._action_tail -= self._action_head
+            self._action_head = 0
+            self._action_mask = len(self._action_time) - 1
+        slot = self._action_tail & self._action_mask
+        self._action_time[slot] = timestamp
+        self._action_kind[slot] = kind
+        self._action_order[slot] = order_id
+        self._action_tail += 1
+
+    def _push_notice(self, timestamp: int, kind: int, order_id: int, price: float = 0.0, quantity: int = 0):
+        if self._notice_tail - self._notice_head > self._notice_mask:
+            for ring in (self._notice_time, self._notice_kind, self._notice_order,
+                         self._notice_price, self._notice_quantity):
+                self._unroll(ring, self._notice_head, self._notice_mask)
+            self._notice_tail -= self._notice_head
+            self._notice_head = 0
+            self._notice_mask = len(self._notice_time) - 1
+        slot = self._notice_tail & self._notice_mask
+        self._notice_time[slot] = timestamp + self.market_data_latency_ns
+        self._notice_kind[slot] = kind
+        self._notice_order[slot] = order_id
+        self._notice_price[slot] = price
+        self._notice_quantity[slot] = quantity
+        self._notice_tail += 1
+
+    # ---- exchange side ------------------------------------------------
+
+    def _arrive(self, timestamp: int):
+        slot = self._action_head & self._action_mask
+        kind = self._action_kind[slot]
+        order_id = self._action_order[slot]
+        self._action_head += 1
+        if kind == _ACTION_NEW:
+            self._open(order_id, timestamp)
+        else:
+            self._cancel(order_id, timestamp)
+
+    def _open(self, order_id: int, timestamp: int):
+        s = self.order_symbol[order_id]
+        price = self.order_price[order_id]
+        remaining = self.order_quantity[order_id]
+        self.order_status[order_id] = ORDER_OPEN
+        bid = self.bid[s]
+        ask = self.ask[s]
+
+        if self.order_side[order_id] == BUY:
+            if 0 < ask <= price and self.ask_size[s] > 0:
+                take = min(remaining, self.ask_size[s])
+                self.ask_size[s] -= take
+                remaining -= take
+                self._fill(order_id, ask, take, LIQUIDITY_TAKER, timestamp)
+            if price > bid or 0 < ask <= price:
+                queue = 0
+            elif price == bid:
+                queue = self.bid_size[s]
+            else:
+                queue = _QUEUE_UNKNOWN
+        else:
+            if bid > 0 and price <= bid and self.bid_size[s] > 0:
+                take = min(remaining, self.bid_size[s])
+                self.bid_size[s] -= take
+                remaining -= take
+                self._fill(order_id, bid, take, LIQUIDITY_TAKER, timestamp)
+            if ask == 0 or price < ask or 0 < price <= bid:
+                queue = 0
+            elif price == ask:
+                queue = self.ask_size[s]
+            else:
+                queue = _QUEUE_UNKNOWN
+
+        if remaining == 0:
+            return
+        if self.order_ioc[order_id]:
+            self.order_status[order_id] = ORDER_CANCELLED
+            self._push_notice(timestamp, _NOTICE_CANCELLED, order_id)
+            return
+        self._order_queue[order_id] = queue
+        self.resting[s].append(order_id)
+
+    def _cancel(self, order_id: int, timestamp: int):
+        if self.order_status[order_id] != ORDER_OPEN:
+            self._push_notice(timestamp, _NOTICE_CANCEL_REJECTED, order_id)
+            return
+        self.order_status[order_id] = ORDER_CANCELLED
+        self.resting[self.order_symbol[order_id]].remove(order_id)
+        self._push_notice(timestamp, _NOTICE_CANCELLED, order_id)
+
+    def _fill(self, order_id: int, price: float, quantity: int, liquidity: int, timestamp: int):
+        s = self.order_symbol[order_id]
+        side = self.order_side[order_id]
+        self.order_filled[order_id] += quantity
+        if self.order_filled[order_id] == self.order_quantity[order_id]:
+            self.order_status[order_id] = ORDER_FILLED
+        fee = quantity * (self.maker_fee if liquidity == LIQUIDITY_MAKER else self.taker_fee)
+        self.position[s] += side * quantity
+        self.cash -= side * quantity * price + fee
+        self.fees += fee
+        if not self._traded[s]:
+            self._traded[s] = True
+            self._traded_symbols.append(s)
+
+        if self._fill_count == len(self._fills):
+            self._fills = np.resize(self._fills, 2 * len(self._fills))
+        self._fills[self._fill_count] = (timestamp, order_id, s, side, liquidity, price, quantity, fee)
+        self._fill_count += 1
+        self._push_notice(timestamp, _NOTICE_FILL, order_id, price, quantity)
+
+    def _match_quote(self, s: int, timestamp: int):
+        bid = self.bid[s]
+        ask = self.ask[s]
+        orders = self.resting[s]
+        queues = self._order_queue
+        kept = 0
+        for order_id in orders:
+            price = self.order_price[order_id]
+            queue = queues[order_id]
+            if self.order_side[order_id] == BUY:
+                if 0 < ask <= price:
+                    # The offer came down to us: someone sold into our bid
+                    self._fill(order_id, price, self.order_quantity[order_id] - self.order_filled[order_id],
+                               LIQUIDITY_MAKER, timestamp)
+                    continue
+                if price > bid:
+                    queue = 0
+                elif price == bid and (queue == _QUEUE_UNKNOWN or self.bid_size[s] < queue):
+                    queue = self.bid_size[s]
+            else:
+                if bid > 0 and price <= bid:
+                    self._fill(order_id, price, self.order_quantity[order_id] - self.order_filled[order_id],
+                               LIQUIDITY_MAKER, timestamp)
+                    continue
+                if ask == 0 or price < ask:
+                    queue = 0
+                elif price == ask and (queue == _QUEUE_UNKNOWN or self.ask_size[s] < queue):
+                    queue = self.ask_size[s]
+            queues[order_id] = queue
+            orders[kept] = order_id
+            kept += 1
+        del orders[kept:]
+
+    def _match_trade(self, s: int, trade_price: float, trade_size: int, timestamp: int):
+        orders = self.resting[s]
+        queues = self._order_queue
+        available = trade_size
+        kept = 0
+        for order_id in orders:
+            price = self.order_price[order_id]
+            queue = queues[order_id]
+            side = self.order_side[order_id]
+            fill = 0
+            if available > 0:
+                if (trade_price < price) if side == BUY else (trade_price > price):
+                    # Printed through our price, we would have been hit first
+                    fill = available
+                elif trade_price == price and queue != _QUEUE_UNKNOWN:
+                    ahead = min(queue, available)
+                    queue -= ahead
+                    fill = available - ahead
+                    queues[order_id] = queue
+            if fill:
+                remaining = self.order_quantity[order_id] - self.order_filled[order_id]
+                fill = min(fill, remaining)
+                available -= fill
+                self._fill(order_id, price, fill, LIQUIDITY_MAKER, timestamp)
+                if fill == remaining:
+                    continue
+            orders[kept] = order_id
+            kept += 1
+        del orders[kept:]
+
+    def _mark(self, s: int) -> float:
+        if self.bid[s] > 0 and self.ask[s] > 0:
+            return 0.5 * (self.bid[s] + self.ask[s])
+        return self.last_price[s]
+
+    def _sample_pnl(self, timestamp: int):
+        value = self.cash
+        for s in self._traded_symbols:
+            value += self.position[s] * self._mark(s)
+        self._pnl_timestamps.append(timestamp)
+        self._pnl_curve.append(value)
+        self._next_sample = timestamp + self.pnl_interval_ns
+
+    # ---- strategy side ------------------------------------------------
+
+    def _notify(self):
+        slot = self._notice_head & self._notice_mask
+        self._notice_head += 1
+        timestamp = self._notice_time[slot]
+        self.now = timestamp
+        kind = self._notice_kind[slot]
+        order_id = self._notice_order[slot]
+        if kind == _NOTICE_FILL:
+            self.strategy.on_fill(self, order_id, self.order_symbol[order_id], self.order_side[order_id],
+                                  self._notice_price[slot], self._notice_quantity[slot], timestamp)
+        elif kind == _NOTICE_CANCELLED:
+            self.strategy.on_cancel(self, order_id, timestamp)
+        else:
+            self.strategy.on_cancel_reject(self, order_id, timestamp)
+
+    # ---- replay loop --------------------------------------------------
+
+    def run(self, events: np.ndarray) -> TickBacktestResult:
+        if events.dtype != EVENT_DTYPE:
+            raise ValueError("TickSimulator expects EVENT_DTYPE records")
+        n = len(events)
+        symbols = int(events['symbol_id'].max()) + 1 if n else 1
+        self._reset(symbols)
+        if n:
+            self._next_sample = int(events['timestamp'][0])
+        self.strategy.on_start(self)
+
+        exchange = delivered = 0
+        while exchange < n:
+            end = min(n, exchange + self.chunk_size)
+            exchange, delivered = self._run_chunk(events, exchange, delivered, end, flush=False)
+        self._run_chunk(events, exchange, delivered, n, flush=True)
+        self.strategy.on_finish(self)
+
+        result = self._result(n)
+        logger.info(f"Tick backtest: {n} events, {len(result.orders)} orders, {len(result.fills)} fills, "
+                    f"PnL {result.pnl:.2f} (fees {self.fees:.2f})")
+        return result
+
+    def _run_chunk(self, events: np.ndarray, exchange: int, delivered: int, end: int, flush: bool):
+        # The window starts at the oldest event the strategy has not seen yet,
+        # so the delivery cursor (lagging by the market data latency) and the
+        # exchange cursor index the same column lists. Columns are converted
+        # once per window; the per-event work below only reads list items and
+        # writes preallocated state.
+        base = delivered
+        window = events[base:end]
+        ts = window['timestamp'].tolist()
+        sym = window['symbol_id'].tolist()
+        kind = window['kind'].tolist()
+        price = window['price'].tolist()
+        size = window['size'].tolist()
+        bid = window['bid'].tolist()
+        bid_size = window['bid_size'].tolist()
+        ask = window['ask'].tolist()
+        ask_size = window['ask_size'].tolist()
+
+        book_bid = self.bid
+        book_bid_size = self.bid_size
+        book_ask = self.ask
+        book_ask_size = self.ask_size
+        last_price = self.last_price
+        resting = self.resting
+        action_time = self._action_time
+        notice_time = self._notice_time
+        on_quote = self.strategy.on_quote
+        on_trade = self.strategy.on_trade
+        md_latency = self.market_data_latency_ns
+        d = delivered
+
+        for e in range(exchange, end + 1 if flush else end):
+            t = ts[e - base] if e < end else _NEVER
+
+            # Run everything due strictly before this exchange event, oldest
+            # first; on ties order arrivals go before fill notices before
+            # market data
+            while True:
+                head = self._action_head
+                ta = action_time[head & self._action_mask] if head != self._action_tail else _NEVER
+                head = self._notice_head
+                tn = notice_time[head & self._notice_mask] if head != self._notice_tail else _NEVER
+                td = ts[d - base] + md_latency if d < e else _NEVER
+                if ta <= tn and ta <= td:
+                    if ta >= t:
+                        break
+                    self._arrive(ta)
+                elif tn <= td:
+                    if tn >= t:
+                        break
+                    self._notify()
+                else:
+                    if td >= t:
+                        break
+                    j = d - base
+                    d += 1
+                    self.now = td
+                    k = kind[j]
+                    if k == EVENT_QUOTE:
+                        on_quote(self, sym[j], ts[j], bid[j], bid_size[j], ask[j], ask_size[j])
+                    elif k == EVENT_TRADE:
+                        on_trade(self, sym[j], ts[j], price[j], size[j])
+
+            if e == end:
+                break
+            j = e - base
+            s = sym[j]
+            k = kind[j]
+            if k == EVENT_QUOTE:
+                book_bid[s] = bid[j]
+                book_bid_size[s] = bid_size[j]
+                book_ask[s] = ask[j]
+                book_ask_size[s] = ask_size[j]
+                if resting[s]:
+                    self._match_quote(s, t)
+            elif k == EVENT_TRADE:
+                last_price[s] = price[j]
+                if resting[s]:
+                    self._match_trade(s, price[j], size[j], t)
+            if t >= self._next_sample:
+                self._sample_pnl(t)
+
+        return end, d
+
+    def _result(self, events: int) -> TickBacktestResult:
+        orders = np.zeros(len(self.order_symbol), dtype=ORDER_DTYPE)
+        orders['symbol_id'] = self.order_symbol
+        orders['side'] = self.order_side
+        orders['status'] = self.order_status
+        orders['price'] = self.order_price
+        orders['quantity'] = self.order_quantity
+        orders['filled'] = self.order_filled
+        marks = np.array([self._mark(s) for s in range(len(self.bid))], dtype=np.float64)
+        return TickBacktestResult(
+            fills=self._fills[:self._fill_count].copy(),
+            orders=orders,
+            positions=np.array(self.position, dtype=np.int64),
+            marks=marks,
+            cash=self.cash,
+            fees=self.fees,
+            pnl_timestamps=np.array(self._pnl_timestamps, dtype=np.int64),
+            pnl_curve=np.array(self._pnl_curve, dtype=np.float64),
+            events=events,
+        )
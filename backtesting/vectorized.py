@@ -0,0 +1,128 @@
+# backtesting/vectorized.py
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+from data_acquisition.indicators import rolling_mean
+
+TRADE_DTYPE = np.dtype([
+    ('bar', np.int64),        # index of the bar whose open filled the order
+    ('size', np.int64),       # signed: positive buys, negative sells
+    ('price', np.float64),
+    ('commission', np.float64),
+])
+
+
+class BacktestResult:
+    def __init__(self, final_value: float, equity_curve: np.ndarray, trades: np.ndarray,
+                 index: Optional[pd.Index] = None):
+        self.final_value = final_value
+        self.equity_curve = equity_curve
+        self.trades = trades
+        self.index = index
+
+    @property
+    def returns(self) -> np.ndarray:
+        return np.diff(self.equity_curve) / self.equity_curve[:-1]
+
+    def equity_series(self) -> pd.Series:
+        return pd.Series(self.equity_curve, index=self.index, name='equity')
+
+
+def crossover_signals(fast_ma: np.ndarray, slow_ma: np.ndarray, slow_period: int) -> np.ndarray:
+    # Same rule as backtrader's CrossOver: +1 when the fast MA is above the slow
+    # MA and the last non-zero difference before this bar was negative, -1 for
+    # the mirror case. The first usable bar is slow_period (0-based).
+    n = len(fast_ma)
+    signal = np.zeros(n, dtype=np.int8)
+    start = slow_period - 1
+    if n <= start + 1:
+        return signal
+    diff = fast_ma[start:] - slow_ma[start:]
+    # Forward-fill zero differences with the last non-zero one (seeded by the first bar)
+    filled_idx = np.where(diff != 0, np.arange(len(diff)), 0)
+    np.maximum.accumulate(filled_idx, out=filled_idx)
+    nzd = diff[filled_idx]
+    prev = nzd[:-1]
+    cur = diff[1:]
+    signal[start + 1:] = np.where((prev < 0) & (cur > 0), 1, np.where((prev > 0) & (cur < 0), -1, 0))
+    return signal
+
+
+def simulate_crossover(open_: np.ndarray, close: np.ndarray, fast_ma: np.ndarray, slow_ma: np.ndarray,
+                       slow_period: int, order_percentage: float = 0.95, cash: float = 100000.0,
+                       commission: float = 0.001) -> BacktestResult:
+    # Market orders created on a bar's close fill at the next bar's open, with a
+    # cash check at creation (close price) and at execution (open price) like
+    # backtrader's BackBroker. Only signal bars are visited in Python; the
+    # equity curve is rebuilt from the fills with array operations.
+    n = len(close)
+    signal = crossover_signals(fast_ma, slow_ma, slow_period)
+    signal_bars = np.flatnonzero(signal)
+    fills = []
+    position = 0
+    free_cash = cash
+    for t in signal_bars:
+        if t + 1 >= n:
+            break
+        if position == 0 and signal[t] > 0:
+            size = int(free_cash * order_percentage / close[t])
+            if size <= 0 or free_cash - size * close[t] * (1 + commission) < 0:
+                continue
+            price = open_[t + 1]
+            comm = size * price * commission
+            if free_cash - size * price - comm < 0:
+                continue
+            free_cash -= size * price + comm
+            position = size
+            fills.append((t + 1, size, price, comm, position, free_cash))
+        elif position > 0 and signal[t] < 0:
+            price = open_[t + 1]
+            comm = position * price * commission
+            free_cash += position * price - comm
+            fills.append((t + 1, -position, price, comm, 0, free_cash))
+            position = 0
+
+    trades = np.array([f[:4] for f in fills], dtype=TRADE_DTYPE)
+    if fills:
+        fill_bars = trades['bar']
+        positions = np.array([f[4] for f in fills], dtype=np.float64)
+        cash_after = np.array([f[5] for f in fills])
+        k = np.searchsorted(fill_bars, np.arange(n), side='right') - 1
+        filled = k >= 0
+        held = np.where(filled, positions[k], 0.0)
+        cash_curve = np.where(filled, cash_after[k], cash)
+        equity = cash_curve + held * close
+    else:
+        equity = np.full(n, cash)
+    final_value = float(equity[-1]) if n else cash
+    return BacktestResult(final_value, equity, trades)
+
+
+def price_column(data: pd.DataFrame, name: str) -> np.ndarray:
+    for column in data.columns:
+        if str(column).lower() == name:
+            return data[column].to_numpy(dtype=np.float64)
+    raise KeyError(f"Historical data has no '{name}' column")
+
+
+class VectorizedBacktestEngine:
+    def __init__(self, data: pd.DataFrame, cash: float = 100000.0, commission: float = 0.001):
+        self.data = data
+        self.cash = cash
+        self.commission = commission
+        self.open = price_column(data, 'open')
+        self.close = price_column(data, 'close')
+
+    def run(self, strategy_params: Dict) -> BacktestResult:
+        fast_period = strategy_params['fast_period']
+        slow_period = strategy_params['slow_period']
+        result = simulate_crossover(
+            self.open, self.close,
+            rolling_mean(self.close, fast_period), rolling_mean(self.close, slow_period),
+            slow_period=max(fast_period, slow_period),
+            order_percentage=strategy_params['order_percentage'],
+            cash=self.cash, commission=self.commission
+        )
+        result.index = self.data.index
+        return result
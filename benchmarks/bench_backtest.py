@@ -0,0 +1,67 @@
+# benchmarks/bench_backtest.py
+#
+# MovingAverageCrossStrategy on synthetic minute bars through both Backtester
+# engines: wall time of each and the difference in final portfolio value.
+#
+#   python -m benchmarks.bench_backtest --bars 100000
+
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+import pandas as pd
+from backtesting.backtester import Backtester
+
+
+def make_bars(bars: int, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150 * np.exp(np.cumsum(rng.normal(0, 0.0008, bars)))
+    open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, 0.0002, bars))
+    high = np.maximum(open_, close) * (1 + rng.random(bars) * 0.0005)
+    low = np.minimum(open_, close) * (1 - rng.random(bars) * 0.0005)
+    index = pd.date_range('2020-01-01 09:30', periods=bars, freq='min', name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close,
+                         'Volume': rng.integers(100, 10_000, bars)}, index=index)
+
+
+def run(bars: int = 50_000, fast_period: int = 50, slow_period: int = 200,
+        skip_backtrader: bool = False) -> dict:
+    data = make_bars(bars)
+    params = {'fast_period': fast_period, 'slow_period': slow_period, 'order_percentage': 0.95, 'ticker': 'SYN'}
+    results = {'bars': bars}
+
+    backtester = Backtester(data, engine='vectorized')
+    backtester.setup(params)
+    start = time.perf_counter()
+    backtester.run()
+    results['vectorized_seconds'] = time.perf_counter() - start
+    results['vectorized_final_value'] = backtester.get_final_value()
+    results['trades'] = len(backtester.result.trades)
+
+    if not skip_backtrader:
+        backtester = Backtester(data, engine='backtrader')
+        backtester.setup(params)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the strategy prints every order
+            backtester.run()
+        results['backtrader_seconds'] = time.perf_counter() - start
+        results['backtrader_final_value'] = backtester.get_final_value()
+        results['final_value_diff'] = abs(results['backtrader_final_value'] - results['vectorized_final_value'])
+        results['speedup'] = results['backtrader_seconds'] / results['vectorized_seconds']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the backtrader and vectorized backtest engines")
+    parser.add_argument('--bars', type=int, default=50_000)
+    parser.add_argument('--fast-period', type=int, default=50)
+    parser.add_argument('--slow-period', type=int, default=200)
+    parser.add_argument('--skip-backtrader', action='store_true')
+    args = parser.parse_args()
+    for key, value in run(args.bars, args.fast_period, args.slow_period, args.skip_backtrader).items():
+        print(f"{key:>24}: {value:,.4f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == '__main__':
+    main()
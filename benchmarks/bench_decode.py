@@ -0,0 +1,115 @@
+# benchmarks/bench_decode.py
+#
+# Messages/sec of Polygon frame decoding: the original per-message json.loads
+# + per-trade dict path against PolygonDecoder's columnar decode and bulk append.
+#
+#   python -m benchmarks.bench_decode --frames 2000 --events-per-frame 100
+
+import argparse
+import json
+import random
+import time
+from data_acquisition.polygon_decoder import JSON_BACKEND, PolygonDecoder, trades_to_ticks
+from data_acquisition.tick_buffer import SymbolRegistry, TickRingBuffer
+
+SYMBOLS = ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'TSLA', 'NVDA', 'META', 'SPY', 'QQQ', 'IWM']
+
+
+def make_frames(frames: int, events_per_frame: int, quote_share: float = 0.0,
+                aggregate_share: float = 0.0, seed: int = 7):
+    rng = random.Random(seed)
+    ts = 1_700_000_000_000
+    messages = []
+    for _ in range(frames):
+        events = []
+        for _ in range(events_per_frame):
+            ts += rng.randint(0, 3)
+            sym = rng.choice(SYMBOLS)
+            price = round(100 + rng.random() * 50, 2)
+            roll = rng.random()
+            if roll >= quote_share + aggregate_share:
+                events.append({'ev': 'T', 'sym': sym, 'x': 4, 'i': str(ts), 'z': 3,
+                               'p': price, 's': rng.randint(1, 500), 'c': [12], 't': ts, 'q': ts})
+            elif roll < quote_share:
+                events.append({'ev': 'Q', 'sym': sym, 'bx': 4, 'bp': price - 0.01, 'bs': rng.randint(1, 50),
+                               'ax': 7, 'ap': price + 0.01, 'as': rng.randint(1, 50), 'c': 0, 't': ts})
+            else:
+                events.append({'ev': 'A', 'sym': sym, 'v': 1200, 'av': 10_000_000, 'op': price, 'vw': price,
+                               'o': price, 'c': price, 'h': price + 0.05, 'l': price - 0.05, 'a': price,
+                               'z': 40, 's': ts - 1000, 'e': ts})
+        messages.append(json.dumps(events))
+    return messages
+
+
+def legacy_path(messages, symbols: SymbolRegistry, buffer: TickRingBuffer) -> int:
+    # Mirrors the original receive_polygon: one json.loads per message, then a
+    # dict and a buffer write per trade event
+    trades = 0
+    for message in messages:
+        for data in json.loads(message):
+            if data.get('ev') == 'T':
+                trade_data = {
+                    'timestamp': data.get('t', 0),
+                    'price': data.get('p', 0.0),
+                    'volume': data.get('s', 0),
+                    'bid': data.get('bp', 0.0),
+                    'ask': data.get('ap', 0.0)
+                }
+                buffer.append(int(trade_data['timestamp']) * 1_000_000, symbols.get_id(data.get('sym', '')),
+                              trade_data['price'], trade_data['volume'], trade_data['bid'], trade_data['ask'])
+                trades += 1
+        buffer.clear()
+    return trades
+
+
+def columnar_path(messages, decoder: PolygonDecoder, buffer: TickRingBuffer) -> int:
+    trades = 0
+    for message in messages:
+        ticks = trades_to_ticks(decoder.decode(message))
+        trades += buffer.extend(ticks)
+        buffer.clear()
+    return trades
+
+
+def run(frames: int = 2000, events_per_frame: int = 100, quote_share: float = 0.0,
+        aggregate_share: float = 0.0) -> dict:
+    # The default frame mix is trades only, which is what the T.* subscription delivers
+    messages = make_frames(frames, events_per_frame, quote_share, aggregate_share)
+    total_events = frames * events_per_frame
+    results = {'frames': frames, 'events_per_frame': events_per_frame, 'quote_share': quote_share,
+               'aggregate_share': aggregate_share, 'json_backend': JSON_BACKEND}
+
+    symbols = SymbolRegistry()
+    start = time.perf_counter()
+    legacy_trades = legacy_path(messages, symbols, TickRingBuffer(1 << 16))
+    elapsed = time.perf_counter() - start
+    results['legacy_events_per_sec'] = total_events / elapsed
+    results['legacy_frames_per_sec'] = frames / elapsed
+
+    decoder = PolygonDecoder(SymbolRegistry())
+    start = time.perf_counter()
+    columnar_trades = columnar_path(messages, decoder, TickRingBuffer(1 << 16))
+    elapsed = time.perf_counter() - start
+    results['columnar_events_per_sec'] = total_events / elapsed
+    results['columnar_frames_per_sec'] = frames / elapsed
+
+    if legacy_trades != columnar_trades:
+        raise RuntimeError(f"Trade count mismatch: legacy={legacy_trades} columnar={columnar_trades}")
+    results['trades'] = columnar_trades
+    results['speedup'] = results['columnar_events_per_sec'] / results['legacy_events_per_sec']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Polygon frame decoding")
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--events-per-frame', type=int, default=100)
+    parser.add_argument('--quote-share', type=float, default=0.0)
+    parser.add_argument('--aggregate-share', type=float, default=0.0)
+    args = parser.parse_args()
+    for key, value in run(args.frames, args.events_per_frame, args.quote_share, args.aggregate_share).items():
+        print(f"{key:>26}: {value:,.1f}" if isinstance(value, float) else f"{key:>26}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+# benchmarks/bench_fix_gateway.py
+#
+# FIX order entry against the local acceptor (fix_integration/acceptor.py,
+# started here as a subprocess): messages/sec for the original per-order
+# NewOrderSingle construction versus OrderGateway's templates and batched
+# sends, cancel/replace throughput, and NewOrderSingle -> ExecutionReport
+# round-trip time. --build-only measures message construction alone, with no
+# session or acceptor.
+#
+#   python -m benchmarks.bench_fix_gateway --orders 20000
+#   python -m benchmarks.bench_fix_gateway --build-only
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import quickfix as fix
+import quickfix44 as fix44
+from fix_integration.fix_client import FixClient
+from fix_integration.gateway import OrderGateway, SIDE_BUY, SIDE_SELL
+from utils.latency import LatencyHistogram
+
+SYMBOLS = ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'TSLA', 'NVDA', 'META', 'SPY', 'QQQ', 'IWM']
+
+INITIATOR_CFG = """[DEFAULT]
+ConnectionType=initiator
+ReconnectInterval=1
+FileStorePath={root}/initiator/store
+FileLogPath={root}/initiator/log
+StartTime=00:00:00
+EndTime=23:59:59
+UseDataDictionary=N
+SocketNodelay=Y
+
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID=YOUR_SENDER_ID
+TargetCompID=YOUR_TARGET_ID
+SocketConnectHost=127.0.0.1
+SocketConnectPort={port}
+HeartBtInt=30
+"""
+
+ACCEPTOR_CFG = """[DEFAULT]
+ConnectionType=acceptor
+FileStorePath={root}/acceptor/store
+FileLogPath={root}/acceptor/log
+StartTime=00:00:00
+EndTime=23:59:59
+UseDataDictionary=N
+SocketAcceptHost=127.0.0.1
+SocketAcceptPort={port}
+SocketNodelay=Y
+
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID=YOUR_TARGET_ID
+TargetCompID=YOUR_SENDER_ID
+"""
+
+
+class ReportCounter:
+    # Counts ExecutionReports and OrderCancelRejects and timestamps acks of
+    # tracked ClOrdIDs, on the QuickFIX thread
+    def __init__(self):
+        self.count = 0
+        self.target = 0
+        self.done = threading.Event()
+        self.sent_ns = {}
+        self.rtt = LatencyHistogram()
+
+    def expect(self, count: int):
+        self.count = 0
+        self.target = count
+        self.done.clear()
+
+    def __call__(self, message: fix.Message):
+        sent = self.sent_ns.pop(message.getField(11), None)
+        if sent is not None:
+            self.rtt.record(time.monotonic_ns() - sent)
+        self.count += 1
+        if self.count >= self.target:
+            self.done.set()
+
+
+def legacy_message(cl_ord_id: str, symbol: str, side: str, quantity: int, price: float) -> fix.Message:
+    # The original FixClient.send_order construction: a fresh message built
+    # field by field
+    order = fix44.NewOrderSingle()
+    order.setField(fix.ClOrdID(cl_ord_id))
+    order.setField(fix.HandlInst('1'))
+    order.setField(fix.Symbol(symbol))
+    order.setField(fix.Side(side))
+    order.setField(fix.TransactTime())
+    order.setField(fix.OrdType('2'))
+    order.setField(fix.OrderQty(quantity))
+    order.setField(fix.Price(price))
+    return order
+
+
+def legacy_send(client: FixClient, cl_ord_id: str, symbol: str, side: str, quantity: int, price: float):
+    # ... routed with sendToTarget
+    fix.Session.sendToTarget(legacy_message(cl_ord_id, symbol, side, quantity, price),
+                             client.application.session_id)
+
+
+def order_flow(orders: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    symbols = [SYMBOLS[i] for i in rng.integers(0, len(SYMBOLS), orders)]
+    sides = [SIDE_BUY if s else SIDE_SELL for s in rng.integers(0, 2, orders)]
+    prices = np.round(100 + rng.random(orders) * 50, 2).tolist()
+    return symbols, sides, prices
+
+
+def run_build(orders: int = 100_000) -> dict:
+    # NewOrderSingle construction and serialization per second, without a
+    # session: the original per-order build against the gateway's templates
+    symbols, sides, prices = order_flow(orders)
+    results = {}
+    start = time.perf_counter()
+    for i in range(orders):
+        legacy_message(f'L{i}', symbols[i], sides[i], 100, prices[i]).toString()
+    results['legacy_build_msgs_per_sec'] = orders / (time.perf_counter() - start)
+
+    gateway = OrderGateway(application=None)
+    start = time.perf_counter()
+    for i in range(orders):
+        gateway.new_order_message(gateway.next_id(), symbols[i], sides[i], 100, prices[i]).toString()
+    results['gateway_build_msgs_per_sec'] = orders / (time.perf_counter() - start)
+    results['build_speedup'] = results['gateway_build_msgs_per_sec'] / results['legacy_build_msgs_per_sec']
+    return results
+
+
+def run(orders: int = 20_000, batch: int = 500, rtt_samples: int = 2_000, port: int = 5001) -> dict:
+    root = tempfile.mkdtemp(prefix='fix_bench_')
+    with open(os.path.join(root, 'acceptor.cfg'), 'w') as f:
+        f.write(ACCEPTOR_CFG.format(root=root, port=port))
+    with open(os.path.join(root, 'initiator.cfg'), 'w') as f:
+        f.write(INITIATOR_CFG.format(root=root, port=port))
+    acceptor = subprocess.Popen([sys.executable, '-m', 'fix_integration.acceptor',
+                                 '--config', os.path.join(root, 'acceptor.cfg')],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = FixClient(os.path.join(root, 'initiator.cfg'))
+    counter = ReportCounter()
+    client.application.execution_report_handlers.append(counter)
+    client.application.cancel_reject_handlers.append(counter)
+    try:
+        client.start()
+        deadline = time.monotonic() + 30
+        while not client.is_logged_on():
+            if time.monotonic() > deadline:
+                raise RuntimeError("FIX session did not log on")
+            time.sleep(0.05)
+        gateway = client.gateway
+        symbols, sides, prices = order_flow(orders)
+        results = {}
+
+        # Round trip: one order in flight at a time
+        for i in range(rtt_samples):
+            counter.expect(1)
+            cl_ord_id = gateway.next_id()
+            counter.sent_ns[cl_ord_id] = time.monotonic_ns()
+            gateway.send_order(symbols[i], sides[i], 100, prices[i], cl_ord_id=cl_ord_id)
+            counter.done.wait(5)
+        for p, value in counter.rtt.percentiles((50, 99, 99.9)).items():
+            results[f'rtt_p{p:g}_us'] = value / 1e3
+
+        # Throughput: the original construction versus batched templates
+        counter.expect(orders)
+        start = time.perf_counter()
+        for i in range(orders):
+            legacy_send(client, f'L{i}', symbols[i], sides[i], 100, prices[i])
+        results['legacy_send_msgs_per_sec'] = orders / (time.perf_counter() - start)
+        counter.done.wait(60)
+        results['legacy_acked_msgs_per_sec'] = orders / (time.perf_counter() - start)
+
+        counter.expect(orders)
+        ids = []
+        start = time.perf_counter()
+        for offset in range(0, orders, batch):
+            end = min(offset + batch, orders)
+            ids.extend(gateway.send_orders(zip(symbols[offset:end], sides[offset:end], [100] * (end - offset),
+                                               prices[offset:end])))
+        results['gateway_send_msgs_per_sec'] = orders / (time.perf_counter() - start)
+        counter.done.wait(60)
+        results['gateway_acked_msgs_per_sec'] = orders / (time.perf_counter() - start)
+
+        counter.expect(2 * orders)
+        start = time.perf_counter()
+        replaced = gateway.replace_orders(zip(ids, symbols, sides, [200] * orders, prices))
+        gateway.cancel_orders(zip(replaced, symbols, sides, [200] * orders))
+        counter.done.wait(60)
+        results['replace_cancel_msgs_per_sec'] = 2 * orders / (time.perf_counter() - start)
+        return results
+    finally:
+        client.stop()
+        acceptor.terminate()
+        acceptor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FIX gateway throughput and round-trip time")
+    parser.add_argument('--orders', type=int, default=20_000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--rtt-samples', type=int, default=2_000)
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--build-only', action='store_true', help="Message construction only, no session")
+    args = parser.parse_args()
+    results = run_build(args.orders) if args.build_only else run(args.orders, args.batch, args.rtt_samples, args.port)
+    for key, value in results.items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_inference.py
+#
+# Per-request scoring latency: Keras model.predict per request versus the
+# micro-batched InferenceEngine under concurrent requests from many symbols.
+#
+#   python -m benchmarks.bench_inference --symbols 500 --requests 20000
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from predictive_modeling.inference import InferenceEngine
+from predictive_modeling.windows import FeatureWindows
+from predictive_modeling.model import PredictiveModel
+from data_acquisition.tick_buffer import TICK_DTYPE
+
+
+def make_ticks(symbols: int, per_symbol: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = symbols * per_symbol
+    ticks = np.zeros(n, dtype=TICK_DTYPE)
+    ticks['timestamp'] = 1_700_000_000_000_000_000 + np.arange(n) * 1000
+    ticks['symbol_id'] = np.tile(np.arange(symbols), per_symbol)
+    ticks['price'] = 100 + rng.normal(0, 0.05, n)
+    ticks['volume'] = rng.integers(1, 500, n)
+    ticks['bid'] = ticks['price'] - 0.01
+    ticks['ask'] = ticks['price'] + 0.01
+    return ticks
+
+
+def percentiles(samples_ns: np.ndarray) -> dict:
+    p50, p99 = np.percentile(samples_ns, [50, 99]) / 1e3
+    return {'p50_us': float(p50), 'p99_us': float(p99)}
+
+
+async def load(engine: InferenceEngine, symbols: int, requests: int, rate: float) -> float:
+    # Open-loop arrivals at `rate` requests/sec over random symbols
+    runner = asyncio.create_task(engine.run())
+    rng = np.random.default_rng(5)
+    targets = rng.integers(0, symbols, requests).tolist()
+    interval = 1.0 / rate
+    tasks = []
+    start = time.perf_counter()
+    for i, symbol_id in enumerate(targets):
+        tasks.append(asyncio.ensure_future(engine.predict(symbol_id)))
+        lag = start + (i + 1) * interval - time.perf_counter()
+        if lag > 0 or i % 64 == 63:
+            await asyncio.sleep(max(lag, 0))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    runner.cancel()
+    return elapsed
+
+
+def run(symbols: int = 500, requests: int = 20_000, rate: float = 5_000, max_batch: int = 64,
+        max_delay_us: float = 200.0, keras_calls: int = 200) -> dict:
+    model = PredictiveModel(input_shape=(100, 5)).get_model()
+    windows = FeatureWindows(100, 5)
+    windows.update_ticks(make_ticks(symbols, 100))
+
+    window = windows.window(0)[None]
+    model.predict(window, verbose=0)
+    keras = np.empty(keras_calls, dtype=np.int64)
+    for i in range(keras_calls):
+        start = time.perf_counter_ns()
+        model.predict(window, verbose=0)
+        keras[i] = time.perf_counter_ns() - start
+
+    engine = InferenceEngine(model, windows, max_batch=max_batch, max_delay_us=max_delay_us)
+    single = np.empty(keras_calls, dtype=np.int64)
+    for i in range(keras_calls):
+        start = time.perf_counter_ns()
+        engine.predict_batch(np.array([i % symbols]))
+        single[i] = time.perf_counter_ns() - start
+
+    elapsed = asyncio.run(load(engine, symbols, requests, rate))
+    batched = engine.latency_percentiles()
+    engine.close()
+
+    results = {f"keras_predict_{k}": v for k, v in percentiles(keras).items()}
+    results.update({f"engine_single_{k}": v for k, v in percentiles(single).items()})
+    results.update({
+        'batched_p50_us': batched['p50'],
+        'batched_p99_us': batched['p99'],
+        'requests_per_sec': requests / elapsed,
+        'mean_batch': engine.scored / max(engine.batches, 1),
+    })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference latency benchmark")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--rate', type=float, default=5_000, help="Offered requests/sec")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay-us', type=float, default=200.0)
+    args = parser.parse_args()
+    results = run(args.symbols, args.requests, args.rate, args.max_batch, args.max_delay_us)
+    for key, value in results.items():
+        print(f"{key:>22}: {value:,.1f}" if isinstance(value, float) else f"{key:>22}: {value}")
+
+
+if __name__ == '__main__':
+    main()
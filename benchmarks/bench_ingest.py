@@ -0,0 +1,79 @@
+# benchmarks/bench_ingest.py
+#
+# DataProcessor under overload: bursts of ticks arrive faster than batches
+# are processed (a synthetic per-batch cost stands in for downstream work),
+# and each overflow policy is compared on ingest throughput, ticks lost or
+# conflated, peak queue depth and how old the oldest tick was when its batch
+# started. The batcher runs as it does live.
+#
+#   python -m benchmarks.bench_ingest --ticks 500000 --capacity 65536
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from data_acquisition.data_processor import DataProcessor, OVERFLOW_POLICIES
+from data_acquisition.tick_buffer import TICK_DTYPE
+
+
+def make_ticks(count: int, symbols: int = 500, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(count, dtype=TICK_DTYPE)
+    ticks['timestamp'] = 1_700_000_000_000_000_000 + np.arange(count) * 1_000
+    ticks['symbol_id'] = np.minimum(rng.zipf(1.3, count) - 1, symbols - 1)
+    ticks['price'] = (100 + ticks['symbol_id'] * 0.1 + rng.normal(0, 0.05, count)).round(2)
+    ticks['volume'] = rng.integers(1, 500, count)
+    ticks['bid'] = ticks['price'] - 0.01
+    ticks['ask'] = ticks['price'] + 0.01
+    return ticks
+
+
+async def ingest(ticks: np.ndarray, overflow: str, capacity: int, frame: int, batch_size: int,
+                 batch_cost: float) -> dict:
+    processor = DataProcessor(batch_size=batch_size, buffer_capacity=capacity, overflow=overflow)
+    if batch_cost:
+        processor.batch_handlers.append(lambda batch: time.sleep(batch_cost))
+    batcher = asyncio.create_task(processor.run_periodic_processing())
+    start = time.perf_counter()
+    for offset in range(0, len(ticks), frame):
+        processor.add_ticks(ticks[offset:offset + frame])
+        # One frame per loop pass, like a websocket reader
+        await asyncio.sleep(0)
+    ingest_seconds = time.perf_counter() - start
+    while len(processor.buffer):
+        await asyncio.sleep(0.001)
+    batcher.cancel()
+    age = processor.latency.summary()['batch_age']
+    summary = processor.summary()
+    return {
+        'ticks_per_sec': len(ticks) / ingest_seconds,
+        'dropped': summary['dropped'],
+        'conflated': summary['conflated'],
+        'max_depth': summary['max_depth'],
+        'age_p99_us': age['p99_us'],
+    }
+
+
+def run(ticks: int = 500_000, capacity: int = 1 << 16, frame: int = 2_000, batch_size: int = 1_000,
+        batch_cost: float = 0.0005) -> dict:
+    records = make_ticks(ticks)
+    results = {}
+    for overflow in OVERFLOW_POLICIES:
+        for key, value in asyncio.run(ingest(records, overflow, capacity, frame, batch_size, batch_cost)).items():
+            results[f'{overflow}_{key}'] = value
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DataProcessor overflow policies under burst load")
+    parser.add_argument('--ticks', type=int, default=500_000)
+    parser.add_argument('--capacity', type=int, default=1 << 16)
+    parser.add_argument('--frame', type=int, default=2_000, help="Ticks per add_ticks call")
+    parser.add_argument('--batch-cost', type=float, default=0.0005, help="Seconds of downstream work per batch")
+    args = parser.parse_args()
+    for key, value in run(args.ticks, args.capacity, args.frame, batch_cost=args.batch_cost).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_jobs.py
+#
+# Event-loop responsiveness while a model trains: a probe task sleeps 1 ms in
+# a loop and records how late it wakes, first with Trainer.train called on
+# the loop (as main used to), then with the same training as a JobScheduler
+# job. On a single core the pool still competes for CPU, but the loop is
+# never blocked for a whole epoch.
+#
+#   python -m benchmarks.bench_jobs --rows 20000 --epochs 2
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_ingest import make_ticks
+from predictive_modeling.jobs import train_model
+from predictive_modeling.model import PredictiveModel
+from predictive_modeling.trainer import Trainer
+from utils.jobs import JobScheduler
+from utils.shared_memory import SharedArray
+
+SEQUENCE_LENGTH = 50
+
+
+def make_features(rows: int) -> np.ndarray:
+    ticks = make_ticks(rows, symbols=1)
+    return np.column_stack((ticks['timestamp'].astype(np.float64), ticks['price'],
+                            ticks['volume'].astype(np.float64), ticks['bid'], ticks['ask']))
+
+
+async def probe(lags: list, interval: float = 0.001):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+def lag_stats(label: str, lags: list, seconds: float) -> dict:
+    lags = np.array(lags) * 1e3
+    return {f'{label}_seconds': seconds, f'{label}_lag_p99_ms': float(np.percentile(lags, 99)),
+            f'{label}_lag_max_ms': float(lags.max())}
+
+
+async def inline(features: np.ndarray, epochs: int) -> dict:
+    lags = []
+    prober = asyncio.create_task(probe(lags))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    trainer = Trainer(PredictiveModel(input_shape=(SEQUENCE_LENGTH, features.shape[1])))
+    trainer.prepare_stream(features, SEQUENCE_LENGTH, batch_size=64)
+    trainer.train(epochs=epochs)
+    seconds = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    prober.cancel()
+    return lag_stats('inline', lags, seconds)
+
+
+async def pooled(features: np.ndarray, epochs: int, model_path: str) -> dict:
+    scheduler = JobScheduler(workers=1)
+    try:
+        lags = []
+        prober = asyncio.create_task(probe(lags))
+        start = time.perf_counter()
+        with SharedArray.from_array(features) as shared:
+            job = scheduler.submit(train_model, shared.spec, (SEQUENCE_LENGTH, features.shape[1]), model_path,
+                                   epochs=epochs)
+            await job.wait()
+        seconds = time.perf_counter() - start
+        prober.cancel()
+        return lag_stats('pool', lags, seconds)
+    finally:
+        scheduler.close()
+
+
+def run(rows: int = 20_000, epochs: int = 2) -> dict:
+    features = make_features(rows)
+    results = asyncio.run(inline(features, epochs))
+    with tempfile.TemporaryDirectory() as tmp:
+        results.update(asyncio.run(pooled(features, epochs, os.path.join(tmp, 'model.h5'))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag with training inline vs in the job pool")
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--epochs', type=int, default=2)
+    args = parser.parse_args()
+    for key, value in run(args.rows, args.epochs).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_logging.py
+#
+# Cost of a logging call on the calling (trading) thread: the previous setup
+# (formatter and RotatingFileHandler run in the caller) against the queue
+# pipeline from utils.logger, with an f-string and with lazy %-args, plus a
+# LogThrottle'd call site and calls below the enabled level. Each run writes
+# to its own file in a temporary directory.
+#
+#   python -m benchmarks.bench_logging --calls 50000
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+from logging.handlers import RotatingFileHandler
+from utils.logger import LogThrottle, queue_handlers
+
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def file_handler(path: str) -> logging.Handler:
+    handler = RotatingFileHandler(path, maxBytes=10485760, backupCount=5)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def isolated_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def time_calls(call, calls: int) -> dict:
+    samples = np.empty(calls, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(calls):
+        start = clock()
+        call(i)
+        samples[i] = clock() - start
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {'p50_ns': p50, 'p99_ns': p99, 'mean_ns': samples.mean()}
+
+
+def run(calls: int = 50_000) -> dict:
+    results = {}
+    batch = 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = isolated_logger('bench.sync', file_handler(os.path.join(tmp, 'sync.log')))
+        cases = {'sync_fstring': lambda i: sync.info(f"Processed batch of {batch} data points ({i} pending).")}
+        handler, listener = queue_handlers([file_handler(os.path.join(tmp, 'queued.log'))])
+        queued = isolated_logger('bench.queued', handler)
+        throttled = LogThrottle(queued, interval=1.0)
+        cases.update({
+            'queue_fstring': lambda i: queued.info(f"Processed batch of {batch} data points ({i} pending)."),
+            'queue_lazy': lambda i: queued.info("Processed batch of %d data points (%d pending).", batch, i),
+            'queue_throttled': lambda i: throttled.info("Processed batch of %d data points (%d pending).", batch, i),
+            'disabled_fstring': lambda i: queued.debug(f"Processed batch of {batch} data points ({i} pending)."),
+            'disabled_lazy': lambda i: queued.debug("Processed batch of %d data points (%d pending).", batch, i),
+        })
+        try:
+            for name, call in cases.items():
+                for key, value in time_calls(call, calls).items():
+                    results[f'{name}_{key}'] = value
+                # Let the writer catch up so cases don't bleed into each other
+                while handler.queue.qsize():
+                    time.sleep(0.01)
+        finally:
+            listener.stop()
+            for logger in (sync, queued):
+                for h in logger.handlers:
+                    h.close()
+        results['queue_dropped'] = handler.dropped
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call logging cost on the calling thread")
+    parser.add_argument('--calls', type=int, default=50_000)
+    args = parser.parse_args()
+    for key, value in run(args.calls).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
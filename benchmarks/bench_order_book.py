@@ -0,0 +1,74 @@
+# benchmarks/bench_order_book.py
+#
+# Quote-built order book: batched apply_quotes throughput across frame
+# sizes, single-quote update() latency, the cost of stamping trades with
+# their prevailing quote, and memory per symbol at a few thousand symbols.
+# Quotes come from the same synthetic session bench_replay generates.
+#
+#   python -m benchmarks.bench_order_book --events 1000000 --symbols 5000
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_replay import make_session
+from data_acquisition.journal import TickJournal
+from data_acquisition.order_book import OrderBook
+from data_acquisition.polygon_decoder import EVENT_QUOTE
+
+
+def run(events: int = 1_000_000, symbols: int = 5_000, frames=(100, 4096), single: int = 50_000) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TickJournal(make_session(os.path.join(tmp, 'session.jrnl'), events, symbols=symbols))
+        records = np.array(journal.records)
+        journal.close()
+    quotes = records[records['kind'] == EVENT_QUOTE]
+
+    for frame in frames:
+        book = OrderBook(max_symbols=symbols)
+        # Warm up so every symbol has a window before timing
+        book.apply_quotes(quotes[:frame * 10])
+        start = time.perf_counter()
+        for offset in range(0, len(quotes), frame):
+            book.apply_quotes(quotes[offset:offset + frame])
+        elapsed = time.perf_counter() - start
+        results[f'apply_{frame}_quotes_per_sec'] = len(quotes) / elapsed
+
+    book = OrderBook(max_symbols=symbols)
+    book.apply_quotes(quotes)
+    rows = quotes[:single].tolist()
+    samples = np.empty(len(rows), dtype=np.int64)
+    update = book.update
+    for i, (timestamp, symbol_id, _, _, _, _, bid, bid_size, ask, ask_size, *_) in enumerate(rows):
+        start = time.perf_counter_ns()
+        update(symbol_id, timestamp, bid, bid_size, ask, ask_size)
+        samples[i] = time.perf_counter_ns() - start
+    results['update_p50_ns'], results['update_p99_ns'] = np.percentile(samples, [50, 99])
+
+    frame = records[:4096]
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        book.prevailing_quotes(frame)
+    results['prevailing_ns_per_event'] = (time.perf_counter() - start) / (rounds * len(frame)) * 1e9
+
+    start = time.perf_counter()
+    book.depth_imbalance(5)
+    results['depth_imbalance_ms'] = (time.perf_counter() - start) * 1e3
+    results['bytes_per_symbol'] = book.nbytes / book.capacity
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quote-built order book throughput and latency")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--symbols', type=int, default=5_000)
+    args = parser.parse_args()
+    for key, value in run(args.events, args.symbols).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
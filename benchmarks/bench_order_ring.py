@@ -0,0 +1,125 @@
+# benchmarks/bench_order_ring.py
+#
+# Order submission into the C++ executor: the shared-memory ring (single and
+# bulk) versus the legacy string calls (execute_order, and
+# execute_bulk_orders, which parses the strings into a ring batch), plus the
+# submit-to-ack and
+# tick-to-trade latencies read back from the completion ring. Needs the
+# built library:
+#
+#   cmake -S order_execution -B order_execution/cpp && cmake --build order_execution/cpp
+#   python -m benchmarks.bench_order_ring --library order_execution/cpp/liborder_executor.so
+
+import argparse
+import contextlib
+import ctypes
+import os
+import time
+import numpy as np
+from order_execution.python_bindings import (
+    OrderExecutor, ORDER_TYPE_LIMIT, SIDE_BUY, price_to_ticks
+)
+
+
+@contextlib.contextmanager
+def silence_stdout():
+    # The legacy path prints every order from C++; keep it off the terminal
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            # C++ output still sitting in the stdio buffer goes to devnull too
+            ctypes.CDLL(None).fflush(None)
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def wait_drained(executor: OrderExecutor, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while len(executor.ring) and time.perf_counter() < deadline:
+        executor.poll_completions()
+        time.sleep(0.0005)
+    executor.poll_completions()
+
+
+def run(library_path: str, orders: int = 1_000_000, batch: int = 1024, single: int = 50_000,
+        legacy: int = 20_000) -> dict:
+    executor = OrderExecutor(library_path, ring_capacity=1 << 16)
+
+    samples = np.empty(single, dtype=np.int64)
+    for i in range(single):
+        # Pretend each order reacts to a tick received just before it
+        tick_ns = time.monotonic_ns()
+        start = time.perf_counter_ns()
+        while not executor.submit_order(i % 500, SIDE_BUY, 100, 150.25, trigger_ns=tick_ns):
+            executor.poll_completions()
+        samples[i] = time.perf_counter_ns() - start
+        if i % 64 == 0:
+            executor.poll_completions()
+    wait_drained(executor)
+    single_p50, single_p99 = np.percentile(samples, [50, 99]) / 1e3
+    latency = executor.latency_summary()
+
+    template = executor.new_orders(batch)
+    template['symbol_id'] = np.arange(batch) % 500
+    template['side'] = SIDE_BUY
+    template['order_type'] = ORDER_TYPE_LIMIT
+    template['quantity'] = 100
+    template['price_ticks'] = price_to_ticks(150.25)
+    sent = 0
+    start = time.perf_counter()
+    while sent < orders:
+        pending = template[:min(batch, orders - sent)]
+        while len(pending):
+            written = executor.submit_orders(pending)
+            pending = pending[written:]
+            executor.poll_completions()
+        sent += batch
+    submit_elapsed = time.perf_counter() - start
+    wait_drained(executor)
+    drained_elapsed = time.perf_counter() - start
+    stats = executor.ring_stats()
+
+    with silence_stdout():
+        start = time.perf_counter()
+        for i in range(legacy):
+            executor.execute_order(f"BUY SYM{i % 500} 100 @ 150.25")
+        legacy_elapsed = time.perf_counter() - start
+        strings = [f"BUY SYM{i % 500} 100 @ 150.25" for i in range(legacy)]
+        start = time.perf_counter()
+        for offset in range(0, legacy, batch):
+            executor.execute_bulk_orders(strings[offset:offset + batch])
+        legacy_bulk_elapsed = time.perf_counter() - start
+    executor.close()
+
+    return {
+        'single_submit_p50_us': float(single_p50),
+        'single_submit_p99_us': float(single_p99),
+        'tick_to_trade_p50_us': latency['tick_to_trade']['p50_us'],
+        'tick_to_trade_p99_us': latency['tick_to_trade']['p99_us'],
+        'submit_to_ack_p50_us': latency['submit_to_ack']['p50_us'],
+        'submit_to_ack_p99_us': latency['submit_to_ack']['p99_us'],
+        'bulk_submit_orders_per_sec': orders / submit_elapsed,
+        'end_to_end_orders_per_sec': orders / drained_elapsed,
+        'mean_dequeue_latency_us': stats['mean_dequeue_latency_us'],
+        'legacy_orders_per_sec': legacy / legacy_elapsed,
+        'legacy_bulk_orders_per_sec': legacy / legacy_bulk_elapsed,
+        'processed': stats['processed'],
+        'completions_dropped': stats['completions_dropped'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order ring throughput and latency")
+    parser.add_argument('--library', default='order_execution/cpp/liborder_executor.so')
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--batch', type=int, default=1024)
+    args = parser.parse_args()
+    for key, value in run(args.library, args.orders, args.batch).items():
+        print(f"{key:>28}: {value:,.2f}" if isinstance(value, float) else f"{key:>28}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+# benchmarks/bench_pipeline.py
+#
+# Where the time goes between a frame arriving and an order leaving. A
+# synthetic session is replayed over a local websocket (ReplayServer in a
+# child process, as a stand-in for the Polygon feed, so encoding the feed
+# doesn't share the measured event loop) into DataStream -> DataProcessor, and
+# optionally through the model (--model), the C++ executor (--library) and
+# a FIX session with the local acceptor (--fix-port). Orders react to each
+# batch (or, with --model, to each prediction batch) carrying its receive
+# time, and every stage lands in one LatencyMonitor alongside the event-loop
+# lag probe; the result is each stage's percentiles.
+#
+#   python -m benchmarks.bench_pipeline --events 200000 --speed 1
+#   python -m benchmarks.bench_pipeline --model --library order_execution/cpp/liborder_executor.so --fix-port 5021
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.bench_replay import make_session
+from data_acquisition.data_processor import DataProcessor
+from data_acquisition.data_stream import DataStream
+from data_acquisition.journal import ReplayServer, TickJournal
+from data_acquisition.polygon_decoder import EVENT_TRADE
+from utils.latency import LatencyMonitor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _serve(journal_path: str, speed: float, ports):
+    # Child process: the replay feed, until terminated
+    async def serve():
+        server = await ReplayServer(TickJournal(journal_path), port=0, speed=speed).start()
+        ports.put(server.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def start_feed(journal_path: str, speed: float, timeout: float = 30.0):
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    feed = context.Process(target=_serve, args=(journal_path, speed, ports), name='replay-feed', daemon=True)
+    feed.start()
+    return feed, f"ws://127.0.0.1:{ports.get(timeout=timeout)}"
+
+
+def start_fix(root: str, port: int, latency: LatencyMonitor, timeout: float = 30.0):
+    from benchmarks.bench_fix_gateway import ACCEPTOR_CFG, INITIATOR_CFG
+    from fix_integration.fix_client import FixClient
+    with open(os.path.join(root, 'acceptor.cfg'), 'w') as f:
+        f.write(ACCEPTOR_CFG.format(root=root, port=port))
+    with open(os.path.join(root, 'initiator.cfg'), 'w') as f:
+        f.write(INITIATOR_CFG.format(root=root, port=port))
+    acceptor = subprocess.Popen([sys.executable, '-m', 'fix_integration.acceptor',
+                                 '--config', os.path.join(root, 'acceptor.cfg')], cwd=ROOT,
+                                env={**os.environ, 'PYTHONPATH': ROOT},
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = FixClient(os.path.join(root, 'initiator.cfg'), latency=latency)
+    client.start()
+    deadline = time.monotonic() + timeout
+    while not client.is_logged_on():
+        if time.monotonic() > deadline:
+            client.stop()
+            acceptor.terminate()
+            raise RuntimeError("FIX session did not log on")
+        time.sleep(0.05)
+    return client, acceptor
+
+
+async def pipeline(journal: TickJournal, root: str, speed: float, batch_size: int, model: bool,
+                   library_path: str, fix_port: int, timeout: float) -> dict:
+    latency = LatencyMonitor(window_s=3600.0)
+    processor = DataProcessor(batch_size=batch_size, latency=latency)
+    for name in journal.symbols.symbols:
+        processor.symbols.get_id(name)
+    feed, uri = start_feed(journal.path, speed)
+    tasks = [asyncio.create_task(latency.run_loop_lag_probe(0.001)),
+             asyncio.create_task(processor.run_periodic_processing())]
+    executor = client = acceptor = engine = None
+    sent = 0
+    try:
+        if library_path:
+            from order_execution.python_bindings import OrderExecutor, SIDE_BUY
+            executor = OrderExecutor(library_path, latency=latency)
+            tasks.append(asyncio.create_task(executor.run_completion_polling()))
+        if fix_port:
+            from fix_integration.gateway import SIDE_BUY as FIX_BUY
+            client, acceptor = start_fix(root, fix_port, latency)
+
+        def send(symbol_id: int, price: float, trigger_ns: int):
+            # One order per reacting batch, through whichever order paths run
+            nonlocal sent
+            if executor is not None:
+                executor.submit_order(symbol_id, SIDE_BUY, 100, price, trigger_ns=trigger_ns)
+            if client is not None:
+                client.gateway.send_order(processor.symbols.symbols[symbol_id], FIX_BUY, 100, round(price, 2),
+                                          trigger_ns=trigger_ns)
+            sent += 1
+
+        if model:
+            from predictive_modeling.inference import InferenceEngine
+            from predictive_modeling.model import PredictiveModel
+            from predictive_modeling.windows import FeatureWindows
+            engine = InferenceEngine(PredictiveModel(input_shape=(100, 5)).get_model(), FeatureWindows(100, 5),
+                                     latency=latency)
+            engine.attach(processor)
+            last_price = {}
+            processor.batch_handlers.append(
+                lambda ticks: last_price.update(zip(ticks['symbol_id'].tolist(), ticks['price'].tolist())))
+            engine.prediction_handlers.append(
+                lambda results: send(int(results['symbol_id'][0]), last_price[int(results['symbol_id'][0])],
+                                     int(results['received_ns'][0])))
+            tasks.append(asyncio.create_task(engine.run()))
+        else:
+            processor.batch_handlers.append(
+                lambda ticks: send(int(ticks['symbol_id'][-1]), float(ticks['price'][-1]),
+                                   processor.batch_received_ns))
+
+        trades = int((journal.records['kind'] == EVENT_TRADE).sum())
+        stream = DataStream('polygon', {'polygon': {'websocket_uri': uri, 'api_key': ''}}, processor,
+                            latency=latency)
+        start = time.perf_counter()
+        tasks.append(asyncio.create_task(stream.connect()))
+        deadline = start + timeout
+        while processor.received < trades or len(processor.buffer):
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"Pipeline stalled at {processor.received}/{trades} trades")
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        # Let the last orders complete
+        await asyncio.sleep(0.1)
+        if executor is not None:
+            executor.poll_completions()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if engine is not None:
+            engine.close()
+        if executor is not None:
+            executor.close()
+        if client is not None:
+            client.stop()
+        if acceptor is not None:
+            acceptor.terminate()
+            acceptor.wait()
+        feed.terminate()
+        feed.join()
+
+    results = {'events': len(journal), 'trades': trades, 'batches': processor.batches, 'orders': sent,
+               'seconds': elapsed, 'events_per_sec': len(journal) / elapsed}
+    for stage, summary in latency.summary((50, 99)).items():
+        if summary['count']:
+            results[f'{stage}_p50_us'] = summary['p50_us']
+            results[f'{stage}_p99_us'] = summary['p99_us']
+    return results
+
+
+def run(events: int = 200_000, speed: float = 1.0, batch_size: int = 1000, model: bool = False,
+        library_path: str = None, fix_port: int = None, timeout: float = 300.0) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = TickJournal(make_session(os.path.join(tmp, 'session.jrnl'), events))
+        try:
+            return asyncio.run(pipeline(journal, tmp, speed, batch_size, model, library_path, fix_port, timeout))
+        finally:
+            journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline latency by stage")
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed multiple; 0 for max speed")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--model', action='store_true', help="Score batches with the predictive model")
+    parser.add_argument('--library', default=None, help="Built liborder_executor.so to send orders through")
+    parser.add_argument('--fix-port', type=int, default=None, help="Send orders to a local FIX acceptor")
+    args = parser.parse_args()
+    results = run(args.events, args.speed or None, args.batch_size, args.model, args.library, args.fix_port)
+    for key, value in results.items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
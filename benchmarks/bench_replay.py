@@ -0,0 +1,97 @@
+# benchmarks/bench_replay.py
+#
+# Deterministic ingest load test: replays a tick journal into DataProcessor at
+# max speed (or --speed N) and reports events/sec end to end, with the
+# batcher running as it does live. Without --journal a synthetic session is
+# generated first.
+#
+#   python -m benchmarks.bench_replay --events 2000000
+#   python -m benchmarks.bench_replay --journal data/journal/session.jrnl --speed 10
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import numpy as np
+from data_acquisition.data_processor import DataProcessor
+from data_acquisition.journal import JournalReplayer, JournalWriter, TickJournal
+from data_acquisition.polygon_decoder import EVENT_DTYPE, EVENT_QUOTE, EVENT_TRADE
+from data_acquisition.tick_buffer import SymbolRegistry
+
+
+def make_session(path: str, events: int, symbols: int = 500, trade_share: float = 0.3, seed: int = 7) -> str:
+    rng = np.random.default_rng(seed)
+    registry = SymbolRegistry()
+    for i in range(symbols):
+        registry.get_id(f"SYM{i:04d}")
+    writer = JournalWriter(path, registry)
+    ts = 1_700_000_000_000_000_000
+    chunk = 100_000
+    for start in range(0, events, chunk):
+        n = min(chunk, events - start)
+        records = np.zeros(n, dtype=EVENT_DTYPE)
+        # ~100k events per second of session time
+        records['timestamp'] = ts + np.cumsum(rng.integers(0, 20_000, n))
+        ts = int(records['timestamp'][-1])
+        # Zipf-like symbol activity, as on a real tape
+        records['symbol_id'] = np.minimum(rng.zipf(1.3, n) - 1, symbols - 1)
+        is_trade = rng.random(n) < trade_share
+        records['kind'] = np.where(is_trade, EVENT_TRADE, EVENT_QUOTE)
+        mid = 100 + records['symbol_id'] * 0.1 + rng.normal(0, 0.05, n)
+        records['price'] = np.where(is_trade, mid.round(2), 0.0)
+        records['size'] = np.where(is_trade, rng.integers(1, 500, n), 0)
+        records['bid'] = np.where(is_trade, 0.0, (mid - 0.01).round(2))
+        records['ask'] = np.where(is_trade, 0.0, (mid + 0.01).round(2))
+        records['bid_size'] = np.where(is_trade, 0, rng.integers(1, 50, n))
+        records['ask_size'] = np.where(is_trade, 0, rng.integers(1, 50, n))
+        writer.append(records)
+    writer.close()
+    return path
+
+
+async def replay(journal: TickJournal, speed: float = None, batch_size: int = 1000) -> dict:
+    processor = DataProcessor(batch_size=batch_size)
+    replayer = JournalReplayer(journal, speed=speed)
+    batcher = asyncio.create_task(processor.run_periodic_processing())
+    start = time.perf_counter()
+    await replayer.replay_to_processor(processor)
+    while len(processor.buffer):
+        await processor.process_batch()
+    elapsed = time.perf_counter() - start
+    batcher.cancel()
+    age = processor.latency.summary().get('batch_age', {})
+    return {
+        'events': len(journal),
+        'trades': int(processor.processed_data.head),
+        'dropped': processor.buffer.dropped,
+        'batches': processor.batches,
+        'max_depth': processor.max_depth,
+        'batch_age_p99_us': float(age.get('p99_us', 0.0)),
+        'seconds': elapsed,
+        'events_per_sec': len(journal) / elapsed,
+    }
+
+
+def run(events: int = 1_000_000, journal_path: str = None, speed: float = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        if journal_path is None:
+            journal_path = make_session(os.path.join(tmp, 'session.jrnl'), events)
+        journal = TickJournal(journal_path)
+        results = asyncio.run(replay(journal, speed))
+        journal.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a tick journal into DataProcessor")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--journal', default=None)
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed multiple; omit for max speed")
+    args = parser.parse_args()
+    for key, value in run(args.events, args.journal, args.speed).items():
+        print(f"{key:>16}: {value:,.1f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_risk.py
+#
+# Pre-trade risk overhead: RiskEngine.check_order latency per order, and
+# check_batch cost per order across batch sizes. With --library, also the
+# executor's submit_order / submit_orders with and without the risk gate.
+# Limits are set wide enough that orders are accepted, and sides alternate
+# so the projected position stays small.
+#
+#   python -m benchmarks.bench_risk
+#   python -m benchmarks.bench_risk --library order_execution/cpp/liborder_executor.so
+
+import argparse
+import time
+import numpy as np
+from risk.risk_engine import RiskEngine, RISK_ACCEPTED
+
+SYMBOLS = 500
+OPEN_LIMITS = {'orders_per_sec': 1e12, 'burst': 1e12, 'max_position': 1 << 40, 'max_notional': 1e18}
+OPEN_GLOBAL_LIMITS = {'orders_per_sec': 1e12, 'burst': 1e12, 'max_gross_position': 1 << 50,
+                      'max_gross_notional': 1e20}
+
+
+def make_engine() -> RiskEngine:
+    engine = RiskEngine(limits=OPEN_LIMITS, global_limits=OPEN_GLOBAL_LIMITS)
+    for i in range(SYMBOLS):
+        engine.symbols.get_id(f'S{i}')
+    engine.last_price[:SYMBOLS] = 150.0
+    return engine
+
+
+def run_scalar(orders: int) -> dict:
+    engine = make_engine()
+    check = engine.check_order
+    samples = np.empty(orders, dtype=np.int64)
+    for i in range(orders):
+        start = time.perf_counter_ns()
+        code = check(i % SYMBOLS, 1 if i & 1 else -1, 100, 150.25)
+        samples[i] = time.perf_counter_ns() - start
+        assert code == RISK_ACCEPTED, code
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {'check_order_p50_ns': p50, 'check_order_p99_ns': p99}
+
+
+def run_batch(orders: int, sizes=(1, 64, 1024, 16384)) -> dict:
+    results = {}
+    for size in sizes:
+        engine = make_engine()
+        ids = np.arange(size) % SYMBOLS
+        sides = np.where(np.arange(size) & 1, 1, -1)
+        quantities = np.full(size, 100)
+        prices = np.full(size, 150.25)
+        rounds = max(orders // size, 1)
+        start = time.perf_counter_ns()
+        for _ in range(rounds):
+            codes = engine.check_batch(ids, sides, quantities, prices)
+        elapsed = time.perf_counter_ns() - start
+        assert (codes == RISK_ACCEPTED).all()
+        results[f'check_batch_{size}_ns_per_order'] = elapsed / (rounds * size)
+    return results
+
+
+def run_executor(library_path: str, orders: int, batch: int = 1024) -> dict:
+    from order_execution.python_bindings import OrderExecutor, ORDER_TYPE_LIMIT, SIDE_BUY, price_to_ticks
+    results = {}
+    for label, risk in (('no_risk', None), ('risk', make_engine())):
+        executor = OrderExecutor(library_path, ring_capacity=1 << 16, risk=risk)
+        try:
+            samples = np.empty(orders, dtype=np.int64)
+            for i in range(orders):
+                start = time.perf_counter_ns()
+                while not executor.submit_order(i % SYMBOLS, SIDE_BUY, 100, 150.25):
+                    executor.poll_completions()
+                samples[i] = time.perf_counter_ns() - start
+                if i % 64 == 0:
+                    executor.poll_completions()
+            results[f'submit_order_{label}_p50_ns'] = np.percentile(samples, 50)
+
+            template = executor.new_orders(batch)
+            template['symbol_id'] = np.arange(batch) % SYMBOLS
+            template['side'] = SIDE_BUY
+            template['order_type'] = ORDER_TYPE_LIMIT
+            template['quantity'] = 100
+            template['price_ticks'] = price_to_ticks(150.25)
+            sent = 0
+            start = time.perf_counter_ns()
+            while sent < orders:
+                pending = template
+                while len(pending):
+                    pending = pending[executor.submit_orders(pending):]
+                    executor.poll_completions()
+                sent += batch
+            results[f'submit_orders_{label}_ns_per_order'] = (time.perf_counter_ns() - start) / sent
+        finally:
+            executor.close()
+    return results
+
+
+def run(orders: int = 100_000, library_path: str = None) -> dict:
+    results = run_scalar(orders)
+    results.update(run_batch(orders))
+    if library_path:
+        results.update(run_executor(library_path, orders))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-trade risk check overhead")
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--library', default=None, help="Built liborder_executor.so for the executor comparison")
+    args = parser.parse_args()
+    for key, value in run(args.orders, args.library).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_runtime.py
+#
+# Cold start, memory and single-window latency of the NumPy runtime versus
+# loading the Keras .h5 with TensorFlow. Each cold start runs in a fresh
+# interpreter so import time and RSS are measured from nothing.
+#
+#   python -m benchmarks.bench_runtime
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from predictive_modeling.export import export_model
+from predictive_modeling.model import PredictiveModel
+
+_COLD_START = """
+import json, time
+start = time.perf_counter()
+{load}
+x = __import__('numpy').zeros((1, 100, 5), dtype='float32')
+predict(x)
+elapsed = time.perf_counter() - start
+# VmHWM rather than ru_maxrss, which survives exec from this (TF-loaded) parent
+peak_kb = next(int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmHWM'))
+print(json.dumps({{'seconds': elapsed, 'max_rss_mb': peak_kb / 1024}}))
+"""
+
+_LOAD_RUNTIME = """
+from predictive_modeling.runtime import NumpyModel
+predict = NumpyModel.load({path!r}).predict
+"""
+
+_LOAD_KERAS = """
+import tensorflow as tf
+model = tf.keras.models.load_model({path!r})
+predict = lambda x: model(x, training=False)
+"""
+
+
+def cold_start(load: str) -> dict:
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3', PYTHONPATH=os.getcwd())
+    output = subprocess.run([sys.executable, '-c', _COLD_START.format(load=load)], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def latency(predict, windows: np.ndarray) -> dict:
+    samples = np.empty(len(windows), dtype=np.int64)
+    predict(windows[:1])
+    for i in range(len(windows)):
+        start = time.perf_counter_ns()
+        predict(windows[i:i + 1])
+        samples[i] = time.perf_counter_ns() - start
+    p50, p99 = np.percentile(samples, [50, 99]) / 1e3
+    return {'p50_us': float(p50), 'p99_us': float(p99)}
+
+
+def run(requests: int = 500) -> dict:
+    model = PredictiveModel(input_shape=(100, 5)).get_model()
+    # Non-trivial BatchNorm statistics, including negative scales
+    rng = np.random.default_rng(0)
+    for layer in model.layers:
+        if type(layer).__name__ == 'BatchNormalization':
+            channels = layer.get_weights()[0].shape[0]
+            layer.set_weights([rng.normal(0, 1, channels), rng.normal(0, 0.5, channels),
+                               rng.normal(0, 0.5, channels), rng.uniform(0.5, 2.0, channels)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h5_path = os.path.join(tmp, 'model.h5')
+        bin_path = os.path.join(tmp, 'model.bin')
+        model.save(h5_path)
+        runtime = export_model(model, bin_path)
+
+        windows = rng.normal(size=(requests, 100, 5)).astype(np.float32)
+        error = float(np.max(np.abs(runtime.predict(windows) - model(windows, training=False).numpy())))
+        numpy_cold = cold_start(_LOAD_RUNTIME.format(path=bin_path))
+        keras_cold = cold_start(_LOAD_KERAS.format(path=h5_path))
+        numpy_latency = latency(runtime.predict, windows)
+        keras_latency = latency(lambda x: model(x, training=False), windows)
+
+    return {
+        'max_abs_error': error,
+        'numpy_cold_start_ms': numpy_cold['seconds'] * 1e3,
+        'keras_cold_start_ms': keras_cold['seconds'] * 1e3,
+        'numpy_max_rss_mb': numpy_cold['max_rss_mb'],
+        'keras_max_rss_mb': keras_cold['max_rss_mb'],
+        'numpy_p50_us': numpy_latency['p50_us'],
+        'numpy_p99_us': numpy_latency['p99_us'],
+        'keras_p50_us': keras_latency['p50_us'],
+        'keras_p99_us': keras_latency['p99_us'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy runtime versus Keras cold start and latency")
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    for key, value in run(args.requests).items():
+        print(f"{key:>20}: {value:,.3g}" if isinstance(value, float) and value < 1 else
+              f"{key:>20}: {value:,.1f}")
+
+
+if __name__ == '__main__':
+    main()
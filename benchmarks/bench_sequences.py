@@ -0,0 +1,91 @@
+# benchmarks/bench_sequences.py
+#
+# Training-window construction: the original create_sequences (a Python loop
+# stacking a copy of every window) against the strided view it returns now,
+# and the batches training actually reads from that data: shuffled gathers
+# from the view and WindowGenerator's normalized batches.
+#
+#   python -m benchmarks.bench_sequences --rows 200000 --sequence-length 100
+
+import argparse
+import time
+import numpy as np
+from predictive_modeling.dataset import WindowGenerator
+from predictive_modeling.utils import create_sequences, normalization_stats
+
+
+def legacy_create_sequences(data: np.ndarray, sequence_length: int = 100) -> np.ndarray:
+    # The original implementation
+    sequences = []
+    for i in range(len(data) - sequence_length):
+        sequences.append(data[i:i+sequence_length])
+    return np.array(sequences)
+
+
+def make_features(rows: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    price = 100 + np.cumsum(rng.normal(0, 0.01, rows))
+    return np.column_stack((
+        1_700_000_000_000_000_000 + np.arange(rows, dtype=np.float64) * 1000,
+        price,
+        rng.integers(1, 500, rows).astype(np.float64),
+        price - 0.01,
+        price + 0.01,
+    ))
+
+
+def run(rows: int = 200_000, sequence_length: int = 100, batch_size: int = 64, batches: int = 500,
+        legacy_rows: int = 20_000) -> dict:
+    features = make_features(rows)
+    results = {'rows': rows, 'sequence_length': sequence_length}
+
+    legacy_input = features[:legacy_rows]
+    start = time.perf_counter()
+    legacy = legacy_create_sequences(legacy_input, sequence_length)
+    elapsed = time.perf_counter() - start
+    results['legacy_windows_per_sec'] = len(legacy) / elapsed
+    results['legacy_mb'] = legacy.nbytes / 1e6
+
+    start = time.perf_counter()
+    windows = create_sequences(features, sequence_length)
+    elapsed = time.perf_counter() - start
+    results['view_us'] = elapsed * 1e6
+    results['view_windows_per_sec'] = len(windows) / elapsed
+    if not np.array_equal(windows[:len(legacy)], legacy):
+        raise RuntimeError("create_sequences does not match the original windows")
+
+    rng = np.random.default_rng(5)
+    starts = rng.integers(0, len(windows), (batches, batch_size))
+    start = time.perf_counter()
+    for batch in starts:
+        np.ascontiguousarray(windows[batch], dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    results['gather_batch_us'] = elapsed / batches * 1e6
+    results['gather_windows_per_sec'] = batches * batch_size / elapsed
+
+    mean, std = normalization_stats(features)
+    generator = WindowGenerator(features, sequence_length, mean, std, batch_size=batch_size)
+    start = time.perf_counter()
+    for batch in starts:
+        generator.batch(np.sort(batch))
+    elapsed = time.perf_counter() - start
+    results['generator_batch_us'] = elapsed / batches * 1e6
+    results['generator_windows_per_sec'] = batches * batch_size / elapsed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training window construction")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--sequence-length', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--batches', type=int, default=500)
+    parser.add_argument('--legacy-rows', type=int, default=20_000)
+    args = parser.parse_args()
+    for key, value in run(args.rows, args.sequence_length, args.batch_size, args.batches,
+                          args.legacy_rows).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_sharding.py
+#
+# Replays a busy tick journal at max speed into one in-process DataProcessor
+# and into ShardedProcessor with 1..N worker processes, and reports events/sec
+# end to end (routing, ring transfer, per-shard indicators and result
+# collection) with the speedup over the single processor. Scaling is bounded
+# by the cores available: shards beyond os.cpu_count() only add overhead.
+#
+#   python -m benchmarks.bench_sharding --events 2000000 --shards 1 2 4
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from benchmarks.bench_replay import make_session, replay
+from data_acquisition.journal import JournalReplayer, TickJournal
+from data_acquisition.sharding import ShardedProcessor
+
+
+async def replay_sharded(journal: TickJournal, shards: int, batch_size: int = 1000) -> dict:
+    processor = ShardedProcessor(shards, batch_size=batch_size)
+    processor.start()
+    try:
+        if not await processor.wait_ready():
+            raise RuntimeError("Processing shards did not start")
+        replayer = JournalReplayer(journal)
+        start = time.perf_counter()
+
+        # Collect results while replaying, as the live loop would
+        async def collect():
+            while True:
+                processor.poll()
+                await asyncio.sleep(0.001)
+
+        collector = asyncio.create_task(collect())
+        await replayer.replay_to_processor(processor)
+        drained = await processor.drain()
+        elapsed = time.perf_counter() - start
+        collector.cancel()
+        if not drained:
+            raise RuntimeError(f"Shards did not drain: {processor.summary()}")
+        return {'seconds': elapsed, 'events_per_sec': len(journal) / elapsed, **processor.summary()}
+    finally:
+        processor.close()
+
+
+def run(events: int = 1_000_000, shards=(1, 2, 4), journal_path: str = None) -> dict:
+    results = {'cpus': os.cpu_count()}
+    with tempfile.TemporaryDirectory() as tmp:
+        if journal_path is None:
+            journal_path = make_session(os.path.join(tmp, 'session.jrnl'), events)
+        journal = TickJournal(journal_path)
+        baseline = asyncio.run(replay(journal))
+        results['single_events_per_sec'] = baseline['events_per_sec']
+        for count in shards:
+            sharded = asyncio.run(replay_sharded(journal, count))
+            results[f'shards_{count}_events_per_sec'] = sharded['events_per_sec']
+            results[f'shards_{count}_speedup'] = sharded['events_per_sec'] / baseline['events_per_sec']
+            results[f'shards_{count}_stalls'] = sharded['stalls']
+        journal.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded processing throughput on a replayed journal")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--journal', default=None)
+    args = parser.parse_args()
+    for key, value in run(args.events, args.shards, args.journal).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
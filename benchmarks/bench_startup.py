@@ -0,0 +1,126 @@
+# benchmarks/bench_startup.py
+#
+# Cold start of the platform entry point. First the import cost of the
+# modules main used to import up front against those live mode imports, each
+# in a fresh interpreter. Then a full live-mode start against local
+# stand-ins (a journal ReplayServer for the Polygon feed, the FIX acceptor,
+# and a built executor library), reading main's --startup-profile for the
+# time to ready, FIX logon and first tick.
+#
+#   python -m benchmarks.bench_startup --library order_execution/cpp/liborder_executor.so
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+from benchmarks.bench_fix_gateway import ACCEPTOR_CFG, INITIATOR_CFG
+from benchmarks.bench_replay import make_session
+from data_acquisition.journal import ReplayServer, TickJournal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What main imported before run modes
+EAGER_IMPORTS = [
+    'pandas', 'data_acquisition.data_stream', 'data_acquisition.data_processor', 'data_acquisition.sharding',
+    'backtesting.backtester', 'order_execution.python_bindings', 'predictive_modeling.model',
+    'predictive_modeling.trainer', 'fix_integration.fix_client', 'fix_integration.order_store',
+    'risk.risk_engine',
+]
+LIVE_IMPORTS = [
+    'data_acquisition.data_stream', 'data_acquisition.data_processor', 'risk.risk_engine',
+    'fix_integration.fix_client', 'fix_integration.order_store', 'order_execution.python_bindings',
+]
+
+
+def import_seconds(modules, rounds: int = 3) -> float:
+    script = ("import time; start = time.perf_counter(); "
+              + "; ".join(f"import {m}" for m in modules)
+              + "; print(time.perf_counter() - start)")
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    samples = [float(subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True,
+                                    capture_output=True, text=True).stdout.strip().splitlines()[-1])
+               for _ in range(rounds)]
+    return min(samples)
+
+
+async def live_start(library_path: str, events: int, port: int, timeout: float) -> dict:
+    root = tempfile.mkdtemp(prefix='startup_bench_')
+    journal = TickJournal(make_session(os.path.join(root, 'session.jrnl'), events))
+    server = await ReplayServer(journal, port=0).start()
+    with open(os.path.join(root, 'acceptor.cfg'), 'w') as f:
+        f.write(ACCEPTOR_CFG.format(root=root, port=port))
+    with open(os.path.join(root, 'initiator.cfg'), 'w') as f:
+        f.write(INITIATOR_CFG.format(root=root, port=port))
+    with open(os.path.join(ROOT, 'config', 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['data_acquisition']['polygon']['websocket_uri'] = server.uri
+    config['order_execution']['library_path'] = os.path.abspath(library_path)
+    config['fix']['config_file'] = os.path.join(root, 'initiator.cfg')
+    config_path = os.path.join(root, 'config.yaml')
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f)
+    profile_path = os.path.join(root, 'startup.json')
+
+    acceptor = subprocess.Popen([sys.executable, '-m', 'fix_integration.acceptor',
+                                 '--config', os.path.join(root, 'acceptor.cfg')], cwd=ROOT,
+                                env={**os.environ, 'PYTHONPATH': ROOT},
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    platform = None
+    try:
+        await asyncio.sleep(1.0)  # acceptor listening
+        start = time.perf_counter()
+        platform = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(ROOT, 'main,py'), '--mode', 'live', '--config', config_path,
+            '--startup-profile', profile_path, cwd=root, env={**os.environ, 'PYTHONPATH': ROOT},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = start + timeout
+        while not os.path.exists(profile_path):
+            if platform.returncode is not None or time.perf_counter() > deadline:
+                raise RuntimeError("Live mode produced no startup profile (no first tick)")
+            await asyncio.sleep(0.01)
+        wall = time.perf_counter() - start
+        await asyncio.sleep(0.2)
+        with open(profile_path) as f:
+            profile = json.load(f)
+    finally:
+        if platform is not None and platform.returncode is None:
+            platform.terminate()
+            await platform.wait()
+        acceptor.terminate()
+        acceptor.wait()
+        await server.stop()
+        journal.close()
+    marks = profile['marks']
+    results = {'process_to_first_tick_s': wall}
+    for name in ('ready', 'fix_logon', 'first_tick'):
+        if name in marks:
+            results[f'{name}_s'] = marks[name]
+    for step in profile['steps']:
+        results[f"{step['kind']}_{step['name']}_ms"] = step['seconds'] * 1e3
+    return results
+
+
+def run(library_path: str = None, events: int = 200_000, port: int = 5011, timeout: float = 60.0) -> dict:
+    results = {'eager_imports_s': import_seconds(EAGER_IMPORTS), 'live_imports_s': import_seconds(LIVE_IMPORTS)}
+    if library_path:
+        results.update(asyncio.run(live_start(library_path, events, port, timeout)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Platform cold start: imports and live time to first tick")
+    parser.add_argument('--library', default=None, help="Built liborder_executor.so for the live-mode start")
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--port', type=int, default=5011, help="Local FIX acceptor port")
+    args = parser.parse_args()
+    for key, value in run(args.library, args.events, args.port).items():
+        print(f"{key:>28}: {value:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_sweep.py
+#
+# Parameter-sweep throughput: runs/sec for a fast/slow/order_percentage grid
+# over synthetic minute bars on a process pool.
+#
+#   python -m benchmarks.bench_sweep --bars 200000 --workers 8
+
+import argparse
+import time
+import numpy as np
+from backtesting.sweep import ParameterSweep, grid
+from benchmarks.bench_backtest import make_bars
+
+
+def run(bars: int = 100_000, workers: int = None, fast_periods: int = 20, slow_periods: int = 25,
+        percentages: int = 4) -> dict:
+    data = make_bars(bars)
+    space = {
+        'fast_period': list(range(5, 5 + 5 * fast_periods, 5)),
+        'slow_period': list(range(50, 50 + 10 * slow_periods, 10)),
+        'order_percentage': list(np.linspace(0.5, 0.95, percentages).round(3)),
+    }
+    param_sets = grid(space)
+    sweep = ParameterSweep(data, workers=workers)
+    start = time.perf_counter()
+    results = sweep.run(param_sets)
+    elapsed = time.perf_counter() - start
+    best = results.iloc[0]
+    return {
+        'bars': bars,
+        'workers': sweep.workers,
+        'runs': len(results),
+        'seconds': elapsed,
+        'runs_per_sec': len(results) / elapsed,
+        'best_params': f"fast={best['fast_period']} slow={best['slow_period']} pct={best['order_percentage']}",
+        'best_sharpe': float(best['sharpe_ratio']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel parameter sweep")
+    parser.add_argument('--bars', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    for key, value in run(args.bars, args.workers).items():
+        print(f"{key:>14}: {value:,.4f}" if isinstance(value, float) else f"{key:>14}: {value}")
+
+
+if __name__ == '__main__':
+    main()
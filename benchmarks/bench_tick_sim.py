@@ -0,0 +1,131 @@
+# benchmarks/bench_tick_sim.py
+#
+# Tick backtester throughput: a touch-joining market maker replayed over a
+# synthetic quote/trade tape (or a recorded journal), reporting events/sec.
+#
+#   python -m benchmarks.bench_tick_sim --events 10000000
+#   python -m benchmarks.bench_tick_sim --journal data/journal/session.jrnl
+
+import argparse
+import time
+import numpy as np
+from backtesting.tick_simulator import BUY, SELL, TickSimulator, TickStrategy
+from data_acquisition.journal import TickJournal
+from data_acquisition.polygon_decoder import EVENT_DTYPE, EVENT_QUOTE, EVENT_TRADE
+
+
+def make_events(events: int, symbols: int = 50, trade_share: float = 0.2, seed: int = 11) -> np.ndarray:
+    # A random-walk NBBO per symbol with a one-cent spread; trades print at
+    # the bid or the ask
+    rng = np.random.default_rng(seed)
+    records = np.zeros(events, dtype=EVENT_DTYPE)
+    records['timestamp'] = 1_700_000_000_000_000_000 + np.cumsum(rng.integers(0, 20_000, events))
+    sym = rng.integers(0, symbols, events)
+    records['symbol_id'] = sym
+    steps = rng.choice(np.array([-1, 0, 0, 0, 1]), events)
+    order = np.argsort(sym, kind='stable')
+    ticks = np.empty(events, dtype=np.int64)
+    walk = np.cumsum(steps[order])
+    starts = np.flatnonzero(np.r_[True, np.diff(sym[order]) != 0])
+    walk -= np.repeat(walk[starts] - steps[order][starts], np.diff(np.r_[starts, events]))
+    ticks[order] = walk
+    bid = (10_000 + sym * 100 + ticks) / 100.0
+    is_trade = rng.random(events) < trade_share
+    records['kind'] = np.where(is_trade, EVENT_TRADE, EVENT_QUOTE)
+    records['bid'] = np.where(is_trade, 0.0, bid)
+    records['ask'] = np.where(is_trade, 0.0, bid + 0.01)
+    records['bid_size'] = np.where(is_trade, 0, rng.integers(1, 20, events) * 100)
+    records['ask_size'] = np.where(is_trade, 0, rng.integers(1, 20, events) * 100)
+    records['price'] = np.where(is_trade, bid + 0.01 * rng.integers(0, 2, events), 0.0)
+    records['size'] = np.where(is_trade, rng.integers(1, 10, events) * 100, 0)
+    return records
+
+
+class TouchMaker(TickStrategy):
+    # Keeps one bid and one offer at the touch per symbol, requoting when the
+    # touch moves and going one-sided at the inventory limit
+    def __init__(self, quantity: int = 100, max_position: int = 500):
+        self.quantity = quantity
+        self.max_position = max_position
+
+    def on_start(self, sim):
+        self.position = {}
+        self.working = {}   # (symbol_id, side) -> (order_id, price)
+        self.cancelling = set()
+
+    def on_quote(self, sim, symbol_id, timestamp, bid, bid_size, ask, ask_size):
+        position = self.position.get(symbol_id, 0)
+        if position < self.max_position:
+            self._quote(sim, symbol_id, BUY, bid)
+        if position > -self.max_position:
+            self._quote(sim, symbol_id, SELL, ask)
+
+    def _quote(self, sim, symbol_id, side, price):
+        working = self.working.get((symbol_id, side))
+        if working is not None:
+            order_id, working_price = working
+            if working_price == price or order_id in self.cancelling:
+                return
+            self.cancelling.add(order_id)
+            sim.cancel(order_id)
+            return
+        self.working[(symbol_id, side)] = (sim.submit(symbol_id, side, price, self.quantity), price)
+
+    def on_fill(self, sim, order_id, symbol_id, side, price, quantity, timestamp):
+        self.position[symbol_id] = self.position.get(symbol_id, 0) + side * quantity
+        if sim.order_filled[order_id] == sim.order_quantity[order_id]:
+            self._done(symbol_id, side, order_id)
+
+    def on_cancel(self, sim, order_id, timestamp):
+        self._done(sim.order_symbol[order_id], sim.order_side[order_id], order_id)
+
+    def on_cancel_reject(self, sim, order_id, timestamp):
+        self.cancelling.discard(order_id)
+
+    def _done(self, symbol_id, side, order_id):
+        self.cancelling.discard(order_id)
+        working = self.working.get((symbol_id, side))
+        if working is not None and working[0] == order_id:
+            del self.working[(symbol_id, side)]
+
+
+def run(events: int = 2_000_000, journal_path: str = None, order_latency_us: float = 50.0,
+        market_data_latency_us: float = 20.0) -> dict:
+    journal = None
+    if journal_path:
+        journal = TickJournal(journal_path)
+        records = journal.select(kinds=(EVENT_TRADE, EVENT_QUOTE))
+    else:
+        records = make_events(events)
+    sim = TickSimulator(TouchMaker(), order_latency_ns=int(order_latency_us * 1000),
+                        market_data_latency_ns=int(market_data_latency_us * 1000))
+    start = time.perf_counter()
+    result = sim.run(records)
+    elapsed = time.perf_counter() - start
+    if journal is not None:
+        journal.close()
+    return {
+        'events': result.events,
+        'orders': len(result.orders),
+        'fills': len(result.fills),
+        'pnl': result.pnl,
+        'fees': result.fees,
+        'seconds': elapsed,
+        'events_per_sec': result.events / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick backtester throughput")
+    parser.add_argument('--events', type=int, default=2_000_000)
+    parser.add_argument('--journal', default=None)
+    parser.add_argument('--order-latency-us', type=float, default=50.0)
+    parser.add_argument('--md-latency-us', type=float, default=20.0)
+    args = parser.parse_args()
+    results = run(args.events, args.journal, args.order_latency_us, args.md_latency_us)
+    for key, value in results.items():
+        print(f"{key:>16}: {value:,.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == '__main__':
+    main()
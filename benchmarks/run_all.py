@@ -0,0 +1,265 @@
+# benchmarks/run_all.py
+#
+# The benchmark suite: every hot path from feed decode to order send, run
+# offline against local stand-ins (synthetic ticks and journals, the
+# ReplayServer feed, the FIX acceptor, the built executor library). Each
+# benchmark runs in a fresh interpreter, so import state and memory from one
+# don't leak into the next; with --repeat the median of each metric is kept.
+# Results are saved as JSON under benchmarks/results/ with the commit and
+# machine they came from, and compared against an earlier run:
+#
+#   python -m benchmarks.run_all --quick
+#   python -m benchmarks.run_all --baseline benchmarks/results/20260101-120000.json
+#   python -m benchmarks.run_all --compare OLD.json NEW.json
+#
+# A metric regresses when it moves the wrong way by more than --threshold:
+# throughput (*_per_sec, *speedup) down, or a time (a us/ns/ms/s/seconds
+# part in the name) up. Other keys (counts, parameters) are recorded, not
+# compared.
+# Comparing exits with status 1 if anything regressed.
+
+import argparse
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_LIBRARY = os.path.join(ROOT, 'order_execution', 'cpp', 'liborder_executor.so')
+
+# name -> (module, function, quick kwargs, full kwargs, requirements). The
+# requirement 'library' is the executor library; anything else is a module
+# that must be importable. Functions taking library_path get the library
+# whenever it exists.
+SUITE = {
+    'decode': ('benchmarks.bench_decode', 'run',
+               {'frames': 500}, {}, ()),
+    'ingest': ('benchmarks.bench_ingest', 'run',
+               {'ticks': 100_000, 'capacity': 8192}, {}, ()),
+    'process_batch': ('benchmarks.bench_replay', 'run',
+                      {'events': 200_000}, {}, ()),
+    'create_sequences': ('benchmarks.bench_sequences', 'run',
+                         {'rows': 50_000, 'batches': 100, 'legacy_rows': 5_000}, {}, ()),
+    'inference': ('benchmarks.bench_inference', 'run',
+                  {'symbols': 100, 'requests': 2_000, 'keras_calls': 50}, {}, ('tensorflow',)),
+    'orders': ('benchmarks.bench_order_ring', 'run',
+               {'orders': 100_000, 'single': 10_000, 'legacy': 5_000}, {}, ('library',)),
+    'risk': ('benchmarks.bench_risk', 'run',
+             {'orders': 20_000}, {}, ()),
+    'fix_build': ('benchmarks.bench_fix_gateway', 'run_build',
+                  {'orders': 20_000}, {}, ('quickfix',)),
+    'logging': ('benchmarks.bench_logging', 'run',
+                {'calls': 10_000}, {}, ()),
+    'pipeline': ('benchmarks.bench_pipeline', 'run',
+                 {'events': 50_000, 'speed': 0.2, 'fix_port': 5041}, {'speed': 0.2, 'fix_port': 5041},
+                 ('library', 'quickfix')),
+}
+
+HIGHER_IS_BETTER = ('_per_sec', 'speedup')
+TIME_UNITS = frozenset(('us', 'ns', 'ms', 's', 'seconds'))
+
+
+def missing_requirements(requirements, library_path: str) -> list:
+    missing = []
+    for requirement in requirements:
+        if requirement == 'library':
+            if not library_path or not os.path.exists(library_path):
+                missing.append(f"executor library ({library_path or 'not given'})")
+        elif importlib.util.find_spec(requirement) is None:
+            missing.append(requirement)
+    return missing
+
+
+def run_one(name: str, quick: bool, library_path: str) -> dict:
+    # In the worker interpreter
+    module, function, quick_kwargs, full_kwargs, _ = SUITE[name]
+    kwargs = dict(quick_kwargs if quick else full_kwargs)
+    run = getattr(importlib.import_module(module), function)
+    if 'library_path' in inspect.signature(run).parameters and library_path and os.path.exists(library_path):
+        kwargs['library_path'] = library_path
+    results = run(**kwargs)
+    # Numbers only; descriptive values (e.g. the JSON backend) go to 'info'
+    metrics = {k: float(v) for k, v in results.items() if isinstance(v, (int, float, np.number))}
+    info = {k: str(v) for k, v in results.items() if k not in metrics}
+    return {'metrics': metrics, 'info': info}
+
+
+def spawn(name: str, quick: bool, library_path: str, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'result.json')
+        command = [sys.executable, '-m', 'benchmarks.run_all', '--worker', name, '--out', out]
+        if quick:
+            command.append('--quick')
+        if library_path:
+            command += ['--library', library_path]
+        start = time.perf_counter()
+        try:
+            process = subprocess.run(command, cwd=ROOT, env={**os.environ, 'PYTHONPATH': ROOT},
+                                     capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {'status': 'failed', 'error': f"timed out after {timeout:g}s"}
+        elapsed = time.perf_counter() - start
+        if process.returncode != 0 or not os.path.exists(out):
+            lines = (process.stderr or process.stdout).strip().splitlines()
+            return {'status': 'failed', 'error': lines[-1] if lines else f"exit code {process.returncode}"}
+        with open(out) as f:
+            result = json.load(f)
+    return {'status': 'ok', 'seconds': elapsed, **result}
+
+
+def median_runs(runs: list) -> dict:
+    # Median per metric across repeats; the first run's info
+    ok = [r for r in runs if r['status'] == 'ok']
+    if not ok:
+        return runs[-1]
+    keys = ok[0]['metrics'].keys()
+    merged = dict(ok[0])
+    merged['metrics'] = {k: float(np.median([r['metrics'][k] for r in ok if k in r['metrics']])) for k in keys}
+    merged['seconds'] = float(np.median([r['seconds'] for r in ok]))
+    merged['repeats'] = len(ok)
+    return merged
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(names, quick: bool, library_path: str, repeat: int, timeout: float) -> dict:
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+    for name in names:
+        missing = missing_requirements(SUITE[name][4], library_path)
+        if missing:
+            report['results'][name] = {'status': 'skipped', 'reason': f"missing {', '.join(missing)}"}
+            print(f"{name:>18}: skipped (missing {', '.join(missing)})", flush=True)
+            continue
+        result = median_runs([spawn(name, quick, library_path, timeout) for _ in range(repeat)])
+        report['results'][name] = result
+        if result['status'] == 'ok':
+            print(f"{name:>18}: {result['seconds']:.1f}s, {len(result['metrics'])} metrics", flush=True)
+        else:
+            print(f"{name:>18}: FAILED ({result['error']})", flush=True)
+    return report
+
+
+def save(report: dict, path: str = None) -> str:
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def direction(metric: str) -> int:
+    # +1 when higher is better, -1 when lower is, 0 when not compared
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if TIME_UNITS.intersection(metric.split('_')):
+        return -1
+    return 0
+
+
+def compare(old: dict, new: dict, threshold: float = 0.15) -> list:
+    # One row per comparable metric in both runs:
+    # (benchmark, metric, old, new, relative change, regressed)
+    rows = []
+    for name, result in new['results'].items():
+        baseline = old['results'].get(name, {})
+        if result.get('status') != 'ok' or baseline.get('status') != 'ok':
+            continue
+        for metric, value in result['metrics'].items():
+            sense = direction(metric)
+            before = baseline['metrics'].get(metric)
+            if not sense or before is None or before == 0:
+                continue
+            change = (value - before) / abs(before)
+            rows.append((name, metric, before, value, change, change * sense < -threshold))
+    return rows
+
+
+def print_comparison(old: dict, new: dict, rows: list, threshold: float):
+    print(f"Baseline {old['meta']['git']} ({old['meta']['time']}) -> {new['meta']['git']} ({new['meta']['time']})")
+    if old['meta'].get('platform') != new['meta'].get('platform') or old['meta'].get('cpus') != new['meta'].get('cpus'):
+        print("Warning: the runs come from different machines")
+    if old['meta'].get('quick') != new['meta'].get('quick'):
+        print("Warning: comparing a --quick run with a full one")
+    for name, metric, before, value, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name + '.' + metric:>52}: {before:>14,.2f} -> {value:>14,.2f} {change:>+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[5])
+    print(f"{regressions} of {len(rows)} metrics regressed by more than {threshold:.0%}")
+    missing = [name for name in old['results'] if name not in new['results']]
+    if missing:
+        print(f"Not in the new run: {', '.join(missing)}")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare runs")
+    parser.add_argument('--only', nargs='+', choices=list(SUITE), default=None, help="Benchmarks to run")
+    parser.add_argument('--quick', action='store_true', help="Small sizes, for a fast check")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per benchmark; the median is kept")
+    parser.add_argument('--library', default=DEFAULT_LIBRARY, help="Built liborder_executor.so")
+    parser.add_argument('--timeout', type=float, default=1800.0, help="Seconds per benchmark run")
+    parser.add_argument('--output', default=None, help="Results file (default benchmarks/results/<time>.json)")
+    parser.add_argument('--baseline', default=None, help="Compare this run against an earlier results file")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                        help="Compare two results files without running anything")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Relative change that counts as a regression")
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--out', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(args.out, 'w') as f:
+            json.dump(run_one(args.worker, args.quick, args.library), f)
+        return
+
+    if args.compare:
+        old, new = load(args.compare[0]), load(args.compare[1])
+    else:
+        new = run_suite(args.only or list(SUITE), args.quick, args.library, args.repeat, args.timeout)
+        print(f"Results saved to {save(new, args.output)}")
+        if not args.baseline:
+            return
+        old = load(args.baseline)
+    rows = compare(old, new, args.threshold)
+    print_comparison(old, new, rows, args.threshold)
+    if any(row[5] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
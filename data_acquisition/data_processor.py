@@ -1,59 +1,227 @@
 import asyncio
+import time
 import numpy as np
-from typing import List, Dict
-from utils.logger import get_logger
+from collections import deque
+from typing import Callable, Dict, List
+from data_acquisition.tick_buffer import TICK_DTYPE, TickRingBuffer, SymbolRegistry
+from data_acquisition.indicators import IndicatorEngine, INDICATOR_DTYPE
+from utils.latency import LatencyMonitor
+from utils.logger import LogThrottle, get_logger
 
 logger = get_logger(__name__)
+# Per-batch progress is logged at most once a second
+_batch_log = LogThrottle(logger, interval=1.0)
 
+OVERFLOW_BLOCK = 'block'              # the producer processes batches until the ticks fit
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # the oldest pending ticks make way
+OVERFLOW_CONFLATE = 'conflate'        # pending ticks collapse to the latest per symbol
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_CONFLATE)
+
+
+# Ticks wait in a bounded ring until a batch is due: run_periodic_processing()
+# is the single batcher task, woken when batch_size ticks are pending or the
+# oldest pending tick is max_batch_delay old. When a burst outruns it, the
+# overflow policy decides what gives: the producer (block), the oldest
+# ticks (drop_oldest), or per-symbol detail (conflate keeps each symbol's
+# latest tick carrying the summed volume it replaces; the replaced ticks'
+# price x volume goes straight to the indicator engine, so VWAP stays exact).
 class DataProcessor:
-    def __init__(self, batch_size: int = 1000, processing_interval: float = 0.5):
+    def __init__(self, batch_size: int = 1000, max_batch_delay: float = 0.005,
+                 buffer_capacity: int = 1 << 20, history_capacity: int = 1 << 20,
+                 indicator_window: int = 50, overflow: str = OVERFLOW_BLOCK, latency: LatencyMonitor = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
         self.batch_size = batch_size
-        self.processing_interval = processing_interval
-        self.queue = asyncio.Queue()
-        self.processed_data = []
+        self.max_batch_delay = max_batch_delay
+        self.overflow = overflow
+        self.symbols = SymbolRegistry()
+        self.buffer = TickRingBuffer(buffer_capacity, overwrite=overflow == OVERFLOW_DROP_OLDEST)
+        # Bounded histories: the oldest processed ticks are overwritten once full
+        self.processed_data = TickRingBuffer(history_capacity, overwrite=True)
+        self.indicators = IndicatorEngine(window=indicator_window)
+        self.indicator_history = TickRingBuffer(history_capacity, overwrite=True, dtype=INDICATOR_DTYPE)
         self.lock = asyncio.Lock()
+        # Called with each processed batch of TICK_DTYPE records, and with the
+        # batch's INDICATOR_DTYPE rows (one per tick)
+        self.batch_handlers: List[Callable[[np.ndarray], None]] = []
+        self.indicator_handlers: List[Callable[[np.ndarray], None]] = []
+        # Called with TICK_DTYPE records as they arrive, before batching, for
+        # consumers that need the latest trade (e.g. the pre-trade risk gate)
+        self.tick_handlers: List[Callable[[np.ndarray], None]] = []
+        # 'batch_age': oldest tick's wait (since its frame was received) when
+        # its batch starts; 'batch_processing'
+        self.latency = latency if latency is not None else LatencyMonitor()
+        # time.monotonic_ns() receive time of the oldest tick in the batch
+        # being dispatched (0 if unknown); batch handlers pass it on as an
+        # order's trigger_ns
+        self.batch_received_ns = 0
+        self.received = 0
+        self.conflated = 0
+        self.blocked = 0      # add_ticks calls that had to process to make room
+        self.batches = 0
+        self.max_depth = 0
+        # (buffer head after an add, receive time of the add), oldest first
+        self._arrivals = deque()
+        self._max_delay_ns = int(max_batch_delay * 1e9)
+        self._wakeup: asyncio.Event = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.buffer)
+
+    @property
+    def dropped(self) -> int:
+        return self.buffer.dropped
+
+    def add_tick(self, symbol: str, timestamp: int, price: float, volume: int,
+                 bid: float = 0.0, ask: float = 0.0):
+        symbol_id = self.symbols.get_id(symbol)
+        self.add_ticks(np.array([(timestamp, symbol_id, price, volume, bid, ask)], dtype=TICK_DTYPE))
+
+    def add_ticks(self, records: np.ndarray, received_ns: int = 0):
+        # received_ns: time.monotonic_ns() when the records' frame arrived
+        # (DataStream.last_receive_ns); defaults to now
+        n = len(records)
+        if n == 0:
+            return
+        self.received += n
+        for handler in self.tick_handlers:
+            handler(records)
+        was_empty = not len(self.buffer)
+        if n > self.buffer.free:
+            if self.overflow == OVERFLOW_BLOCK:
+                self._add_blocking(records)
+                records = records[:0]
+            elif self.overflow == OVERFLOW_CONFLATE:
+                records = self._conflate(records)
+        self.buffer.extend(records)
+        self._arrivals.append((self.buffer.head, received_ns or time.monotonic_ns()))
+        depth = len(self.buffer)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self._wakeup is not None and (was_empty or depth >= self.batch_size):
+            self._wakeup.set()
+
+    def _add_blocking(self, records: np.ndarray):
+        self.blocked += 1
+        offset = 0
+        while offset < len(records):
+            if not self.buffer.free:
+                self._process_pending(self.batch_size)
+            take = min(self.buffer.free, len(records) - offset)
+            self.buffer.extend(records[offset:offset + take])
+            offset += take
+
+    def _conflate(self, records: np.ndarray) -> np.ndarray:
+        # Pending and incoming ticks collapse to the latest per symbol (in
+        # arrival order), carrying the summed volume
+        combined = np.concatenate((self.buffer.to_array(), records))
+        order = np.argsort(combined['symbol_id'], kind='stable')
+        _, starts, counts = np.unique(combined['symbol_id'][order], return_index=True, return_counts=True)
+        last = order[starts + counts - 1]
+        volume = np.add.reduceat(combined['volume'][order], starts)
+        pv = np.add.reduceat(combined['price'][order] * combined['volume'][order], starts)
+        keep = np.argsort(last)
+        conflated = combined[last[keep]]
+        conflated['volume'] = volume[keep]
+        # The kept tick contributes its price x the summed volume; make up the
+        # difference to the replaced ticks' own price x volume
+        self.indicators.add_price_volume(conflated['symbol_id'],
+                                         pv[keep] - conflated['price'] * conflated['volume'])
+        self.conflated += len(combined) - len(conflated)
+        oldest = self._arrivals[0][1] if self._arrivals else time.monotonic_ns()
+        self.buffer.clear()
+        self._arrivals.clear()
+        self._arrivals.append((self.buffer.head, oldest))
+        return conflated
 
     async def enqueue_data(self, data: Dict):
-        await self.queue.put(data)
-        if self.queue.qsize() >= self.batch_size:
-            asyncio.create_task(self.process_batch())
+        self.add_tick(data.get('symbol', ''), int(data.get('timestamp', 0)), float(data.get('price', 0)),
+                      int(data.get('volume', 0)), float(data.get('bid', 0)), float(data.get('ask', 0)))
 
     async def process_batch(self):
         async with self.lock:
-            batch = []
-            while not self.queue.empty() and len(batch) < self.batch_size:
-                batch.append(await self.queue.get())
-            if batch:
-                try:
-                    np_data = self._convert_to_numpy(batch)
-                    moving_avg = self._compute_moving_average(np_data)
-                    self.processed_data.append(moving_avg)
-                    logger.info(f"Processed batch of {len(batch)} data points. Moving average shape: {moving_avg.shape}")
-                except Exception as e:
-                    logger.exception(f"Error in processing batch: {e}")
-
-    def _convert_to_numpy(self, batch: List[Dict]) -> np.ndarray:
-        parsed_data = [self._parse_data_point(dp) for dp in batch]
-        return np.array(parsed_data, dtype=np.float32)
-
-    def _parse_data_point(self, data_point: Dict) -> List[float]:
-        return [
-            float(data_point.get('timestamp', 0)),
-            float(data_point.get('price', 0)),
-            float(data_point.get('volume', 0)),
-            float(data_point.get('bid', 0)),
-            float(data_point.get('ask', 0))
-        ]
-
-    def _compute_moving_average(self, data: np.ndarray) -> np.ndarray:
-        window_size = 50
-        prices = data[:, 1]
-        cumsum = np.cumsum(np.insert(prices, 0, 0))
-        moving_avg = (cumsum[window_size:] - cumsum[:-window_size]) / window_size
-        return moving_avg
+            self._process_pending(self.batch_size)
+
+    def _process_pending(self, max_records: int) -> int:
+        batch = self.buffer.peek(max_records)
+        if not len(batch):
+            return 0
+        start = time.monotonic_ns()
+        arrivals = self._arrivals
+        self.batch_received_ns = received = arrivals[0][1] if arrivals else 0
+        try:
+            indicators = self._compute_indicators(batch)
+            self.processed_data.extend(batch)
+            self.indicator_history.extend(indicators)
+            for handler in self.batch_handlers:
+                handler(batch)
+            for handler in self.indicator_handlers:
+                handler(indicators)
+            _batch_log.info("Processed batch of %d data points (%d pending).", len(batch), len(self.buffer) - len(batch))
+        except Exception as e:
+            logger.exception(f"Error in processing batch: {e}")
+        finally:
+            self.buffer.advance(len(batch))
+        done = time.monotonic_ns()
+        self.batches += 1
+        if received:
+            self.latency.record_value('batch_age', start - received)
+        self.latency.record_value('batch_processing', done - start)
+        # Forget adds that are now fully processed (or were dropped)
+        tail = self.buffer.tail
+        while arrivals and arrivals[0][0] <= tail:
+            arrivals.popleft()
+        return len(batch)
+
+    def _compute_indicators(self, data: np.ndarray) -> np.ndarray:
+        return self.indicators.update_batch(data['symbol_id'], data['price'], data['volume'],
+                                            data['bid'], data['ask'], data['timestamp'])
+
+    def get_feature_matrix(self, rows: int = None) -> np.ndarray:
+        # With rows, only the newest that many ticks
+        ticks = self.processed_data.to_array() if rows is None else self.processed_data.latest(rows)
+        return np.column_stack((
+            ticks['timestamp'].astype(np.float64),
+            ticks['price'],
+            ticks['volume'].astype(np.float64),
+            ticks['bid'],
+            ticks['ask'],
+        ))
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'depth': len(self.buffer),
+            'max_depth': self.max_depth,
+            'received': self.received,
+            'dropped': self.buffer.dropped,
+            'conflated': self.conflated,
+            'blocked': self.blocked,
+            'batches': self.batches,
+        }
 
     async def run_periodic_processing(self):
-        while True:
-            await asyncio.sleep(self.processing_interval)
-            if self.queue.qsize() >= self.batch_size:
+        # The batcher: sleeps until ticks arrive, then processes a batch as
+        # soon as batch_size are pending or the oldest has waited
+        # max_batch_delay, whichever comes first
+        loop = asyncio.get_running_loop()
+        self._wakeup = wakeup = asyncio.Event()
+        try:
+            while True:
+                if not len(self.buffer):
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                if len(self.buffer) < self.batch_size and self._arrivals:
+                    delay = (self._arrivals[0][1] + self._max_delay_ns - time.monotonic_ns()) / 1e9
+                    if delay > 0:
+                        wakeup.clear()
+                        timer = loop.call_later(delay, wakeup.set)
+                        await wakeup.wait()
+                        timer.cancel()
+                        continue
                 await self.process_batch()
+                # Let producers in between back-to-back batches
+                await asyncio.sleep(0)
+        finally:
+            self._wakeup = None
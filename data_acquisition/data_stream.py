@@ -1,10 +1,18 @@
 # data_acquisition/data_stream.py
 
 import asyncio
+import time
 import websockets
 import json
 import numpy as np
-from data_processor import DataProcessor
+from typing import Callable, List
+from data_acquisition.data_processor import DataProcessor
+from data_acquisition.journal import JournalWriter
+from data_acquisition.order_book import OrderBook
+from data_acquisition.polygon_decoder import (
+    PolygonDecoder, EVENT_QUOTE, EVENT_TRADE, select_aggregates, select_events, trades_to_ticks
+)
+from utils.latency import LatencyMonitor
 from utils.logger import get_logger
 import yaml
 import os
@@ -12,13 +20,30 @@ import os
 logger = get_logger(__name__)
 
 class DataStream:
-    def __init__(self, provider: str, config: dict, processor: DataProcessor, reconnect_interval: int = 5):
+    def __init__(self, provider: str, config: dict, processor: DataProcessor, reconnect_interval: int = 5,
+                 latency: LatencyMonitor = None):
         self.provider = provider
         self.config = config
         self.processor = processor
         self.reconnect_interval = reconnect_interval
         self.websocket = None
         self.connected = False
+        self.decoder = PolygonDecoder(processor.symbols)
+        # Quote-built book by the processor's symbol ids; trades are stamped
+        # with the bid/ask prevailing when they printed
+        self.book = OrderBook(levels=config.get('book_levels', 64))
+        self.channels = config.get('polygon', {}).get('channels', 'T.*,Q.*')
+        self.quote_handlers: List[Callable[[np.ndarray], None]] = []
+        self.aggregate_handlers: List[Callable[[np.ndarray], None]] = []
+        # time.monotonic_ns() when the frame being dispatched arrived; handlers
+        # pass it on as an order's trigger_ns for tick-to-trade latency
+        self.last_receive_ns = 0
+        # 'decode' and 'dispatch' stages, measured from last_receive_ns; by
+        # default into the processor's monitor
+        self.latency = latency if latency is not None else getattr(processor, 'latency', None) or LatencyMonitor()
+        self.journal = None
+        if config.get('journal_path'):
+            self.journal = JournalWriter(config['journal_path'], processor.symbols)
 
     async def connect(self):
         if self.provider == "polygon":
@@ -38,13 +63,13 @@ class DataStream:
                     self.connected = True
                     logger.info("Connected to Polygon WebSocket.")
                     
-                    # Subscribe to relevant channels (e.g., trades for specific symbols)
+                    # Subscribe to relevant channels (trades and quotes for all symbols by default)
                     subscribe_message = {
                         "action": "subscribe",
-                        "params": "T.*"  # Subscribe to all trade updates
+                        "params": self.channels
                     }
                     await websocket.send(json.dumps(subscribe_message))
-                    logger.info("Subscribed to trade updates.")
+                    logger.info(f"Subscribed to {self.channels}.")
 
                     await self.receive_polygon()
             except (websockets.exceptions.ConnectionClosedError, 
@@ -52,6 +77,8 @@ class DataStream:
                     ConnectionRefusedError) as e:
                 logger.error(f"Connection error: {e}. Reconnecting in {self.reconnect_interval} seconds.")
                 self.connected = False
+                if self.journal is not None:
+                    self.journal.flush()
                 await asyncio.sleep(self.reconnect_interval)
             except Exception as e:
                 logger.exception(f"Unexpected error: {e}")
@@ -60,21 +87,45 @@ class DataStream:
 
     async def receive_polygon(self):
         async for message in self.websocket:
+            self.last_receive_ns = received = time.monotonic_ns()
             try:
-                data = json.loads(message)
-                if 'ev' in data and data['ev'] == 'T':  # Trade event
-                    trade_data = {
-                        'timestamp': data.get('t', 0),
-                        'price': data.get('p', 0.0),
-                        'volume': data.get('s', 0),
-                        'bid': data.get('bp', 0.0),
-                        'ask': data.get('ap', 0.0)
-                    }
-                    await self.processor.enqueue_data(trade_data)
+                events = self.decoder.decode(message)
+                self.latency.record_value('decode', time.monotonic_ns() - received)
+                if self.journal is not None:
+                    self.journal.append(events)
+                self.dispatch_events(events)
+                self.latency.record_value('dispatch', time.monotonic_ns() - received)
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error: {e} - Message: {message}")
             except Exception as e:
                 logger.exception(f"Error processing message: {e}")
+            # Queued frames come back from the socket without suspending, so
+            # under a backlog this loop would hold the event loop and starve
+            # the batcher's deadline (visible as 'loop_lag')
+            await asyncio.sleep(0)
+
+    def dispatch_events(self, events: np.ndarray):
+        if len(events) == 0:
+            return
+        kinds = events['kind']
+        has_quotes = (kinds == EVENT_QUOTE).any()
+        if (kinds == EVENT_TRADE).any():
+            bids, asks = self.book.prevailing_quotes(events)
+            self.processor.add_ticks(trades_to_ticks(events, bids, asks), self.last_receive_ns)
+        if has_quotes:
+            quotes = select_events(events, EVENT_QUOTE)
+            self.book.apply_quotes(quotes)
+            for handler in self.quote_handlers:
+                handler(quotes)
+        if self.aggregate_handlers:
+            aggregates = select_aggregates(events)
+            if len(aggregates):
+                for handler in self.aggregate_handlers:
+                    handler(aggregates)
 
     def start(self):
         asyncio.create_task(self.connect())
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
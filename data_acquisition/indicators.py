@@ -0,0 +1,276 @@
+# data_acquisition/indicators.py
+
+import numpy as np
+from typing import Optional, Tuple
+
+INDICATOR_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('symbol_id', np.int32),
+    ('price', np.float64),
+    ('sma', np.float64),
+    ('ema', np.float64),
+    ('variance', np.float64),
+    ('std', np.float64),
+    ('vwap', np.float64),
+    ('spread', np.float64),
+    ('spread_mean', np.float64),
+])
+
+def _segmented_cumsum(values: np.ndarray, seg_first: np.ndarray) -> np.ndarray:
+    # Cumulative sum restarting at every segment; seg_first holds, for each
+    # element, the index of the first element of its segment.
+    cs = np.cumsum(values)
+    return cs - (cs[seg_first] - values[seg_first])
+
+
+# Streaming per-symbol indicators: rolling SMA / variance / std over `window`
+# ticks, EMA, session VWAP and bid/ask spread stats. All state lives in
+# preallocated per-symbol arrays indexed by symbol id, so update() is O(1) per
+# tick and update_batch() handles a whole mixed-symbol batch with array ops.
+# Rolling windows carry over between batches, so results agree with a one-shot
+# recompute over the full history to within floating-point rounding.
+class IndicatorEngine:
+    def __init__(self, window: int = 50, ema_span: Optional[int] = None, max_symbols: int = 1024):
+        if window <= 0:
+            raise ValueError(f"Indicator window must be positive, got {window}")
+        self.window = window
+        self.alpha = 2.0 / ((ema_span or window) + 1.0)
+        self._decay = 1.0 - self.alpha
+        self.capacity = 0
+        self._allocate(max(1, max_symbols))
+
+    def _allocate(self, capacity: int):
+        old = self.capacity
+
+        def grow(name: str, shape: Tuple[int, ...], fill: float = 0.0, dtype=np.float64):
+            resized = np.full(shape, fill, dtype=dtype)
+            if old:
+                resized[:old] = getattr(self, name)
+            setattr(self, name, resized)
+
+        grow('count', (capacity,), 0, np.int64)
+        grow('last_price', (capacity,), np.nan)
+        grow('ema', (capacity,), np.nan)
+        grow('_ref', (capacity,))
+        grow('_window', (capacity, self.window))
+        grow('_wsum', (capacity,))
+        grow('_wsumsq', (capacity,))
+        grow('_cum_pv', (capacity,))
+        grow('_cum_vol', (capacity,))
+        grow('_spread_sum', (capacity,))
+        grow('_spread_count', (capacity,), 0, np.int64)
+        self.capacity = capacity
+
+    def _ensure_capacity(self, max_symbol_id: int):
+        if max_symbol_id >= self.capacity:
+            capacity = self.capacity
+            while capacity <= max_symbol_id:
+                capacity *= 2
+            self._allocate(capacity)
+
+    @property
+    def sma(self) -> np.ndarray:
+        sma = self._ref + self._wsum / self.window
+        sma[self.count < self.window] = np.nan
+        return sma
+
+    def add_price_volume(self, symbol_ids: np.ndarray, pv: np.ndarray):
+        # Price x volume of trades that reach VWAP only as volume (e.g. ticks
+        # conflated into a later tick that carries their summed volume)
+        symbol_ids = np.asarray(symbol_ids, dtype=np.int64)
+        if not len(symbol_ids):
+            return
+        self._ensure_capacity(int(symbol_ids.max()))
+        np.add.at(self._cum_pv, symbol_ids, pv)
+
+    @property
+    def vwap(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._cum_pv / self._cum_vol
+
+    def update(self, symbol_id: int, price: float, volume: float = 0.0, bid: float = 0.0,
+               ask: float = 0.0, timestamp: int = 0) -> np.void:
+        self._ensure_capacity(symbol_id)
+        s = symbol_id
+        count = self.count[s]
+        if count == 0:
+            self._ref[s] = price
+            self.ema[s] = price
+        x = price - self._ref[s]
+        pos = count % self.window
+        old = self._window[s, pos]
+        self._window[s, pos] = x
+        self._wsum[s] += x - old
+        self._wsumsq[s] += x * x - old * old
+        count += 1
+        self.count[s] = count
+        self.last_price[s] = price
+        self.ema[s] += self.alpha * (price - self.ema[s])
+        self._cum_pv[s] += price * volume
+        self._cum_vol[s] += volume
+
+        out = np.zeros((), dtype=INDICATOR_DTYPE)
+        out['timestamp'] = timestamp
+        out['symbol_id'] = symbol_id
+        out['price'] = price
+        out['ema'] = self.ema[s]
+        if count >= self.window:
+            mean = self._wsum[s] / self.window
+            variance = max(self._wsumsq[s] / self.window - mean * mean, 0.0)
+            out['sma'] = self._ref[s] + mean
+            out['variance'] = variance
+            out['std'] = np.sqrt(variance)
+        else:
+            out['sma'] = out['variance'] = out['std'] = np.nan
+        out['vwap'] = self._cum_pv[s] / self._cum_vol[s] if self._cum_vol[s] else np.nan
+        if bid > 0 and ask >= bid:
+            self._spread_sum[s] += ask - bid
+            self._spread_count[s] += 1
+            out['spread'] = ask - bid
+        else:
+            out['spread'] = np.nan
+        out['spread_mean'] = (self._spread_sum[s] / self._spread_count[s]
+                              if self._spread_count[s] else np.nan)
+        return out[()]
+
+    def update_batch(self, symbol_ids: np.ndarray, prices: np.ndarray, volumes: np.ndarray = None,
+                     bids: np.ndarray = None, asks: np.ndarray = None,
+                     timestamps: np.ndarray = None) -> np.ndarray:
+        n = len(prices)
+        out = np.empty(n, dtype=INDICATOR_DTYPE)
+        if n == 0:
+            return out
+        symbol_ids = np.asarray(symbol_ids, dtype=np.int64)
+        self._ensure_capacity(int(symbol_ids.max()))
+        W = self.window
+
+        # Group the batch by symbol, keeping arrival order within each symbol
+        order = np.argsort(symbol_ids, kind='stable')
+        sym = symbol_ids[order]
+        px = np.asarray(prices, dtype=np.float64)[order]
+        vol = np.zeros(n) if volumes is None else np.asarray(volumes, dtype=np.float64)[order]
+        uniq, starts, counts = np.unique(sym, return_index=True, return_counts=True)
+        k = len(uniq)
+        seg = np.repeat(np.arange(k), counts)
+        seg_first = starts[seg]
+        local = np.arange(n) - seg_first  # 0-based position within the symbol's segment
+        prev_count = self.count[uniq]
+
+        new = prev_count == 0
+        if new.any():
+            self._ref[uniq[new]] = px[starts[new]]
+            self.ema[uniq[new]] = px[starts[new]]
+        ref = self._ref[sym]
+        x = px - ref
+
+        # Rolling window: lay out [previous W values | new values] per symbol
+        # in one flat array so a single cumsum serves every symbol.
+        cols = (prev_count[:, None] + np.arange(W)) % W
+        prev_window = self._window[uniq[:, None], cols]
+        ext = np.empty(n + k * W)
+        block_start = starts + np.arange(k) * W
+        ext[(block_start[:, None] + np.arange(W)).ravel()] = prev_window.ravel()
+        ext_pos = np.arange(n) + (seg + 1) * W
+        ext[ext_pos] = x
+        csum = np.concatenate(([0.0], np.cumsum(ext)))
+        csumsq = np.concatenate(([0.0], np.cumsum(ext * ext)))
+        mean = (csum[ext_pos + 1] - csum[ext_pos + 1 - W]) / W
+        meansq = (csumsq[ext_pos + 1] - csumsq[ext_pos + 1 - W]) / W
+        variance = np.maximum(meansq - mean * mean, 0.0)
+        warm = prev_count[seg] + local + 1 >= W
+        sorted_out = np.empty(n, dtype=INDICATOR_DTYPE)
+        sorted_out['symbol_id'] = sym
+        sorted_out['price'] = px
+        sorted_out['timestamp'] = 0 if timestamps is None else np.asarray(timestamps)[order]
+        sorted_out['sma'] = np.where(warm, ref + mean, np.nan)
+        sorted_out['variance'] = np.where(warm, variance, np.nan)
+        sorted_out['std'] = np.where(warm, np.sqrt(variance), np.nan)
+
+        # EMA recurrence e_t = d * e_(t-1) + a * x_t solved per symbol with a
+        # log-depth scan over affine maps (e -> A * e + B), so a whole batch
+        # takes ceil(log2(longest run)) vectorized passes and nothing overflows.
+        A = np.full(n, self._decay)
+        B = self.alpha * x
+        B[starts] += self._decay * (self.ema[uniq] - self._ref[uniq])
+        A[starts] = 0.0
+        offset = 1
+        while offset < counts.max():
+            idx = np.flatnonzero(local >= offset)
+            B[idx] = A[idx] * B[idx - offset] + B[idx]
+            A[idx] = A[idx] * A[idx - offset]
+            offset *= 2
+        sorted_out['ema'] = ref + B
+
+        cum_pv = self._cum_pv[sym] + _segmented_cumsum(px * vol, seg_first)
+        cum_vol = self._cum_vol[sym] + _segmented_cumsum(vol, seg_first)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sorted_out['vwap'] = np.where(cum_vol > 0, cum_pv / cum_vol, np.nan)
+
+        if bids is not None and asks is not None:
+            bid = np.asarray(bids, dtype=np.float64)[order]
+            ask = np.asarray(asks, dtype=np.float64)[order]
+            quoted = (bid > 0) & (ask >= bid)
+            spread = np.where(quoted, ask - bid, 0.0)
+            spread_sum = self._spread_sum[sym] + _segmented_cumsum(spread, seg_first)
+            spread_count = self._spread_count[sym] + _segmented_cumsum(quoted.astype(np.int64), seg_first)
+        else:
+            quoted = np.zeros(n, dtype=bool)
+            spread = np.zeros(n)
+            spread_sum = self._spread_sum[sym]
+            spread_count = self._spread_count[sym]
+        sorted_out['spread'] = np.where(quoted, spread, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sorted_out['spread_mean'] = np.where(spread_count > 0, spread_sum / spread_count, np.nan)
+
+        # Carry state forward from the last tick of each symbol
+        ends = starts + counts - 1
+        tail = local >= counts[seg] - W
+        self._window[sym[tail], (prev_count[seg[tail]] + local[tail]) % W] = x[tail]
+        self._wsum[uniq] = self._window[uniq].sum(axis=1)
+        self._wsumsq[uniq] = (self._window[uniq] ** 2).sum(axis=1)
+        self.count[uniq] = prev_count + counts
+        self.last_price[uniq] = px[ends]
+        self.ema[uniq] = sorted_out['ema'][ends]
+        self._cum_pv[uniq] = cum_pv[ends]
+        self._cum_vol[uniq] = cum_vol[ends]
+        self._spread_sum[uniq] = spread_sum[ends]
+        self._spread_count[uniq] = spread_count[ends]
+
+        out[order] = sorted_out
+        return out
+
+    def reset(self, symbol_id: Optional[int] = None):
+        if symbol_id is None:
+            capacity, self.capacity = self.capacity, 0
+            self._allocate(capacity)
+            return
+        for array in (self._window, self._ref, self._wsum, self._wsumsq, self._cum_pv,
+                      self._cum_vol, self._spread_sum):
+            array[symbol_id] = 0.0
+        self.count[symbol_id] = 0
+        self._spread_count[symbol_id] = 0
+        self.last_price[symbol_id] = np.nan
+        self.ema[symbol_id] = np.nan
+
+
+def compute_indicators(prices: np.ndarray, volumes: np.ndarray = None, bids: np.ndarray = None,
+                       asks: np.ndarray = None, symbol_ids: np.ndarray = None,
+                       timestamps: np.ndarray = None, window: int = 50,
+                       ema_span: Optional[int] = None) -> np.ndarray:
+    if symbol_ids is None:
+        symbol_ids = np.zeros(len(prices), dtype=np.int64)
+    engine = IndicatorEngine(window=window, ema_span=ema_span)
+    return engine.update_batch(symbol_ids, prices, volumes, bids, asks, timestamps)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    # Trailing simple moving average over a single series, NaN until the window
+    # fills; the same shifted cumulative-sum scheme IndicatorEngine uses.
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    shifted = values - values[0]
+    csum = np.concatenate(([0.0], np.cumsum(shifted)))
+    out[window - 1:] = values[0] + (csum[window:] - csum[:-window]) / window
+    return out
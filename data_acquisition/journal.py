@@ -0,0 +1,387 @@
+# data_acquisition/journal.py
+
+import asyncio
+import json
+import os
+import struct
+import time
+import numpy as np
+import websockets
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+from data_acquisition.polygon_decoder import (
+    EVENT_DTYPE, EVENT_AGGREGATE_MINUTE, EVENT_AGGREGATE_SECOND, EVENT_QUOTE, EVENT_TRADE, trades_to_ticks
+)
+from data_acquisition.tick_buffer import SymbolRegistry
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# File layout: a 64-byte header followed by fixed-size EVENT_DTYPE records in
+# arrival order. Two sidecars make up the index:
+#   <journal>.blocks  - append-only (first_record, min_ts, max_ts) per block of
+#                       `block_size` records, used to seek by time range
+#   <journal>.symbols - JSON symbol table with per-symbol count/first/last ts
+JOURNAL_MAGIC = b'HFTJRNL1'
+JOURNAL_VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sIII')
+BLOCK_DTYPE = np.dtype([
+    ('first_record', np.int64),
+    ('min_ts', np.int64),
+    ('max_ts', np.int64),
+])
+
+
+def _write_json_atomic(path: str, payload: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+class JournalWriter:
+    def __init__(self, path: str, source_symbols: SymbolRegistry, block_size: int = 4096):
+        self.path = path
+        self.source_symbols = source_symbols
+        self.symbols = SymbolRegistry()
+        self.block_size = block_size
+        self._id_map = np.full(0, -1, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._first_ts = np.zeros(0, dtype=np.int64)
+        self._last_ts = np.zeros(0, dtype=np.int64)
+        self._block_min = np.iinfo(np.int64).max
+        self._block_max = np.iinfo(np.int64).min
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            self._resume()
+        else:
+            with open(path, 'wb') as f:
+                f.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, EVENT_DTYPE.itemsize, block_size)
+                        .ljust(HEADER_SIZE, b'\0'))
+            open(f"{path}.blocks", 'wb').close()
+            self.records = 0
+        self._file = open(path, 'ab')
+        self._blocks_file = open(f"{path}.blocks", 'ab')
+        self._write_symbols()
+        logger.info(f"Tick journal open at {path} ({self.records} existing records).")
+
+    def _resume(self):
+        journal = TickJournal(self.path)
+        self.block_size = journal.block_size
+        self.records = len(journal.records)
+        full_blocks = self.records // self.block_size
+        tail = journal.records[full_blocks * self.block_size:]['timestamp']
+        if len(tail):
+            self._block_min = int(tail.min())
+            self._block_max = int(tail.max())
+        for name in journal.symbols.symbols:
+            self.symbols.get_id(name)
+        self._grow_stats(len(self.symbols))
+        for name, stats in journal.symbol_stats.items():
+            symbol_id = self.symbols.get_id(name)
+            self._counts[symbol_id] = stats['count']
+            self._first_ts[symbol_id] = stats['first_ts']
+            self._last_ts[symbol_id] = stats['last_ts']
+        journal.close()
+        # Drop any torn record left by a crash so the file stays record-aligned
+        with open(self.path, 'r+b') as f:
+            f.truncate(HEADER_SIZE + self.records * EVENT_DTYPE.itemsize)
+        with open(f"{self.path}.blocks", 'r+b') as f:
+            f.truncate(full_blocks * BLOCK_DTYPE.itemsize)
+
+    def _grow_stats(self, size: int):
+        old = len(self._counts)
+        if size <= old:
+            return
+        self._counts = np.concatenate((self._counts, np.zeros(size - old, dtype=np.int64)))
+        self._first_ts = np.concatenate((self._first_ts, np.zeros(size - old, dtype=np.int64)))
+        self._last_ts = np.concatenate((self._last_ts, np.zeros(size - old, dtype=np.int64)))
+
+    def _map_symbols(self, source_ids: np.ndarray) -> np.ndarray:
+        needed = int(source_ids.max()) + 1
+        if needed > len(self._id_map):
+            self._id_map = np.concatenate((self._id_map, np.full(needed - len(self._id_map), -1, dtype=np.int32)))
+        missing = np.unique(source_ids[self._id_map[source_ids] < 0])
+        if len(missing):
+            for source_id in missing:
+                self._id_map[source_id] = self.symbols.get_id(self.source_symbols.get_symbol(int(source_id)))
+            self._grow_stats(len(self.symbols))
+            self._write_symbols()
+        return self._id_map[source_ids]
+
+    def append(self, events: np.ndarray):
+        n = len(events)
+        if n == 0:
+            return
+        records = events.copy()
+        records['symbol_id'] = self._map_symbols(events['symbol_id'])
+        self._file.write(records.tobytes())
+
+        ids, first = np.unique(records['symbol_id'], return_index=True)
+        last = n - 1 - np.unique(records['symbol_id'][::-1], return_index=True)[1]
+        fresh = self._counts[ids] == 0
+        self._first_ts[ids[fresh]] = records['timestamp'][first[fresh]]
+        self._last_ts[ids] = records['timestamp'][last]
+        np.add.at(self._counts, records['symbol_id'], 1)
+
+        timestamps = records['timestamp']
+        offset = 0
+        while offset < n:
+            in_block = self.records % self.block_size
+            take = min(n - offset, self.block_size - in_block)
+            chunk = timestamps[offset:offset + take]
+            self._block_min = min(self._block_min, int(chunk.min()))
+            self._block_max = max(self._block_max, int(chunk.max()))
+            self.records += take
+            offset += take
+            if self.records % self.block_size == 0:
+                block = np.array([(self.records - self.block_size, self._block_min, self._block_max)],
+                                 dtype=BLOCK_DTYPE)
+                self._blocks_file.write(block.tobytes())
+                self._block_min = np.iinfo(np.int64).max
+                self._block_max = np.iinfo(np.int64).min
+
+    def _write_symbols(self):
+        stats = {
+            name: {'count': int(self._counts[i]), 'first_ts': int(self._first_ts[i]),
+                   'last_ts': int(self._last_ts[i])}
+            for i, name in enumerate(self.symbols.symbols)
+        }
+        _write_json_atomic(f"{self.path}.symbols", {'symbols': self.symbols.symbols, 'stats': stats})
+
+    def flush(self):
+        self._file.flush()
+        self._blocks_file.flush()
+        self._write_symbols()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        self._blocks_file.close()
+        logger.info(f"Tick journal closed at {self.path} ({self.records} records).")
+
+
+class TickJournal:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, record_size, block_size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != JOURNAL_MAGIC:
+            raise ValueError(f"{path} is not a tick journal")
+        if version != JOURNAL_VERSION or record_size != EVENT_DTYPE.itemsize:
+            raise ValueError(f"Unsupported journal format in {path}: version {version}, record size {record_size}")
+        self.block_size = block_size
+        self.symbols = SymbolRegistry()
+        self.symbol_stats: Dict[str, dict] = {}
+        self.records = np.empty(0, dtype=EVENT_DTYPE)
+        self.blocks = np.empty(0, dtype=BLOCK_DTYPE)
+        self.refresh()
+
+    def refresh(self):
+        n = (os.path.getsize(self.path) - HEADER_SIZE) // EVENT_DTYPE.itemsize
+        if n > 0:
+            self.records = np.memmap(self.path, dtype=EVENT_DTYPE, mode='r', offset=HEADER_SIZE, shape=(n,))
+        blocks_path = f"{self.path}.blocks"
+        if os.path.exists(blocks_path) and os.path.getsize(blocks_path) >= BLOCK_DTYPE.itemsize:
+            self.blocks = np.fromfile(blocks_path, dtype=BLOCK_DTYPE)
+        symbols_path = f"{self.path}.symbols"
+        if os.path.exists(symbols_path):
+            with open(symbols_path) as f:
+                table = json.load(f)
+            for name in table['symbols'][len(self.symbols):]:
+                self.symbols.get_id(name)
+            self.symbol_stats = table.get('stats', {})
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def close(self):
+        self.records = np.empty(0, dtype=EVENT_DTYPE)
+
+    def _record_range(self, start_ns: Optional[int], end_ns: Optional[int]):
+        n = len(self.records)
+        if (start_ns is None and end_ns is None) or len(self.blocks) == 0:
+            return 0, n
+        overlap = np.ones(len(self.blocks), dtype=bool)
+        if start_ns is not None:
+            overlap &= self.blocks['max_ts'] >= start_ns
+        if end_ns is not None:
+            overlap &= self.blocks['min_ts'] <= end_ns
+        # Records after the last indexed block are always candidates
+        indexed_end = int(self.blocks['first_record'][-1]) + self.block_size
+        hits = np.flatnonzero(overlap)
+        if len(hits) == 0:
+            return indexed_end, n
+        first = int(self.blocks['first_record'][hits[0]])
+        last = int(self.blocks['first_record'][hits[-1]]) + self.block_size
+        return first, n if last >= indexed_end else last
+
+    def select(self, symbols: Iterable[str] = None, start_ns: int = None, end_ns: int = None,
+               kinds: Iterable[int] = None) -> np.ndarray:
+        lo, hi = self._record_range(start_ns, end_ns)
+        events = self.records[lo:hi]
+        mask = np.ones(len(events), dtype=bool)
+        if start_ns is not None:
+            mask &= events['timestamp'] >= start_ns
+        if end_ns is not None:
+            mask &= events['timestamp'] <= end_ns
+        if symbols is not None:
+            ids = [self.symbols.ids[s] for s in symbols if s in self.symbols.ids]
+            mask &= np.isin(events['symbol_id'], ids)
+        if kinds is not None:
+            mask &= np.isin(events['kind'], list(kinds))
+        if mask.all():
+            return events
+        return events[mask]
+
+
+def events_to_polygon(events: np.ndarray, symbols: SymbolRegistry) -> List[dict]:
+    names = symbols.symbols
+    messages = []
+    for ev in events.tolist():
+        timestamp, symbol_id, kind, exchange, price, size, bid, bid_size, ask, ask_size, o, h, l, vw = ev
+        ms = timestamp // 1_000_000
+        sym = names[symbol_id]
+        if kind == EVENT_TRADE:
+            messages.append({'ev': 'T', 'sym': sym, 'x': exchange, 'p': price, 's': size, 't': ms})
+        elif kind == EVENT_QUOTE:
+            messages.append({'ev': 'Q', 'sym': sym, 'bx': exchange, 'bp': bid, 'bs': bid_size,
+                             'ap': ask, 'as': ask_size, 't': ms})
+        elif kind in (EVENT_AGGREGATE_SECOND, EVENT_AGGREGATE_MINUTE):
+            messages.append({'ev': 'A' if kind == EVENT_AGGREGATE_SECOND else 'AM', 'sym': sym,
+                             'c': price, 'v': size, 'o': o, 'h': h, 'l': l, 'vw': vw, 'e': ms})
+    return messages
+
+
+# Replays journal events at 1x, Nx (speed=N) or as fast as possible
+# (speed=None). Pacing follows event timestamps, sleeping between slices of at
+# most `pace_interval` seconds of wall time.
+class JournalReplayer:
+    def __init__(self, journal: TickJournal, speed: Optional[float] = None,
+                 chunk_size: int = 4096, pace_interval: float = 0.001):
+        self.journal = journal
+        self.speed = speed
+        self.chunk_size = chunk_size
+        self.pace_interval = pace_interval
+        self.events_replayed = 0
+        self.elapsed = 0.0
+
+    def symbol_map(self, target: SymbolRegistry) -> np.ndarray:
+        # Journal symbol ids -> ids in the consumer's registry
+        return np.array([target.get_id(name) for name in self.journal.symbols.symbols], dtype=np.int32)
+
+    def _slices(self, events: np.ndarray) -> Iterator[np.ndarray]:
+        if not self.speed:
+            for start in range(0, len(events), self.chunk_size):
+                yield events[start:start + self.chunk_size]
+            return
+        step_ns = int(self.pace_interval * self.speed * 1e9)
+        start = 0
+        while start < len(events):
+            window = events[start:start + self.chunk_size]
+            # Arrival order is only roughly time-ordered, so pace on the running max
+            stamps = np.maximum.accumulate(window['timestamp'])
+            end = int(np.searchsorted(stamps, stamps[0] + step_ns, side='right'))
+            yield window[:max(end, 1)]
+            start += max(end, 1)
+
+    async def replay(self, sink: Callable[[np.ndarray], Optional[Awaitable]], events: np.ndarray = None):
+        events = self.journal.records if events is None else events
+        if len(events) == 0:
+            return
+        wall_start = time.perf_counter()
+        ts_start = int(events['timestamp'][0])
+        for chunk in self._slices(events):
+            if self.speed:
+                target = wall_start + (int(chunk['timestamp'][0]) - ts_start) / 1e9 / self.speed
+                delay = target - time.perf_counter()
+                await asyncio.sleep(max(delay, 0.0))
+            else:
+                await asyncio.sleep(0)
+            result = sink(chunk)
+            if asyncio.iscoroutine(result):
+                await result
+            self.events_replayed += len(chunk)
+        self.elapsed = time.perf_counter() - wall_start
+        rate = self.events_replayed / self.elapsed if self.elapsed > 0 else float('inf')
+        logger.info(f"Replayed {self.events_replayed} events in {self.elapsed:.3f}s ({rate:,.0f} events/s).")
+
+    async def replay_to_processor(self, processor, events: np.ndarray = None, book=None):
+        # With an OrderBook (keyed by the processor's symbol ids) quotes are
+        # applied to it and trades stamped with the prevailing bid/ask, as
+        # DataStream does live
+        id_map = self.symbol_map(processor.symbols)
+
+        def sink(chunk: np.ndarray):
+            if book is None:
+                ticks = trades_to_ticks(chunk)
+                ticks['symbol_id'] = id_map[ticks['symbol_id']]
+            else:
+                chunk = np.array(chunk)
+                chunk['symbol_id'] = id_map[chunk['symbol_id']]
+                bids, asks = book.prevailing_quotes(chunk)
+                ticks = trades_to_ticks(chunk, bids, asks)
+                book.apply_quotes(chunk)
+            processor.add_ticks(ticks)
+
+        await self.replay(sink, events)
+
+    async def replay_to_stream(self, data_stream, events: np.ndarray = None):
+        id_map = self.symbol_map(data_stream.decoder.symbols)
+
+        def sink(chunk: np.ndarray):
+            remapped = np.array(chunk)
+            remapped['symbol_id'] = id_map[remapped['symbol_id']]
+            data_stream.dispatch_events(remapped)
+
+        await self.replay(sink, events)
+
+
+# Local websocket stand-in for the Polygon feed. Point
+# data_acquisition.polygon.websocket_uri at ws://<host>:<port> and DataStream
+# will connect_polygon() to the replayed session instead of the network.
+class ReplayServer:
+    def __init__(self, journal: TickJournal, host: str = '127.0.0.1', port: int = 8765,
+                 speed: Optional[float] = None, frame_size: int = 100, events: np.ndarray = None):
+        self.journal = journal
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.frame_size = frame_size
+        self.events = events
+        self.server = None
+
+    @property
+    def uri(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, websocket, path=None):
+        # Wait for the client's subscribe message before streaming
+        await websocket.recv()
+        await websocket.send(json.dumps([{'ev': 'status', 'status': 'success', 'message': 'replay started'}]))
+        replayer = JournalReplayer(self.journal, self.speed, chunk_size=self.frame_size)
+        symbols = self.journal.symbols
+        try:
+            await replayer.replay(lambda chunk: websocket.send(json.dumps(events_to_polygon(chunk, symbols))),
+                                  self.events)
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Replay client disconnected.")
+            return
+        # Hold the session open like the real feed would once the tape runs out
+        await websocket.wait_closed()
+
+    async def start(self):
+        self.server = await websockets.serve(self._handler, self.host, self.port)
+        if self.port == 0:
+            self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Replay server listening on {self.uri}")
+        return self
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
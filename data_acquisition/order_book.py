@@ -0,0 +1,374 @@
+# data_acquisition/order_book.py
+
+import numpy as np
+from typing import Tuple
+from data_acquisition.polygon_decoder import EVENT_QUOTE
+
+# Top of book per symbol, refreshed on every quote
+BOOK_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('bid', np.float64),
+    ('ask', np.float64),
+    ('bid_size', np.int64),
+    ('ask_size', np.int64),
+    ('mid', np.float64),
+    ('spread', np.float64),
+    ('microprice', np.float64),   # size-weighted: leans towards the thinner side
+    ('imbalance', np.float64),    # (bid_size - ask_size) / (bid_size + ask_size), in [-1, 1]
+])
+
+_FAR = 1 << 40  # tick index standing in for "no bid" / "no ask"
+
+
+def _grouped_scan(values: np.ndarray, groups: np.ndarray, span: int, reverse: bool = False,
+                  maximum: bool = False) -> np.ndarray:
+    # Running min (or max) restarting at every group, for small non-negative
+    # ints below `span` laid out group by group. Offsetting each group by
+    # group * span keeps one accumulate from carrying values across groups.
+    offset = groups * span
+    if maximum:
+        shifted = values - offset
+        scan = np.maximum.accumulate(shifted[::-1])[::-1] if reverse else np.maximum.accumulate(shifted)
+        return scan + offset
+    shifted = values + offset
+    scan = np.minimum.accumulate(shifted[::-1])[::-1] if reverse else np.minimum.accumulate(shifted)
+    return scan - offset
+
+
+# Per-symbol price ladder built from the quote stream. Each symbol owns
+# `levels` price levels of its own tick size starting at a base price that
+# moves with the market: when a quote's mid leaves the middle half of the
+# window the ladder is re-centred on it and levels that fall off either end are
+# dropped, so memory is fixed at 2 * levels sizes per symbol however far
+# prices travel. Best bid/ask are the last quote, so reading the top is one
+# array index; an update writes the quoted levels and clears the levels the
+# quote shows empty (bids above the bid, asks below the ask).
+#
+# Polygon's stocks feed quotes NBBO, so below the top the ladder holds the
+# last size seen at levels the market has traded through, not full depth.
+#
+# `top` and its column views (bid, ask, mid, spread, microprice, imbalance)
+# are indexed by SymbolRegistry id and updated in place; they are replaced
+# only when a new symbol id outgrows the capacity. They hold the current
+# book only and are not model features: TICK_DTYPE carries no sizes, so a
+# per-tick microprice or imbalance would have to be stamped on each trade
+# at decode time, as prevailing_quotes() does for bid/ask.
+class OrderBook:
+    def __init__(self, levels: int = 64, tick_size: float = 0.01, max_symbols: int = 1024):
+        if levels < 8:
+            raise ValueError(f"Order book needs at least 8 levels, got {levels}")
+        self.levels = levels
+        self.default_tick_size = tick_size
+        self.capacity = 0
+        self.updates = 0
+        self._allocate(max(1, max_symbols))
+
+    def _allocate(self, capacity: int):
+        old = self.capacity
+
+        def grow(name: str, shape: Tuple[int, ...], fill, dtype):
+            resized = np.full(shape, fill, dtype=dtype)
+            if old:
+                resized[:old] = getattr(self, name)
+            setattr(self, name, resized)
+
+        grow('bid_ladder', (capacity, self.levels), 0, np.int64)
+        grow('ask_ladder', (capacity, self.levels), 0, np.int64)
+        grow('base', (capacity,), -_FAR, np.int64)   # tick index of ladder level 0; -_FAR until first quote
+        grow('tick_size', (capacity,), self.default_tick_size, np.float64)
+        top = np.zeros(capacity, dtype=BOOK_DTYPE)
+        for name in ('mid', 'spread', 'microprice', 'imbalance'):
+            top[name] = np.nan
+        if old:
+            top[:old] = self.top
+        self.top = top
+        self.capacity = capacity
+
+    def _ensure_capacity(self, max_symbol_id: int):
+        if max_symbol_id >= self.capacity:
+            capacity = self.capacity
+            while capacity <= max_symbol_id:
+                capacity *= 2
+            self._allocate(capacity)
+
+    @property
+    def bid(self) -> np.ndarray:
+        return self.top['bid']
+
+    @property
+    def ask(self) -> np.ndarray:
+        return self.top['ask']
+
+    @property
+    def mid(self) -> np.ndarray:
+        return self.top['mid']
+
+    @property
+    def spread(self) -> np.ndarray:
+        return self.top['spread']
+
+    @property
+    def microprice(self) -> np.ndarray:
+        return self.top['microprice']
+
+    @property
+    def imbalance(self) -> np.ndarray:
+        return self.top['imbalance']
+
+    def set_tick_size(self, symbol_id: int, tick_size: float):
+        # Changing the tick size drops the symbol's ladder
+        self._ensure_capacity(symbol_id)
+        self.tick_size[symbol_id] = tick_size
+        self.bid_ladder[symbol_id] = 0
+        self.ask_ladder[symbol_id] = 0
+        self.base[symbol_id] = -_FAR
+
+    def _to_ticks(self, symbol_ids: np.ndarray, bids: np.ndarray, asks: np.ndarray):
+        tick = self.tick_size[symbol_ids]
+        bid_ticks = np.where(bids > 0, np.rint(bids / tick), -_FAR).astype(np.int64)
+        ask_ticks = np.where(asks > 0, np.rint(asks / tick), _FAR).astype(np.int64)
+        return bid_ticks, ask_ticks
+
+    def _mid_index(self, symbol_ids, bid_ticks, ask_ticks) -> np.ndarray:
+        # Mid's ladder index; one-sided quotes use the quoted side and empty
+        # ones the window centre, so they never move the window
+        has_bid = bid_ticks > -_FAR
+        has_ask = ask_ticks < _FAR
+        mid = np.where(has_bid & has_ask, (bid_ticks + ask_ticks) // 2, np.where(has_bid, bid_ticks, ask_ticks))
+        return np.where(has_bid | has_ask, mid - self.base[symbol_ids], self.levels // 2)
+
+    def _recenter(self, symbol_id: int, mid: int):
+        # Puts the mid at the middle of the window, keeping the levels both
+        # windows cover
+        L = self.levels
+        new_base = mid - L // 2
+        shift = new_base - int(self.base[symbol_id])
+        for ladder in (self.bid_ladder, self.ask_ladder):
+            row = ladder[symbol_id]
+            if 0 < shift < L:
+                row[:L - shift] = row[shift:].copy()
+                row[L - shift:] = 0
+            elif -L < shift < 0:
+                row[-shift:] = row[:L + shift].copy()
+                row[:-shift] = 0
+            elif shift:
+                row[:] = 0
+        self.base[symbol_id] = new_base
+
+    def _set_top(self, symbol_ids, timestamps, bids, asks, bid_sizes, ask_sizes):
+        top = self.top
+        top['timestamp'][symbol_ids] = timestamps
+        top['bid'][symbol_ids] = bids
+        top['ask'][symbol_ids] = asks
+        top['bid_size'][symbol_ids] = bid_sizes
+        top['ask_size'][symbol_ids] = ask_sizes
+        quoted = (bids > 0) & (asks > 0)
+        depth = bid_sizes + ask_sizes
+        with np.errstate(invalid='ignore', divide='ignore'):
+            top['mid'][symbol_ids] = np.where(quoted, (bids + asks) * 0.5, np.nan)
+            top['spread'][symbol_ids] = np.where(quoted, asks - bids, np.nan)
+            top['microprice'][symbol_ids] = np.where(quoted & (depth > 0),
+                                                     (bids * ask_sizes + asks * bid_sizes) / depth,
+                                                     np.where(quoted, (bids + asks) * 0.5, np.nan))
+            top['imbalance'][symbol_ids] = np.where(depth > 0, (bid_sizes - ask_sizes) / depth, np.nan)
+
+    def update(self, symbol_id: int, timestamp: int, bid: float, bid_size: int, ask: float, ask_size: int):
+        # Single quote: a fixed number of array writes regardless of book size
+        if symbol_id >= self.capacity:
+            self._ensure_capacity(symbol_id)
+        L = self.levels
+        tick = float(self.tick_size[symbol_id])
+        bid_tick = round(bid / tick) if bid > 0 else -_FAR
+        ask_tick = round(ask / tick) if ask > 0 else _FAR
+        base = int(self.base[symbol_id])
+        if bid_tick > -_FAR or ask_tick < _FAR:
+            if bid_tick > -_FAR and ask_tick < _FAR:
+                mid = (bid_tick + ask_tick) // 2
+            else:
+                mid = bid_tick if bid_tick > -_FAR else ask_tick
+            if not L // 4 <= mid - base < L - L // 4:
+                self._recenter(symbol_id, mid)
+                base = mid - L // 2
+        bi = min(max(bid_tick - base, -1), L)
+        ai = min(max(ask_tick - base, -1), L)
+        row = self.bid_ladder[symbol_id]
+        row[bi + 1:] = 0
+        if 0 <= bi < L:
+            row[bi] = bid_size
+        row = self.ask_ladder[symbol_id]
+        row[:max(ai, 0)] = 0
+        if 0 <= ai < L:
+            row[ai] = ask_size
+        quoted = bid > 0 and ask > 0
+        depth = bid_size + ask_size
+        mid_price = (bid + ask) * 0.5 if quoted else np.nan
+        self.top[symbol_id] = (
+            timestamp, bid, ask, bid_size, ask_size, mid_price, ask - bid if quoted else np.nan,
+            (bid * ask_size + ask * bid_size) / depth if quoted and depth > 0 else mid_price,
+            (bid_size - ask_size) / depth if depth > 0 else np.nan,
+        )
+        self.updates += 1
+
+    def apply_quotes(self, quotes: np.ndarray):
+        # EVENT_DTYPE records; anything but quotes is ignored
+        if len(quotes) and not (quotes['kind'] == EVENT_QUOTE).all():
+            quotes = quotes[quotes['kind'] == EVENT_QUOTE]
+        if len(quotes) == 0:
+            return
+        self.apply_quotes_columns(quotes['symbol_id'], quotes['timestamp'], quotes['bid'], quotes['bid_size'],
+                                  quotes['ask'], quotes['ask_size'])
+
+    def apply_quotes_columns(self, symbol_ids: np.ndarray, timestamps: np.ndarray, bids: np.ndarray,
+                             bid_sizes: np.ndarray, asks: np.ndarray, ask_sizes: np.ndarray):
+        # A batch of quotes in arrival order, with the same result as
+        # applying them one by one. A quote that moves its symbol's window
+        # (including a symbol's first quote) splits the batch: the quotes
+        # before it go through _apply_window, the quote itself through
+        # update(), and the rest are checked again against the new window.
+        if len(symbol_ids) == 0:
+            return
+        L = self.levels
+        symbol_ids = np.asarray(symbol_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        bids = np.asarray(bids, dtype=np.float64)
+        asks = np.asarray(asks, dtype=np.float64)
+        bid_sizes = np.asarray(bid_sizes, dtype=np.int64)
+        ask_sizes = np.asarray(ask_sizes, dtype=np.int64)
+        self._ensure_capacity(int(symbol_ids.max()))
+        bid_ticks, ask_ticks = self._to_ticks(symbol_ids, bids, asks)
+        columns = (symbol_ids, timestamps, bids, asks, bid_sizes, ask_sizes, bid_ticks, ask_ticks)
+        while True:
+            mid_index = self._mid_index(columns[0], columns[6], columns[7])
+            outside = np.flatnonzero((mid_index < L // 4) | (mid_index >= L - L // 4))
+            if len(outside) == 0:
+                self._apply_window(*columns)
+                return
+            # First window move of each symbol, and everything of that symbol from there on
+            moving, first = np.unique(columns[0][outside], return_index=True)
+            cuts = outside[first]
+            cut_at = np.full(self.capacity, len(columns[0]))
+            cut_at[moving] = cuts
+            position = np.arange(len(columns[0]))
+            limit = cut_at[columns[0]]
+            before = position < limit
+            if before.any():
+                self._apply_window(*(column[before] for column in columns))
+            for i in cuts.tolist():
+                self.update(int(columns[0][i]), int(columns[1][i]), float(columns[2][i]),
+                            int(columns[4][i]), float(columns[3][i]), int(columns[5][i]))
+            after = position > limit
+            if not after.any():
+                return
+            columns = tuple(column[after] for column in columns)
+
+    def _apply_window(self, symbol_ids, timestamps, bids, asks, bid_sizes, ask_sizes, bid_ticks, ask_ticks):
+        # Quotes whose mids all sit inside their symbol's window: a quoted
+        # level keeps its size unless a later quote of the symbol shows it
+        # empty, and levels already in the book are cleared by the lowest
+        # bid / highest ask of the batch
+        n = len(symbol_ids)
+        L = self.levels
+        order = np.argsort(symbol_ids, kind='stable')
+        sym = symbol_ids[order]
+        uniq, starts, counts = np.unique(sym, return_index=True, return_counts=True)
+        ends = starts + counts - 1
+        last = order[ends]
+
+        # Ladder indices clipped to [-1, L]: -1 is below the window, L above it
+        base = self.base[sym]
+        bi = np.clip(bid_ticks[order] - base, -1, L) + 1   # shifted to [0, L + 1] for the scans
+        ai = np.clip(ask_ticks[order] - base, -1, L) + 1
+        groups = np.repeat(np.arange(len(uniq)), counts)
+        span = L + 2
+        bid_min = _grouped_scan(bi, groups, span, reverse=True)
+        ask_max = _grouped_scan(ai, groups, span, reverse=True, maximum=True)
+        # Lowest bid / highest ask strictly after each quote of its symbol
+        later_bid = np.full(n, L + 1)
+        later_ask = np.full(n, 0)
+        inner = np.ones(n, dtype=bool)
+        inner[ends] = False
+        later_bid[inner] = bid_min[1:][inner[:-1]]
+        later_ask[inner] = ask_max[1:][inner[:-1]]
+
+        levels = np.arange(L)
+        rows = self.bid_ladder[uniq]
+        rows[levels > (bid_min[starts] - 1)[:, None]] = 0
+        self.bid_ladder[uniq] = rows
+        rows = self.ask_ladder[uniq]
+        rows[levels < (ask_max[starts] - 1)[:, None]] = 0
+        self.ask_ladder[uniq] = rows
+
+        sizes = bid_sizes[order]
+        keep = (bi >= 1) & (bi <= L) & (bi <= later_bid)
+        self._write_levels(self.bid_ladder, sym[keep], bi[keep] - 1, sizes[keep])
+        sizes = ask_sizes[order]
+        keep = (ai >= 1) & (ai <= L) & (ai >= later_ask)
+        self._write_levels(self.ask_ladder, sym[keep], ai[keep] - 1, sizes[keep])
+
+        self._set_top(uniq, timestamps[last], bids[last], asks[last], bid_sizes[last], ask_sizes[last])
+        self.updates += n
+
+    def _write_levels(self, ladder: np.ndarray, rows: np.ndarray, columns: np.ndarray, sizes: np.ndarray):
+        if len(rows) == 0:
+            return
+        # Last write per level wins
+        keys = rows * self.levels + columns
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        ladder[rows[last], columns[last]] = sizes[last]
+
+    def prevailing_quotes(self, events: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Bid/ask in force at each event of a frame (arrival order): the
+        # latest quote of the symbol earlier in the frame, else the book as
+        # it stood before the frame. Call before apply_quotes().
+        ids = events['symbol_id'].astype(np.int64)
+        n = len(ids)
+        if n == 0:
+            return np.empty(0), np.empty(0)
+        self._ensure_capacity(int(ids.max()))
+        bid = self.top['bid'][ids]
+        ask = self.top['ask'][ids]
+        is_quote = events['kind'] == EVENT_QUOTE
+        if is_quote.any():
+            order = np.argsort(ids, kind='stable')
+            sym = ids[order]
+            latest = np.maximum.accumulate(np.where(is_quote[order], np.arange(n), -1))
+            found = latest >= 0
+            found[found] &= sym[latest[found]] == sym[found]
+            source = order[latest[found]]
+            target = order[found]
+            bid[target] = events['bid'][source]
+            ask[target] = events['ask'][source]
+        return bid, ask
+
+    def depth(self, levels: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        # Total size on the `levels` price levels from each side's best,
+        # per symbol (levels outside the window count as empty)
+        L = self.levels
+        bid_ticks, ask_ticks = self._to_ticks(np.arange(self.capacity), self.top['bid'], self.top['ask'])
+        bi = np.clip(bid_ticks - self.base, -1, L - 1)
+        ai = np.clip(ask_ticks - self.base, 0, L)
+        bid_cum = np.concatenate((np.zeros((self.capacity, 1), dtype=np.int64), np.cumsum(self.bid_ladder, axis=1)),
+                                 axis=1)
+        ask_cum = np.concatenate((np.zeros((self.capacity, 1), dtype=np.int64), np.cumsum(self.ask_ladder, axis=1)),
+                                 axis=1)
+        rows = np.arange(self.capacity)
+        bid_depth = bid_cum[rows, bi + 1] - bid_cum[rows, np.maximum(bi + 1 - levels, 0)]
+        ask_depth = ask_cum[rows, np.minimum(ai + levels, L)] - ask_cum[rows, ai]
+        return bid_depth, ask_depth
+
+    def depth_imbalance(self, levels: int = 5) -> np.ndarray:
+        bid_depth, ask_depth = self.depth(levels)
+        total = bid_depth + ask_depth
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, (bid_depth - ask_depth) / total, np.nan)
+
+    def ladder(self, symbol_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (prices, bid sizes, ask sizes) of one symbol's window, low to high
+        prices = (self.base[symbol_id] + np.arange(self.levels)) * self.tick_size[symbol_id]
+        return prices, self.bid_ladder[symbol_id].copy(), self.ask_ladder[symbol_id].copy()
+
+    @property
+    def nbytes(self) -> int:
+        return self.bid_ladder.nbytes + self.ask_ladder.nbytes + self.base.nbytes + self.tick_size.nbytes \
+            + self.top.nbytes
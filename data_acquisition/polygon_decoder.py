@@ -0,0 +1,167 @@
+# data_acquisition/polygon_decoder.py
+
+import json
+import numpy as np
+from typing import Union
+from data_acquisition.tick_buffer import SymbolRegistry, TICK_DTYPE
+from utils.logger import get_logger
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = 'json'
+
+logger = get_logger(__name__)
+
+EVENT_TRADE = 1
+EVENT_QUOTE = 2
+EVENT_AGGREGATE_SECOND = 3
+EVENT_AGGREGATE_MINUTE = 4
+
+# One fixed-layout record per decoded event. Trades use price/size, quotes use
+# the bid/ask columns, aggregates store close/volume in price/size plus the
+# open/high/low/vwap columns and carry the window end in timestamp.
+EVENT_DTYPE = np.dtype([
+    ('timestamp', np.int64),   # ns since epoch
+    ('symbol_id', np.int32),
+    ('kind', np.uint8),
+    ('exchange', np.uint8),
+    ('price', np.float64),
+    ('size', np.int64),
+    ('bid', np.float64),
+    ('bid_size', np.int64),
+    ('ask', np.float64),
+    ('ask_size', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('vwap', np.float64),
+])
+
+_MS_TO_NS = 1_000_000
+
+
+class PolygonDecoder:
+    def __init__(self, symbols: SymbolRegistry = None):
+        self.symbols = symbols if symbols is not None else SymbolRegistry()
+        self.status_messages = 0
+        self.unknown_events = 0
+
+    def decode(self, message: Union[str, bytes]) -> np.ndarray:
+        payload = json_loads(message)
+        if isinstance(payload, dict):
+            payload = [payload]
+        try:
+            return self._decode_events(payload)
+        except (KeyError, TypeError):
+            # A malformed event somewhere in the frame; fall back to the
+            # tolerant path so the rest of the frame is kept
+            return self._decode_events(
+                [self._with_defaults(ev) for ev in payload if isinstance(ev, dict)])
+
+    def _decode_events(self, payload: list) -> np.ndarray:
+        kinds = [ev['ev'] for ev in payload]
+        events = np.zeros(len(payload), dtype=EVENT_DTYPE)
+        decoded = 0
+
+        # Bucket events by type, then fill each column with one list
+        # comprehension per field instead of building a record per event
+        trade_idx = [i for i, kind in enumerate(kinds) if kind == 'T']
+        if trade_idx:
+            trades = [payload[i] for i in trade_idx]
+            events['kind'][trade_idx] = EVENT_TRADE
+            self._fill_common(events, trade_idx, trades, 't')
+            events['exchange'][trade_idx] = [ev['x'] for ev in trades]
+            events['price'][trade_idx] = [ev['p'] for ev in trades]
+            events['size'][trade_idx] = [ev['s'] for ev in trades]
+            decoded += len(trade_idx)
+
+        if decoded < len(payload):
+            quote_idx = [i for i, kind in enumerate(kinds) if kind == 'Q']
+            if quote_idx:
+                quotes = [payload[i] for i in quote_idx]
+                events['kind'][quote_idx] = EVENT_QUOTE
+                self._fill_common(events, quote_idx, quotes, 't')
+                events['exchange'][quote_idx] = [ev['bx'] for ev in quotes]
+                events['bid'][quote_idx] = [ev['bp'] for ev in quotes]
+                events['bid_size'][quote_idx] = [ev['bs'] for ev in quotes]
+                events['ask'][quote_idx] = [ev['ap'] for ev in quotes]
+                events['ask_size'][quote_idx] = [ev['as'] for ev in quotes]
+                decoded += len(quote_idx)
+
+        if decoded < len(payload):
+            agg_idx = [i for i, kind in enumerate(kinds) if kind == 'A' or kind == 'AM']
+            if agg_idx:
+                aggs = [payload[i] for i in agg_idx]
+                events['kind'][agg_idx] = [EVENT_AGGREGATE_SECOND if ev['ev'] == 'A' else EVENT_AGGREGATE_MINUTE
+                                           for ev in aggs]
+                self._fill_common(events, agg_idx, aggs, 'e')
+                events['price'][agg_idx] = [ev['c'] for ev in aggs]
+                events['size'][agg_idx] = [ev['v'] for ev in aggs]
+                events['open'][agg_idx] = [ev['o'] for ev in aggs]
+                events['high'][agg_idx] = [ev['h'] for ev in aggs]
+                events['low'][agg_idx] = [ev['l'] for ev in aggs]
+                events['vwap'][agg_idx] = [ev['vw'] for ev in aggs]
+                decoded += len(agg_idx)
+
+        if decoded < len(payload):
+            for ev in payload:
+                if ev['ev'] == 'status':
+                    self.status_messages += 1
+                    logger.info(f"Polygon status: {ev.get('status')} - {ev.get('message')}")
+                elif ev['ev'] not in ('T', 'Q', 'A', 'AM'):
+                    self.unknown_events += 1
+            events = events[events['kind'] != 0]
+        return events
+
+    def _fill_common(self, events: np.ndarray, idx: list, payload: list, time_key: str):
+        ids = self.symbols.ids
+        get_id = self.symbols.get_id
+        events['timestamp'][idx] = [ev[time_key] * _MS_TO_NS for ev in payload]
+        events['symbol_id'][idx] = [ids[sym] if sym in ids else get_id(sym)
+                                    for sym in [ev['sym'] for ev in payload]]
+
+    @staticmethod
+    def _with_defaults(ev: dict) -> dict:
+        kind = ev.get('ev')
+        defaults = _EVENT_DEFAULTS.get(kind)
+        if defaults is None:
+            return {**ev, 'ev': kind if isinstance(kind, str) else ''}
+        return {**defaults, **ev}
+
+
+_EVENT_DEFAULTS = {
+    'T': {'sym': '', 'x': 0, 'p': 0.0, 's': 0, 't': 0},
+    'Q': {'sym': '', 'bx': 0, 'bp': 0.0, 'bs': 0, 'ap': 0.0, 'as': 0, 't': 0},
+    'A': {'sym': '', 'c': 0.0, 'v': 0, 'o': 0.0, 'h': 0.0, 'l': 0.0, 'vw': 0.0, 'e': 0},
+    'AM': {'sym': '', 'c': 0.0, 'v': 0, 'o': 0.0, 'h': 0.0, 'l': 0.0, 'vw': 0.0, 'e': 0},
+}
+
+
+def select_events(events: np.ndarray, kind: int) -> np.ndarray:
+    return events[events['kind'] == kind]
+
+
+def select_aggregates(events: np.ndarray) -> np.ndarray:
+    return events[(events['kind'] == EVENT_AGGREGATE_SECOND) | (events['kind'] == EVENT_AGGREGATE_MINUTE)]
+
+
+def trades_to_ticks(events: np.ndarray, bids: np.ndarray = None, asks: np.ndarray = None) -> np.ndarray:
+    # bids/asks, aligned with events, give each trade its prevailing quote
+    # (OrderBook.prevailing_quotes); without them the tick's bid/ask are 0
+    is_trade = events['kind'] == EVENT_TRADE
+    trades = events[is_trade]
+    # Group by symbol; the stable sort keeps each symbol's trades in arrival order
+    order = np.argsort(trades['symbol_id'], kind='stable')
+    trades = trades[order]
+    ticks = np.empty(len(trades), dtype=TICK_DTYPE)
+    ticks['timestamp'] = trades['timestamp']
+    ticks['symbol_id'] = trades['symbol_id']
+    ticks['price'] = trades['price']
+    ticks['volume'] = trades['size']
+    ticks['bid'] = 0.0 if bids is None else bids[is_trade][order]
+    ticks['ask'] = 0.0 if asks is None else asks[is_trade][order]
+    return ticks
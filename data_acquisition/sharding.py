@@ -0,0 +1,287 @@
+# data_acquisition/sharding.py
+
+import asyncio
+import multiprocessing
+import time
+import zlib
+import numpy as np
+from typing import Callable, Dict, List
+from data_acquisition.data_processor import DataProcessor
+from data_acquisition.indicators import INDICATOR_DTYPE
+from data_acquisition.tick_buffer import TICK_DTYPE, TickRingBuffer, SymbolRegistry
+from utils.shared_memory import SharedArray
+from utils.shm_ring import SharedRing
+from utils.logger import configure_logging, get_logger, worker_log_queue
+
+logger = get_logger(__name__)
+
+# One row per shard, each written only by its worker
+SHARD_STATS_DTYPE = np.dtype([
+    ('processed', np.int64),         # ticks through the shard's processor
+    ('batches', np.int64),
+    ('results_dropped', np.int64),   # indicator rows lost to a full results ring
+    ('heartbeat_ns', np.int64),      # time.monotonic_ns() of the worker's last idle pass
+])
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    # Stable across processes and runs, unlike hash()
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def _shard_worker(shard: int, ring_spec, results_spec, latest_spec, stats_spec, control_spec, settings: Dict,
+                  log_queue=None):
+    configure_logging(log_queue=log_queue)
+    asyncio.run(_run_shard(shard, ring_spec, results_spec, latest_spec, stats_spec, control_spec, settings))
+
+
+async def _run_shard(shard: int, ring_spec, results_spec, latest_spec, stats_spec, control_spec, settings: Dict):
+    ring = SharedRing.attach(ring_spec, TICK_DTYPE)
+    results = SharedRing.attach(results_spec, INDICATOR_DTYPE) if results_spec else None
+    latest = SharedArray.attach(latest_spec)
+    stats = SharedArray.attach(stats_spec)
+    control = SharedArray.attach(control_spec)
+    row = stats.array[shard:shard + 1]
+    max_symbols = len(latest.array)
+    batch_size = settings['batch_size']
+    idle_sleep = settings['idle_sleep']
+    processor = DataProcessor(batch_size=batch_size, buffer_capacity=settings['buffer_capacity'],
+                              history_capacity=settings['history_capacity'],
+                              indicator_window=settings['indicator_window'])
+
+    def publish(indicators: np.ndarray):
+        # Latest row per symbol into the shared table, and every row to the
+        # parent if it collects them
+        ids = indicators['symbol_id']
+        last = len(ids) - 1 - np.unique(ids[::-1], return_index=True)[1]
+        rows = indicators[last]
+        rows = rows[rows['symbol_id'] < max_symbols]
+        latest.array[rows['symbol_id']] = rows
+        if results is not None:
+            row['results_dropped'] += len(indicators) - results.push(indicators)
+        row['processed'] += len(indicators)
+        row['batches'] += 1
+
+    processor.indicator_handlers.append(publish)
+    row['heartbeat_ns'] = time.monotonic_ns()
+    try:
+        while not control.array[0]:
+            chunk = ring.peek(processor.buffer.free)
+            if len(chunk):
+                # The ring is the only producer here, so full batches are
+                # processed in line rather than by a batcher task
+                processor.add_ticks(chunk)
+                ring.advance(len(chunk))
+                while len(processor.buffer) >= batch_size:
+                    await processor.process_batch()
+            elif len(processor.buffer):
+                # Caught up: flush the partial batch rather than wait for more
+                await processor.process_batch()
+            else:
+                row['heartbeat_ns'] = time.monotonic_ns()
+                await asyncio.sleep(idle_sleep)
+    finally:
+        ring.close()
+        if results is not None:
+            results.close()
+        latest.close()
+        stats.close()
+        control.close()
+
+
+# Drop-in for DataProcessor that spreads the work across worker processes.
+# Symbols are hashed onto `shards` workers; add_ticks() (on the decode
+# process) splits each batch by shard and pushes it into that worker's
+# shared-memory tick ring. Each worker runs its own DataProcessor, so
+# indicator state for a symbol lives in exactly one process.
+#
+# Results come back without pickling: `latest` is a shared INDICATOR_DTYPE
+# table with each symbol's most recent row (rows are written in place, so a
+# reader can catch one mid-update), and with publish_results every
+# indicator row also comes back through a per-shard ring that
+# poll() / run_periodic_processing() hand to indicator_handlers.
+#
+# A full tick ring blocks add_ticks until the worker catches up.
+class ShardedProcessor:
+    def __init__(self, shards: int = None, batch_size: int = 1000, processing_interval: float = 0.5,
+                 ring_capacity: int = 1 << 18, history_capacity: int = 1 << 20, indicator_window: int = 50,
+                 max_symbols: int = 1 << 16, publish_results: bool = True, idle_sleep: float = 0.0002,
+                 start_method: str = 'spawn'):
+        self.shards = shards or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self.processing_interval = processing_interval
+        self.idle_sleep = idle_sleep
+        self.symbols = SymbolRegistry()
+        # Raw ticks as routed, for consumers of DataProcessor.processed_data
+        self.processed_data = TickRingBuffer(history_capacity, overwrite=True)
+        self.tick_handlers: List[Callable[[np.ndarray], None]] = []
+        self.indicator_handlers: List[Callable[[np.ndarray], None]] = []
+        self.stalls = 0
+        self._shard_map = np.zeros(0, dtype=np.int32)
+        self._context = multiprocessing.get_context(start_method)
+        # Worker processors keep only a short history of their own; their
+        # output is what comes back through `latest` and the results rings
+        self._settings = {
+            'batch_size': batch_size,
+            'buffer_capacity': ring_capacity,
+            'history_capacity': 1 << 12,
+            'indicator_window': indicator_window,
+            'idle_sleep': idle_sleep,
+        }
+        self.rings = [SharedRing.create(ring_capacity, TICK_DTYPE) for _ in range(self.shards)]
+        self.results = [SharedRing.create(ring_capacity, INDICATOR_DTYPE) for _ in range(self.shards)] \
+            if publish_results else []
+        self._latest = SharedArray.create((max_symbols,), INDICATOR_DTYPE)
+        self._latest.array[:] = np.zeros(1, dtype=INDICATOR_DTYPE)
+        self._stats = SharedArray.create((self.shards,), SHARD_STATS_DTYPE)
+        self._stats.array[:] = np.zeros(1, dtype=SHARD_STATS_DTYPE)
+        self._control = SharedArray.create((1,), np.int64)
+        self._control.array[0] = 0
+        self.workers: List[multiprocessing.Process] = []
+
+    @property
+    def latest(self) -> np.ndarray:
+        return self._latest.array
+
+    @property
+    def stats(self) -> np.ndarray:
+        return self._stats.array
+
+    def start(self):
+        for shard in range(self.shards):
+            worker = self._context.Process(
+                target=_shard_worker, name=f'shard-{shard}', daemon=True,
+                args=(shard, self.rings[shard].spec, self.results[shard].spec if self.results else None,
+                      self._latest.spec, self._stats.spec, self._control.spec, self._settings,
+                      worker_log_queue()))
+            worker.start()
+            self.workers.append(worker)
+        logger.info(f"Started {self.shards} processing shards.")
+
+    async def wait_ready(self, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while (self.stats['heartbeat_ns'] == 0).any():
+            self._check_workers()
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    def _check_workers(self):
+        for shard, worker in enumerate(self.workers):
+            if not worker.is_alive():
+                raise RuntimeError(f"Processing shard {shard} exited (code {worker.exitcode})")
+
+    def _shard_ids(self, symbol_ids: np.ndarray) -> np.ndarray:
+        needed = int(symbol_ids.max()) + 1
+        if needed > len(self._shard_map):
+            names = self.symbols.symbols
+            added = [shard_of(names[i], self.shards) if i < len(names) else i % self.shards
+                     for i in range(len(self._shard_map), max(needed, len(names)))]
+            self._shard_map = np.concatenate((self._shard_map, np.array(added, dtype=np.int32)))
+        return self._shard_map[symbol_ids]
+
+    def add_tick(self, symbol: str, timestamp: int, price: float, volume: int,
+                 bid: float = 0.0, ask: float = 0.0):
+        symbol_id = self.symbols.get_id(symbol)
+        self.add_ticks(np.array([(timestamp, symbol_id, price, volume, bid, ask)], dtype=TICK_DTYPE))
+
+    def add_ticks(self, records: np.ndarray, received_ns: int = 0):
+        # received_ns is accepted for DataProcessor compatibility; the
+        # workers time their batches from when the ticks reach their ring
+        if len(records) == 0:
+            return
+        for handler in self.tick_handlers:
+            handler(records)
+        self.processed_data.extend(records)
+        if self.shards == 1:
+            self._push(0, records)
+            return
+        shard_ids = self._shard_ids(records['symbol_id'])
+        order = np.argsort(shard_ids, kind='stable')
+        bounds = np.searchsorted(shard_ids[order], np.arange(self.shards + 1))
+        routed = records[order]
+        for shard in range(self.shards):
+            if bounds[shard] < bounds[shard + 1]:
+                self._push(shard, routed[bounds[shard]:bounds[shard + 1]])
+
+    def _push(self, shard: int, records: np.ndarray):
+        ring = self.rings[shard]
+        while True:
+            records = records[ring.push(records):]
+            if len(records) == 0:
+                return
+            self.stalls += 1
+            self._check_workers()
+            time.sleep(self.idle_sleep)
+
+    def poll(self) -> int:
+        # Drains the results rings into indicator_handlers; returns rows seen
+        count = 0
+        for ring in self.results:
+            while len(ring):
+                rows = ring.peek()
+                for handler in self.indicator_handlers:
+                    handler(rows)
+                ring.advance(len(rows))
+                count += len(rows)
+        return count
+
+    def pending(self) -> int:
+        # Ticks routed but not yet through a shard's processor
+        return sum(ring.head for ring in self.rings) - int(self.stats['processed'].sum())
+
+    async def drain(self, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            self.poll()
+            self._check_workers()
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(self.idle_sleep)
+        self.poll()
+        return True
+
+    async def run_periodic_processing(self):
+        while True:
+            await asyncio.sleep(self.processing_interval)
+            self.poll()
+
+    def get_feature_matrix(self, rows: int = None) -> np.ndarray:
+        # With rows, only the newest that many ticks
+        ticks = self.processed_data.to_array() if rows is None else self.processed_data.latest(rows)
+        return np.column_stack((
+            ticks['timestamp'].astype(np.float64),
+            ticks['price'],
+            ticks['volume'].astype(np.float64),
+            ticks['bid'],
+            ticks['ask'],
+        ))
+
+    def summary(self) -> Dict[str, int]:
+        stats = self.stats
+        return {
+            'routed': sum(ring.head for ring in self.rings),
+            'processed': int(stats['processed'].sum()),
+            'batches': int(stats['batches'].sum()),
+            'results_dropped': int(stats['results_dropped'].sum()),
+            'stalls': self.stalls,
+        }
+
+    def close(self, timeout: float = 5.0):
+        if self._control is None:
+            return
+        self._control.array[0] = 1
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        for ring in self.rings + self.results:
+            ring.unlink()
+        self._latest.unlink()
+        self._stats.unlink()
+        self._control.unlink()
+        self._control = None
+        self.workers = []
+        logger.info("Processing shards stopped.")
@@ -0,0 +1,151 @@
+# data_acquisition/tick_buffer.py
+
+import threading
+import numpy as np
+from typing import Dict, List, Tuple
+
+TICK_DTYPE = np.dtype([
+    ('timestamp', np.int64),   # exchange timestamp, ns since epoch
+    ('symbol_id', np.int32),
+    ('price', np.float64),
+    ('volume', np.int64),
+    ('bid', np.float64),
+    ('ask', np.float64),
+])
+
+
+# Shared by the event loop and the QuickFIX callback thread (via OrderStore),
+# so registering a new symbol happens under a lock; known symbols are looked
+# up without it.
+class SymbolRegistry:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._lock = threading.Lock()
+
+    def get_id(self, symbol: str) -> int:
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = self.ids.get(symbol)
+                if symbol_id is None:
+                    # symbols first, so an id is never visible before its name
+                    symbol_id = len(self.symbols)
+                    self.symbols.append(symbol)
+                    self.ids[symbol] = symbol_id
+        return symbol_id
+
+    def get_symbol(self, symbol_id: int) -> str:
+        return self.symbols[symbol_id]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+# Fixed-capacity single-producer/single-consumer ring of structured records.
+# Readers get zero-copy views via peek() and release them with advance(); a view
+# stays valid until the slots it covers are advanced past and rewritten. With
+# overwrite=False a full ring rejects new records (counted in `dropped`), with
+# overwrite=True the oldest records are discarded, which bounded histories want.
+class TickRingBuffer:
+    def __init__(self, capacity: int = 1 << 20, overwrite: bool = False, dtype: np.dtype = TICK_DTYPE):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError(f"Ring buffer capacity must be a power of two, got {capacity}")
+        self.capacity = capacity
+        self.overwrite = overwrite
+        self._mask = capacity - 1
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.head = 0  # total records written
+        self.tail = 0  # total records consumed
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    @property
+    def free(self) -> int:
+        return self.capacity - (self.head - self.tail)
+
+    def append(self, timestamp: int, symbol_id: int, price: float, volume: int,
+               bid: float = 0.0, ask: float = 0.0) -> bool:
+        if self.head - self.tail >= self.capacity:
+            if not self.overwrite:
+                self.dropped += 1
+                return False
+            self.tail += 1
+            self.dropped += 1
+        self._data[self.head & self._mask] = (timestamp, symbol_id, price, volume, bid, ask)
+        self.head += 1
+        return True
+
+    def extend(self, records: np.ndarray) -> int:
+        n = len(records)
+        if n == 0:
+            return 0
+        if self.overwrite:
+            if n > self.capacity:
+                self.dropped += n - self.capacity
+                records = records[-self.capacity:]
+                n = self.capacity
+            overflow = (self.head - self.tail) + n - self.capacity
+            if overflow > 0:
+                self.tail += overflow
+                self.dropped += overflow
+        else:
+            free = self.free
+            if n > free:
+                self.dropped += n - free
+                records = records[:free]
+                n = free
+        start = self.head & self._mask
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = records[:first]
+        if first < n:
+            self._data[:n - first] = records[first:]
+        self.head += n
+        return n
+
+    def extend_columns(self, timestamps: np.ndarray, symbol_ids: np.ndarray, prices: np.ndarray,
+                       volumes: np.ndarray, bids: np.ndarray = None, asks: np.ndarray = None) -> int:
+        records = np.empty(len(timestamps), dtype=self._data.dtype)
+        records['timestamp'] = timestamps
+        records['symbol_id'] = symbol_ids
+        records['price'] = prices
+        records['volume'] = volumes
+        records['bid'] = 0.0 if bids is None else bids
+        records['ask'] = 0.0 if asks is None else asks
+        return self.extend(records)
+
+    def peek(self, max_records: int = None) -> np.ndarray:
+        # Only the contiguous run up to the physical end of the buffer is
+        # returned; a wrapped remainder is picked up by the next peek.
+        available = self.head - self.tail
+        if max_records is not None:
+            available = min(available, max_records)
+        start = self.tail & self._mask
+        end = min(start + available, self.capacity)
+        return self._data[start:end]
+
+    def advance(self, count: int):
+        if count > self.head - self.tail:
+            raise ValueError(f"Cannot advance {count} records, only {self.head - self.tail} available")
+        self.tail += count
+
+    def segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        start = self.tail & self._mask
+        available = self.head - self.tail
+        first = min(available, self.capacity - start)
+        return self._data[start:start + first], self._data[:available - first]
+
+    def to_array(self) -> np.ndarray:
+        first, second = self.segments()
+        return np.concatenate((first, second))
+
+    def latest(self, count: int) -> np.ndarray:
+        # Copy of the newest `count` records (all if fewer), oldest first
+        first, second = self.segments()
+        from_first = max(0, min(len(first), count - len(second)))
+        return np.concatenate((first[len(first) - from_first:], second[max(0, len(second) - count):]))
+
+    def clear(self):
+        self.tail = self.head
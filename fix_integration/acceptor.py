@@ -0,0 +1,174 @@
+# fix_integration/acceptor.py
+#
+# Local exchange stand-in for development and benchmarks: accepts the
+# FixClient session (fix_integration/acceptor.cfg mirrors the initiator
+# config) and answers every order message at once.
+#
+#   NewOrderSingle              -> ExecutionReport New (plus a full Trade
+#                                  at the limit price with --fill)
+#   OrderCancelRequest          -> ExecutionReport Canceled, or
+#                                  OrderCancelReject for unknown orders
+#   OrderCancelReplaceRequest   -> ExecutionReport Replaced, or
+#                                  OrderCancelReject for unknown orders
+#
+#   python -m fix_integration.acceptor [--config fix_integration/acceptor.cfg] [--fill]
+
+import argparse
+import itertools
+import os
+import time
+import quickfix as fix
+import quickfix44 as fix44
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(__file__), 'acceptor.cfg')
+
+TAG_AVG_PX = 6
+TAG_CL_ORD_ID = 11
+TAG_CUM_QTY = 14
+TAG_EXEC_ID = 17
+TAG_LAST_PX = 31
+TAG_LAST_QTY = 32
+TAG_ORDER_ID = 37
+TAG_ORDER_QTY = 38
+TAG_ORD_STATUS = 39
+TAG_ORIG_CL_ORD_ID = 41
+TAG_PRICE = 44
+TAG_SIDE = 54
+TAG_SYMBOL = 55
+TAG_TEXT = 58
+TAG_CXL_REJ_RESPONSE_TO = 434
+TAG_EXEC_TYPE = 150
+TAG_LEAVES_QTY = 151
+
+
+class ExchangeSimulator(fix.Application):
+    def __init__(self, fill: bool = False):
+        super().__init__()
+        self.fill = fill
+        # ClOrdID -> [order_id, symbol, side, quantity, price, cum_qty]
+        self.orders = {}
+        self._order_ids = itertools.count(1)
+        self._exec_ids = itertools.count(1)
+
+    def onCreate(self, sessionID: fix.SessionID):
+        logger.info(f"Acceptor session created: {sessionID}")
+
+    def onLogon(self, sessionID: fix.SessionID):
+        logger.info(f"Acceptor logon: {sessionID}")
+
+    def onLogout(self, sessionID: fix.SessionID):
+        logger.info(f"Acceptor logout: {sessionID}")
+
+    def toAdmin(self, message: fix.Message, sessionID: fix.SessionID):
+        pass
+
+    def fromAdmin(self, message: fix.Message, sessionID: fix.SessionID):
+        pass
+
+    def toApp(self, message: fix.Message, sessionID: fix.SessionID):
+        pass
+
+    def fromApp(self, message: fix.Message, sessionID: fix.SessionID):
+        msg_type = message.getHeader().getField(35)
+        if msg_type == fix.MsgType_NewOrderSingle:
+            self.on_new_order(message, sessionID)
+        elif msg_type == fix.MsgType_OrderCancelRequest:
+            self.on_cancel(message, sessionID, replace=False)
+        elif msg_type == fix.MsgType_OrderCancelReplaceRequest:
+            self.on_cancel(message, sessionID, replace=True)
+
+    def on_new_order(self, message: fix.Message, sessionID: fix.SessionID):
+        cl_ord_id = message.getField(TAG_CL_ORD_ID)
+        price = message.getField(TAG_PRICE) if message.isSetField(TAG_PRICE) else '0'
+        order = [str(next(self._order_ids)), message.getField(TAG_SYMBOL), message.getField(TAG_SIDE),
+                 int(float(message.getField(TAG_ORDER_QTY))), price, 0]
+        self.orders[cl_ord_id] = order
+        self.send_report(sessionID, cl_ord_id, None, order, fix.ExecType_NEW, fix.OrdStatus_NEW)
+        if self.fill:
+            order[5] = order[3]
+            self.send_report(sessionID, cl_ord_id, None, order, fix.ExecType_TRADE, fix.OrdStatus_FILLED,
+                             last_qty=order[3])
+            del self.orders[cl_ord_id]
+
+    def on_cancel(self, message: fix.Message, sessionID: fix.SessionID, replace: bool):
+        cl_ord_id = message.getField(TAG_CL_ORD_ID)
+        orig_cl_ord_id = message.getField(TAG_ORIG_CL_ORD_ID)
+        order = self.orders.pop(orig_cl_ord_id, None)
+        if order is None:
+            self.send_cancel_reject(sessionID, cl_ord_id, orig_cl_ord_id, replace)
+            return
+        if replace:
+            order[3] = int(float(message.getField(TAG_ORDER_QTY)))
+            order[4] = message.getField(TAG_PRICE)
+            self.orders[cl_ord_id] = order
+            self.send_report(sessionID, cl_ord_id, orig_cl_ord_id, order, fix.ExecType_REPLACED,
+                             fix.OrdStatus_REPLACED)
+        else:
+            self.send_report(sessionID, cl_ord_id, orig_cl_ord_id, order, fix.ExecType_CANCELED,
+                             fix.OrdStatus_CANCELED)
+
+    def send_report(self, sessionID: fix.SessionID, cl_ord_id: str, orig_cl_ord_id: str, order: list,
+                    exec_type: str, ord_status: str, last_qty: int = 0):
+        order_id, symbol, side, quantity, price, cum_qty = order
+        report = fix44.ExecutionReport()
+        report.setField(TAG_ORDER_ID, order_id)
+        report.setField(TAG_EXEC_ID, str(next(self._exec_ids)))
+        report.setField(TAG_CL_ORD_ID, cl_ord_id)
+        if orig_cl_ord_id is not None:
+            report.setField(TAG_ORIG_CL_ORD_ID, orig_cl_ord_id)
+        report.setField(TAG_EXEC_TYPE, exec_type)
+        report.setField(TAG_ORD_STATUS, ord_status)
+        report.setField(TAG_SYMBOL, symbol)
+        report.setField(TAG_SIDE, side)
+        report.setField(TAG_ORDER_QTY, str(quantity))
+        report.setField(TAG_PRICE, price)
+        leaves = 0 if ord_status in (fix.OrdStatus_CANCELED, fix.OrdStatus_FILLED) else quantity - cum_qty
+        report.setField(TAG_LEAVES_QTY, str(leaves))
+        report.setField(TAG_CUM_QTY, str(cum_qty))
+        report.setField(TAG_AVG_PX, price if cum_qty else '0')
+        if last_qty:
+            report.setField(TAG_LAST_QTY, str(last_qty))
+            report.setField(TAG_LAST_PX, price)
+        fix.Session.sendToTarget(report, sessionID)
+
+    def send_cancel_reject(self, sessionID: fix.SessionID, cl_ord_id: str, orig_cl_ord_id: str, replace: bool):
+        reject = fix44.OrderCancelReject()
+        reject.setField(TAG_ORDER_ID, 'NONE')
+        reject.setField(TAG_CL_ORD_ID, cl_ord_id)
+        reject.setField(TAG_ORIG_CL_ORD_ID, orig_cl_ord_id)
+        reject.setField(TAG_ORD_STATUS, fix.OrdStatus_REJECTED)
+        reject.setField(TAG_CXL_REJ_RESPONSE_TO, '2' if replace else '1')
+        reject.setField(TAG_TEXT, 'Unknown order')
+        fix.Session.sendToTarget(reject, sessionID)
+
+
+def create_acceptor(config_file: str = DEFAULT_CONFIG, fill: bool = False):
+    settings = fix.SessionSettings(config_file)
+    application = ExchangeSimulator(fill)
+    acceptor = fix.SocketAcceptor(application, fix.MemoryStoreFactory(), settings,
+                                  fix.FileLogFactory(settings))
+    return acceptor, application
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local FIX 4.4 exchange stand-in")
+    parser.add_argument('--config', default=DEFAULT_CONFIG)
+    parser.add_argument('--fill', action='store_true', help="Fill every new order in full at its limit price")
+    args = parser.parse_args()
+    acceptor, _ = create_acceptor(args.config, args.fill)
+    acceptor.start()
+    logger.info(f"FIX acceptor listening ({args.config}).")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        acceptor.stop()
+
+
+if __name__ == '__main__':
+    main()
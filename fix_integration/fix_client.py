@@ -1,13 +1,18 @@
 # fix_integration/fix_client.py
 
 import quickfix as fix
-from fix_session import FixSession
+from fix_integration.fix_session import FixSession
+from fix_integration.gateway import OrderGateway, ORD_TYPE_LIMIT
+from fix_integration.order_store import OrderStore
+from risk.risk_engine import RiskEngine
+from utils.latency import LatencyMonitor
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class FixClient:
-    def __init__(self, config_file: str):
+    def __init__(self, config_file: str, store: OrderStore = None, risk: RiskEngine = None,
+                 latency: LatencyMonitor = None):
         self.session_settings = fix.SessionSettings(config_file)
         self.application = FixSession()
         self.store_factory = fix.FileStoreFactory(self.session_settings)
@@ -18,6 +23,18 @@ class FixClient:
             self.session_settings,
             self.log_factory
         )
+        # Working-order state, updated from the session's ExecutionReports.
+        # With a risk engine, orders pass its checks and closed orders give
+        # back their unfilled quantity; store and engine share symbol ids.
+        if store is None:
+            store = OrderStore(risk.symbols if risk is not None else None)
+        self.orders = store
+        self.orders.attach(self.application)
+        self.risk = risk
+        if risk is not None:
+            self.orders.archive_handlers.append(risk.on_orders_closed)
+            self.orders.replace_handlers.append(risk.on_order_replaced)
+        self.gateway = OrderGateway(self.application, store=self.orders, risk=risk, latency=latency)
         logger.info("FIX client initialized.")
 
     def start(self):
@@ -28,34 +45,46 @@ class FixClient:
         self.initiator.stop()
         logger.info("FIX client stopped.")
 
-    def send_order(self, order_details: dict):
+    def is_logged_on(self) -> bool:
+        return self.initiator.isLoggedOn()
+
+    # The dict-based calls below keep their original shape; hot paths should
+    # call self.gateway directly (send_orders, cancel_orders, replace_orders)
+
+    def send_order(self, order_details: dict) -> str:
         try:
-            order = fix44.NewOrderSingle()
-            order.setField(fix.ClOrdID(order_details['ClOrdID']))
-            order.setField(fix.HandlInst('1'))
-            order.setField(fix.Symbol(order_details['Symbol']))
-            order.setField(fix.Side(order_details['Side']))
-            order.setField(fix.TransactTime())
-            order.setField(fix.OrdType(order_details['OrdType']))
-            order.setField(fix.OrderQty(order_details['OrderQty']))
-            order.setField(fix.Price(order_details['Price']))
-            fix.Session.sendToTarget(order, self.application.session_id)
-            logger.info(f"Sent NewOrderSingle: {order_details['ClOrdID']}")
+            cl_ord_id = self.gateway.send_order(order_details['Symbol'], order_details['Side'],
+                                                order_details['OrderQty'], order_details.get('Price'),
+                                                order_details.get('OrdType', ORD_TYPE_LIMIT),
+                                                order_details.get('ClOrdID'))
+            logger.debug("Sent NewOrderSingle: %s", cl_ord_id)
+            return cl_ord_id
         except fix.SessionNotFound as e:
             logger.error(f"Session not found: {e}")
         except Exception as e:
             logger.exception(f"Error sending order: {e}")
 
-    def send_order_cancel(self, cancel_details: dict):
+    def send_order_cancel(self, cancel_details: dict) -> str:
         try:
-            cancel_request = fix44.OrderCancelRequest()
-            cancel_request.setField(fix.OrigClOrdID(cancel_details['OrigClOrdID']))
-            cancel_request.setField(fix.ClOrdID(cancel_details['ClOrdID']))
-            cancel_request.setField(fix.Symbol(cancel_details['Symbol']))
-            cancel_request.setField(fix.OrderQty(cancel_details['OrderQty']))
-            fix.Session.sendToTarget(cancel_request, self.application.session_id)
-            logger.info(f"Sent OrderCancelRequest: {cancel_details['ClOrdID']}")
+            # Side is optional: the store knows it for orders sent through here
+            cl_ord_id = self.gateway.cancel_order(cancel_details['OrigClOrdID'], cancel_details['Symbol'],
+                                                  cancel_details.get('Side'), cancel_details['OrderQty'],
+                                                  cancel_details.get('ClOrdID'))
+            logger.debug("Sent OrderCancelRequest: %s", cl_ord_id)
+            return cl_ord_id
         except fix.SessionNotFound as e:
             logger.error(f"Session not found: {e}")
         except Exception as e:
             logger.exception(f"Error sending order cancel request: {e}")
+
+    def send_order_cancel_replace(self, replace_details: dict) -> str:
+        try:
+            cl_ord_id = self.gateway.replace_order(replace_details['OrigClOrdID'], replace_details['Symbol'],
+                                                   replace_details['Side'], replace_details['OrderQty'],
+                                                   replace_details['Price'])
+            logger.debug("Sent OrderCancelReplaceRequest: %s", cl_ord_id)
+            return cl_ord_id
+        except fix.SessionNotFound as e:
+            logger.error(f"Session not found: {e}")
+        except Exception as e:
+            logger.exception(f"Error sending order cancel/replace request: {e}")
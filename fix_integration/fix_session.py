@@ -10,6 +10,10 @@ class FixSession(fix.Application):
     def __init__(self):
         super().__init__()
         self.session_id = None
+        # Called with each incoming ExecutionReport / OrderCancelReject
+        # message, on the QuickFIX thread
+        self.execution_report_handlers = []
+        self.cancel_reject_handlers = []
 
     def onCreate(self, sessionID: fix.SessionID):
         self.session_id = sessionID
@@ -22,21 +26,30 @@ class FixSession(fix.Application):
         logger.info(f"FIX session logout: {sessionID}")
 
     def toAdmin(self, message: fix.Message, sessionID: fix.SessionID):
-        logger.debug(f"To Admin: {message}")
+        # Lazy: the message is only rendered when DEBUG is enabled
+        logger.debug("To Admin: %s", message)
 
     def toApp(self, message: fix.Message, sessionID: fix.SessionID):
-        logger.debug(f"To App: {message}")
+        logger.debug("To App: %s", message)
 
     def fromAdmin(self, message: fix.Message, sessionID: fix.SessionID):
-        logger.debug(f"From Admin: {message}")
+        logger.debug("From Admin: %s", message)
 
     def fromApp(self, message: fix.Message, sessionID: fix.SessionID):
-        logger.debug(f"From App: {message}")
+        logger.debug("From App: %s", message)
         self.onMessage(message, sessionID)
 
     def onMessage(self, message: fix.Message, sessionID: fix.SessionID):
-        msg_type = message.getHeader().getField(fix.MsgType())
-        if msg_type == fix.MsgType_NewOrderSingle:
+        msg_type = fix.MsgType()
+        message.getHeader().getField(msg_type)
+        msg_type = msg_type.getValue()
+        if msg_type == fix.MsgType_ExecutionReport:
+            for handler in self.execution_report_handlers:
+                handler(message)
+        elif msg_type == fix.MsgType_OrderCancelReject:
+            for handler in self.cancel_reject_handlers:
+                handler(message)
+        elif msg_type == fix.MsgType_NewOrderSingle:
             self.handle_new_order_single(message)
         elif msg_type == fix.MsgType_OrderCancelRequest:
             self.handle_order_cancel_request(message)
@@ -53,8 +66,9 @@ class FixSession(fix.Application):
         message.getField(order_qty)
         price = fix.Price()
         message.getField(price)
-        logger.info(f"Received NewOrderSingle: ClOrdID={cl_ord_id.getValue()}, Symbol={symbol.getValue()}, "
-                    f"Side={side.getValue()}, OrderQty={order_qty.getValue()}, Price={price.getValue()}")
+        logger.info("Received NewOrderSingle: ClOrdID=%s, Symbol=%s, Side=%s, OrderQty=%s, Price=%s",
+                    cl_ord_id.getValue(), symbol.getValue(), side.getValue(), order_qty.getValue(),
+                    price.getValue())
         # Implement order handling logic here
 
     def handle_order_cancel_request(self, message: fix.Message):
@@ -66,7 +80,6 @@ class FixSession(fix.Application):
         message.getField(symbol)
         order_qty = fix.OrderQty()
         message.getField(order_qty)
-        logger.info(f"Received OrderCancelRequest: OrigClOrdID={orig_cl_ord_id.getValue()}, "
-                    f"ClOrdID={cl_ord_id.getValue()}, Symbol={symbol.getValue()}, "
-                    f"OrderQty={order_qty.getValue()}")
+        logger.info("Received OrderCancelRequest: OrigClOrdID=%s, ClOrdID=%s, Symbol=%s, OrderQty=%s",
+                    orig_cl_ord_id.getValue(), cl_ord_id.getValue(), symbol.getValue(), order_qty.getValue())
         # Implement order cancellation logic here
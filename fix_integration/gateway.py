@@ -0,0 +1,297 @@
+# fix_integration/gateway.py
+
+import itertools
+import time
+import numpy as np
+import quickfix as fix
+import quickfix44 as fix44
+from typing import Iterable, List, Optional, Tuple
+from risk.risk_engine import RiskEngine, RISK_ACCEPTED
+from utils.latency import LatencyMonitor
+
+SIDE_BUY = '1'
+SIDE_SELL = '2'
+ORD_TYPE_MARKET = '1'
+ORD_TYPE_LIMIT = '2'
+
+# Tag numbers for the fields written per message; setting a field by tag
+# skips building a quickfix field object
+TAG_CL_ORD_ID = 11
+TAG_ORDER_QTY = 38
+TAG_ORIG_CL_ORD_ID = 41
+TAG_PRICE = 44
+TAG_TRANSACT_TIME = 60
+
+# (symbol, side, quantity, price)
+OrderTuple = Tuple[str, str, int, float]
+# (orig_cl_ord_id, symbol, side, quantity)
+CancelTuple = Tuple[str, str, str, int]
+# (orig_cl_ord_id, symbol, side, quantity, price)
+ReplaceTuple = Tuple[str, str, str, int, float]
+
+
+# Monotonic ClOrdIDs: a prefix unique to this process start (base-36
+# milliseconds) followed by a counter, so IDs never repeat across restarts
+# and cost one counter step and a string concatenation.
+class ClOrdIDGenerator:
+    def __init__(self, prefix: str = None):
+        if prefix is None:
+            prefix = _base36(time.time_ns() // 1_000_000)
+        self.prefix = prefix
+        self._counter = itertools.count(1)
+
+    def __call__(self) -> str:
+        return f"{self.prefix}{next(self._counter)}"
+
+
+def _base36(value: int) -> str:
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    encoded = ''
+    while value:
+        value, digit = divmod(value, 36)
+        encoded = digits[digit] + encoded
+    return encoded or '0'
+
+
+# UTCTimestamp for TransactTime with the second-resolution part formatted
+# once per second
+class _TransactTime:
+    def __init__(self):
+        self._second = -1
+        self._prefix = ''
+
+    def __call__(self) -> str:
+        now_ms = time.time_ns() // 1_000_000
+        second, millis = divmod(now_ms, 1000)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime('%Y%m%d-%H:%M:%S', time.gmtime(second))
+        return f"{self._prefix}.{millis:03d}"
+
+
+# Order-entry fast path over an established FIX session. Messages are built
+# once per (symbol, side) with the static fields filled in, and each send
+# only overwrites ClOrdID, quantity, price and TransactTime before the
+# session serializes it. Batches resolve the session once and send in a
+# loop. Templates are reused in place, so a gateway must be driven from a
+# single thread. With a store, new orders are tracked as they are sent.
+# With a risk engine, new orders and replaces must pass it: rejected orders
+# are not sent, come back as None and leave their code in last_risk_code(s).
+# Cancels are never blocked. New orders given a trigger_ns (the triggering
+# tick's receive time) record 'tick_to_fix_send' once handed to the session.
+class OrderGateway:
+    def __init__(self, application, id_generator: ClOrdIDGenerator = None, store=None,
+                 risk: RiskEngine = None, latency: LatencyMonitor = None):
+        self.application = application
+        self.next_id = id_generator or ClOrdIDGenerator()
+        self.store = store
+        self.risk = risk
+        self.last_risk_code = RISK_ACCEPTED
+        self.last_risk_codes = None
+        self.sent_messages = 0
+        self._new_orders = {}
+        self._cancels = {}
+        self._replaces = {}
+        self._transact_time = _TransactTime()
+        self.latency = latency if latency is not None else LatencyMonitor()
+
+    def _session(self) -> fix.Session:
+        session = fix.Session.lookupSession(self.application.session_id) \
+            if self.application.session_id is not None else None
+        if session is None:
+            raise fix.SessionNotFound()
+        return session
+
+    def _new_order_template(self, symbol: str, side: str, ord_type: str) -> fix44.NewOrderSingle:
+        key = (symbol, side, ord_type)
+        message = self._new_orders.get(key)
+        if message is None:
+            message = self._new_orders[key] = fix44.NewOrderSingle()
+            message.setField(fix.HandlInst('1'))
+            message.setField(fix.Symbol(symbol))
+            message.setField(fix.Side(side))
+            message.setField(fix.OrdType(ord_type))
+        return message
+
+    def _cancel_template(self, symbol: str, side: str) -> fix44.OrderCancelRequest:
+        message = self._cancels.get((symbol, side))
+        if message is None:
+            message = self._cancels[(symbol, side)] = fix44.OrderCancelRequest()
+            message.setField(fix.Symbol(symbol))
+            message.setField(fix.Side(side))
+        return message
+
+    def _replace_template(self, symbol: str, side: str) -> fix44.OrderCancelReplaceRequest:
+        message = self._replaces.get((symbol, side))
+        if message is None:
+            message = self._replaces[(symbol, side)] = fix44.OrderCancelReplaceRequest()
+            message.setField(fix.HandlInst('1'))
+            message.setField(fix.Symbol(symbol))
+            message.setField(fix.Side(side))
+            message.setField(fix.OrdType(ORD_TYPE_LIMIT))
+        return message
+
+    def new_order_message(self, cl_ord_id: str, symbol: str, side: str, quantity: int, price: float = None,
+                          ord_type: str = ORD_TYPE_LIMIT) -> fix.Message:
+        message = self._new_order_template(symbol, side, ord_type)
+        message.setField(TAG_CL_ORD_ID, cl_ord_id)
+        message.setField(TAG_ORDER_QTY, str(quantity))
+        if price is not None:
+            message.setField(TAG_PRICE, repr(float(price)))
+        message.setField(TAG_TRANSACT_TIME, self._transact_time())
+        return message
+
+    def cancel_message(self, cl_ord_id: str, orig_cl_ord_id: str, symbol: str, side: str,
+                       quantity: int) -> fix.Message:
+        message = self._cancel_template(symbol, side)
+        message.setField(TAG_CL_ORD_ID, cl_ord_id)
+        message.setField(TAG_ORIG_CL_ORD_ID, orig_cl_ord_id)
+        message.setField(TAG_ORDER_QTY, str(quantity))
+        message.setField(TAG_TRANSACT_TIME, self._transact_time())
+        return message
+
+    def replace_message(self, cl_ord_id: str, orig_cl_ord_id: str, symbol: str, side: str, quantity: int,
+                        price: float) -> fix.Message:
+        message = self._replace_template(symbol, side)
+        message.setField(TAG_CL_ORD_ID, cl_ord_id)
+        message.setField(TAG_ORIG_CL_ORD_ID, orig_cl_ord_id)
+        message.setField(TAG_ORDER_QTY, str(quantity))
+        message.setField(TAG_PRICE, repr(float(price)))
+        message.setField(TAG_TRANSACT_TIME, self._transact_time())
+        return message
+
+    def _risk_price(self, price: Optional[float], ord_type: str) -> float:
+        return price if ord_type == ORD_TYPE_LIMIT and price else 0.0
+
+    def send_order(self, symbol: str, side: str, quantity: int, price: float = None,
+                   ord_type: str = ORD_TYPE_LIMIT, cl_ord_id: str = None, trigger_ns: int = 0) -> Optional[str]:
+        session = self._session()
+        if self.risk is not None:
+            self.last_risk_code = self.risk.check_order(self.risk.symbols.get_id(symbol), 1 if side == SIDE_BUY else -1,
+                                                        quantity, self._risk_price(price, ord_type))
+            if self.last_risk_code != RISK_ACCEPTED:
+                return None
+        cl_ord_id = cl_ord_id or self.next_id()
+        if self.store is not None:
+            self.store.track(cl_ord_id, symbol, side, quantity, price)
+        try:
+            session.send(self.new_order_message(cl_ord_id, symbol, side, quantity, price, ord_type))
+        except Exception:
+            self._unsent(cl_ord_id, [(symbol, side, quantity)])
+            raise
+        self.sent_messages += 1
+        if trigger_ns:
+            self.latency.record_value('tick_to_fix_send', time.monotonic_ns() - trigger_ns)
+        return cl_ord_id
+
+    def _unsent(self, cl_ord_id: Optional[str], orders: List[Tuple[str, str, int]]):
+        # Undoes what sending (symbol, side, quantity) orders committed before
+        # the session raised: the store entry of cl_ord_id and the quantity
+        # risk reserved for each order
+        if cl_ord_id is not None and self.store is not None:
+            self.store.untrack(cl_ord_id)
+        if self.risk is not None and orders:
+            get_id = self.risk.symbols.get_id
+            self.risk.release_batch(np.array([get_id(symbol) for symbol, _, _ in orders], dtype=np.int64),
+                                    np.array([1 if side == SIDE_BUY else -1 for _, side, _ in orders]),
+                                    np.array([quantity for _, _, quantity in orders], dtype=np.int64))
+
+    def _tracked_side(self, orig_cl_ord_id: str) -> str:
+        # Side (54) of an order the store tracks; cancels must repeat it
+        record = self.store.get(orig_cl_ord_id) if self.store is not None else None
+        if record is None:
+            raise ValueError(f"Side of {orig_cl_ord_id} is unknown: pass it or track the order")
+        return SIDE_BUY if record['side'] > 0 else SIDE_SELL
+
+    def cancel_order(self, orig_cl_ord_id: str, symbol: str, side: Optional[str], quantity: int,
+                     cl_ord_id: str = None) -> str:
+        # side None takes it from the tracked order
+        side = side or self._tracked_side(orig_cl_ord_id)
+        cl_ord_id = cl_ord_id or self.next_id()
+        self._session().send(self.cancel_message(cl_ord_id, orig_cl_ord_id, symbol, side, quantity))
+        self.sent_messages += 1
+        return cl_ord_id
+
+    def _check_replace(self, orig_cl_ord_id: str, symbol: str, side: str, quantity: int, price: float) -> int:
+        # Without a store the previous size is unknown; the replace is then
+        # treated as not increasing the order
+        previous = quantity
+        if self.store is not None:
+            record = self.store.get(orig_cl_ord_id)
+            if record is not None:
+                previous = int(record['quantity'])
+        return self.risk.check_replace(self.risk.symbols.get_id(symbol), 1 if side == SIDE_BUY else -1, quantity,
+                                       price, previous)
+
+    def replace_order(self, orig_cl_ord_id: str, symbol: str, side: str, quantity: int,
+                      price: float) -> Optional[str]:
+        session = self._session()
+        if self.risk is not None:
+            self.last_risk_code = self._check_replace(orig_cl_ord_id, symbol, side, quantity, price)
+            if self.last_risk_code != RISK_ACCEPTED:
+                return None
+        cl_ord_id = self.next_id()
+        session.send(self.replace_message(cl_ord_id, orig_cl_ord_id, symbol, side, quantity, price))
+        self.sent_messages += 1
+        return cl_ord_id
+
+    def send_orders(self, orders: Iterable[OrderTuple], ord_type: str = ORD_TYPE_LIMIT,
+                    trigger_ns: int = 0) -> List[Optional[str]]:
+        # Returns the ClOrdIDs in order, None for orders risk rejected
+        session = self._session()
+        orders = list(orders)
+        accepted = None
+        if self.risk is not None and orders:
+            symbols, sides, quantities, prices = zip(*orders)
+            get_id = self.risk.symbols.get_id
+            self.last_risk_codes = self.risk.check_batch(
+                [get_id(symbol) for symbol in symbols], [1 if side == SIDE_BUY else -1 for side in sides],
+                quantities, [self._risk_price(price, ord_type) for price in prices])
+            accepted = (self.last_risk_codes == RISK_ACCEPTED).tolist()
+        ids = []
+        store = self.store
+        for i, (symbol, side, quantity, price) in enumerate(orders):
+            if accepted is not None and not accepted[i]:
+                ids.append(None)
+                continue
+            cl_ord_id = self.next_id()
+            if store is not None:
+                store.track(cl_ord_id, symbol, side, quantity, price)
+            try:
+                session.send(self.new_order_message(cl_ord_id, symbol, side, quantity, price, ord_type))
+            except Exception:
+                # This order and the accepted ones after it never went out
+                self._unsent(cl_ord_id, [order[:3] for j, order in enumerate(orders[i:], i)
+                                         if accepted is None or accepted[j]])
+                self.sent_messages += sum(1 for sent in ids if sent is not None)
+                raise
+            ids.append(cl_ord_id)
+        self.sent_messages += len(ids) if accepted is None else sum(accepted)
+        if trigger_ns and ids:
+            # One sample per batch: when its last order went out
+            self.latency.record_value('tick_to_fix_send', time.monotonic_ns() - trigger_ns)
+        return ids
+
+    def cancel_orders(self, cancels: Iterable[CancelTuple]) -> List[str]:
+        session = self._session()
+        ids = []
+        for orig_cl_ord_id, symbol, side, quantity in cancels:
+            cl_ord_id = self.next_id()
+            session.send(self.cancel_message(cl_ord_id, orig_cl_ord_id, symbol, side, quantity))
+            ids.append(cl_ord_id)
+        self.sent_messages += len(ids)
+        return ids
+
+    def replace_orders(self, replaces: Iterable[ReplaceTuple]) -> List[Optional[str]]:
+        session = self._session()
+        ids = []
+        for orig_cl_ord_id, symbol, side, quantity, price in replaces:
+            if self.risk is not None and \
+                    self._check_replace(orig_cl_ord_id, symbol, side, quantity, price) != RISK_ACCEPTED:
+                ids.append(None)
+                continue
+            cl_ord_id = self.next_id()
+            session.send(self.replace_message(cl_ord_id, orig_cl_ord_id, symbol, side, quantity, price))
+            ids.append(cl_ord_id)
+            self.sent_messages += 1
+        return ids
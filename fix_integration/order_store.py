@@ -0,0 +1,306 @@
+# fix_integration/order_store.py
+
+import threading
+import time
+import numpy as np
+import quickfix as fix
+from typing import Callable, Dict, List, Set
+from data_acquisition.tick_buffer import SymbolRegistry, TickRingBuffer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_PENDING_NEW = 0
+STATUS_NEW = 1
+STATUS_PARTIALLY_FILLED = 2
+STATUS_FILLED = 3
+STATUS_CANCELED = 4
+STATUS_REJECTED = 5
+STATUS_EXPIRED = 6
+STATUS_PENDING_CANCEL = 7
+STATUS_PENDING_REPLACE = 8
+
+TERMINAL_STATUSES = (STATUS_FILLED, STATUS_CANCELED, STATUS_REJECTED, STATUS_EXPIRED)
+
+# FIX OrdStatus (39) -> store status. Replaced (5) is resolved from the fill
+# state of the replacing order.
+_FIX_STATUS = {
+    '0': STATUS_NEW, '1': STATUS_PARTIALLY_FILLED, '2': STATUS_FILLED, '4': STATUS_CANCELED,
+    '6': STATUS_PENDING_CANCEL, '8': STATUS_REJECTED, 'A': STATUS_PENDING_NEW, 'C': STATUS_EXPIRED,
+    'E': STATUS_PENDING_REPLACE,
+}
+
+CL_ORD_ID_LENGTH = 24
+
+# One slot per live order; terminal orders are copied to the archive and
+# their slot reused, so the live array only grows with the number of orders
+# working at once, not with the day's order count.
+ORDER_STATE_DTYPE = np.dtype([
+    ('cl_ord_id', f'S{CL_ORD_ID_LENGTH}'),       # current ClOrdID of the replace chain
+    ('orig_cl_ord_id', f'S{CL_ORD_ID_LENGTH}'),  # first ClOrdID of the chain
+    ('symbol_id', np.uint32),
+    ('side', np.int8),                          # 1 buy, -1 sell
+    ('status', np.uint8),
+    ('replaces', np.uint16),                    # accepted cancel/replaces
+    ('quantity', np.int64),
+    ('cum_qty', np.int64),
+    ('leaves_qty', np.int64),
+    ('price', np.float64),
+    ('avg_px', np.float64),
+    ('created_ns', np.int64),                   # time.monotonic_ns()
+    ('updated_ns', np.int64),
+])
+
+TAG_AVG_PX = 6
+TAG_CL_ORD_ID = 11
+TAG_CUM_QTY = 14
+TAG_LAST_PX = 31
+TAG_LAST_QTY = 32
+TAG_ORDER_QTY = 38
+TAG_ORD_STATUS = 39
+TAG_ORIG_CL_ORD_ID = 41
+TAG_PRICE = 44
+TAG_SIDE = 54
+TAG_SYMBOL = 55
+TAG_EXEC_TYPE = 150
+TAG_LEAVES_QTY = 151
+
+
+def _side(fix_side: str) -> int:
+    return 1 if fix_side == '1' else -1
+
+
+def _float_field(message: fix.Message, tag: int, default: float = 0.0) -> float:
+    try:
+        return float(message.getField(tag))
+    except fix.FieldNotFound:
+        return default
+
+
+# Order state keyed by ClOrdID, driven by ExecutionReport and
+# OrderCancelReject messages (register on_execution_report and
+# on_cancel_reject with FixSession's handler lists). Each report is one dict
+# lookup and a few field updates on a slot of a structured array. Open
+# orders are indexed per symbol, and per-symbol exposure is kept in arrays
+# indexed by SymbolRegistry id so strategies can read it on every tick:
+#
+#   position[s]   signed filled quantity
+#   open_buy[s]   working buy quantity (sum of leaves)
+#   open_sell[s]  working sell quantity
+#
+# Reports arrive on the QuickFIX thread; updates and index reads take a
+# lock, the exposure arrays are read without one.
+class OrderStore:
+    def __init__(self, symbols: SymbolRegistry = None, capacity: int = 1 << 12, archive_capacity: int = 1 << 20,
+                 max_symbols: int = 1024):
+        self.symbols = symbols or SymbolRegistry()
+        self.records = np.zeros(capacity, dtype=ORDER_STATE_DTYPE)
+        self._bind_columns()
+        self._slots: Dict[str, int] = {}         # every ClOrdID of a live chain -> slot
+        self._ids: List[str] = [''] * capacity   # slot -> current ClOrdID (records hold it truncated)
+        self._chains: Dict[int, List[str]] = {}  # slot -> earlier ClOrdIDs, for replaced orders
+        self._free = list(range(capacity - 1, -1, -1))
+        self._open_by_symbol: Dict[int, Set[int]] = {}
+        self.position = np.zeros(max_symbols, dtype=np.int64)
+        self.open_buy = np.zeros(max_symbols, dtype=np.int64)
+        self.open_sell = np.zeros(max_symbols, dtype=np.int64)
+        # Terminal orders, oldest overwritten first; archive_handlers see each
+        # archived record (e.g. to persist the day's orders)
+        self.archive = TickRingBuffer(archive_capacity, overwrite=True, dtype=ORDER_STATE_DTYPE)
+        self.archive_handlers: List[Callable[[np.ndarray], None]] = []
+        # Confirmed replaces as (symbol_id, side, previous_quantity, quantity)
+        self.replace_handlers: List[Callable[[int, int, int, int], None]] = []
+        self.reports = 0
+        self.unknown_reports = 0
+        self.cancel_rejects = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records) - len(self._free)
+
+    def _bind_columns(self):
+        # Column views: scalar access on a field array is several times
+        # cheaper than on a structured record
+        for name in ORDER_STATE_DTYPE.names:
+            setattr(self, f'_{name}', self.records[name])
+
+    def _ensure_symbol(self, symbol_id: int):
+        if symbol_id >= len(self.position):
+            size = max(symbol_id + 1, 2 * len(self.position))
+            for name in ('position', 'open_buy', 'open_sell'):
+                grown = np.zeros(size, dtype=np.int64)
+                grown[:len(getattr(self, name))] = getattr(self, name)
+                setattr(self, name, grown)
+
+    def _allocate(self) -> int:
+        if not self._free:
+            capacity = len(self.records)
+            self.records = np.concatenate([self.records, np.zeros(capacity, dtype=ORDER_STATE_DTYPE)])
+            self._bind_columns()
+            self._ids.extend([''] * capacity)
+            self._free = list(range(2 * capacity - 1, capacity - 1, -1))
+        return self._free.pop()
+
+    def _set_leaves(self, slot: int, leaves: int):
+        # Keeps open_buy/open_sell equal to the sum of leaves of open orders
+        delta = leaves - int(self._leaves_qty[slot])
+        if delta:
+            if self._side[slot] > 0:
+                self.open_buy[self._symbol_id[slot]] += delta
+            else:
+                self.open_sell[self._symbol_id[slot]] += delta
+            self._leaves_qty[slot] = leaves
+
+    def _open(self, cl_ord_id: str, symbol: str, side: int, quantity: int, price: float,
+              status: int) -> int:
+        symbol_id = self.symbols.get_id(symbol)
+        self._ensure_symbol(symbol_id)
+        slot = self._allocate()
+        now = time.monotonic_ns()
+        self.records[slot] = (cl_ord_id, cl_ord_id, symbol_id, side, status, 0, quantity, 0, 0, price, 0.0,
+                              now, now)
+        self._set_leaves(slot, quantity)
+        self._slots[cl_ord_id] = slot
+        self._ids[slot] = cl_ord_id
+        self._open_by_symbol.setdefault(symbol_id, set()).add(slot)
+        return slot
+
+    def _close(self, slot: int):
+        self._set_leaves(slot, 0)
+        self._open_by_symbol[int(self._symbol_id[slot])].discard(slot)
+        self._slots.pop(self._ids[slot], None)
+        for cl_ord_id in self._chains.pop(slot, ()):
+            self._slots.pop(cl_ord_id, None)
+        archived = self.records[slot:slot + 1]
+        self.archive.extend(archived)
+        if self.archive_handlers:
+            archived = archived.copy()
+            for handler in self.archive_handlers:
+                handler(archived)
+        self._free.append(slot)
+
+    def track(self, cl_ord_id: str, symbol: str, side: str, quantity: int, price: float = 0.0):
+        # Registers an order as it is sent (PendingNew), so its quantity
+        # counts as open exposure before the venue acknowledges it
+        with self._lock:
+            if cl_ord_id not in self._slots:
+                self._open(cl_ord_id, symbol, _side(side), quantity, price or 0.0, STATUS_PENDING_NEW)
+
+    def untrack(self, cl_ord_id: str):
+        # Forgets a tracked order that never went out (its send failed). It
+        # is not archived, so archive handlers don't see it.
+        with self._lock:
+            slot = self._slots.pop(cl_ord_id, None)
+            if slot is None:
+                return
+            self._set_leaves(slot, 0)
+            self._open_by_symbol[int(self._symbol_id[slot])].discard(slot)
+            self._free.append(slot)
+
+    def on_execution_report(self, message: fix.Message):
+        cl_ord_id = message.getField(TAG_CL_ORD_ID)
+        exec_type = message.getField(TAG_EXEC_TYPE)
+        with self._lock:
+            self.reports += 1
+            slot = self._slots.get(cl_ord_id)
+            if slot is None and message.isSetField(TAG_ORIG_CL_ORD_ID):
+                slot = self._slots.get(message.getField(TAG_ORIG_CL_ORD_ID))
+                if slot is not None and exec_type == fix.ExecType_REPLACED:
+                    # The replacing order continues the chain in the same slot
+                    self._chains.setdefault(slot, []).append(self._ids[slot])
+                    self._ids[slot] = cl_ord_id
+                    self._cl_ord_id[slot] = cl_ord_id
+                    self._replaces[slot] += 1
+                    self._slots[cl_ord_id] = slot
+            if slot is None:
+                if exec_type in (fix.ExecType_CANCELED, fix.ExecType_EXPIRED):
+                    self.unknown_reports += 1
+                    return
+                # An order this process didn't send or track (e.g. after a
+                # restart); adopt it from the report
+                slot = self._open(cl_ord_id, message.getField(TAG_SYMBOL), _side(message.getField(TAG_SIDE)),
+                                  int(_float_field(message, TAG_ORDER_QTY)), _float_field(message, TAG_PRICE),
+                                  STATUS_PENDING_NEW)
+            self._apply(slot, message, exec_type)
+
+    def _apply(self, slot: int, message: fix.Message, exec_type: str):
+        ord_status = message.getField(TAG_ORD_STATUS)
+        previous_cum = int(self._cum_qty[slot])
+        cum_qty = int(_float_field(message, TAG_CUM_QTY, previous_cum))
+        if exec_type == fix.ExecType_TRADE or exec_type == fix.ExecType_PARTIAL_FILL \
+                or exec_type == fix.ExecType_FILL:
+            last_qty = int(_float_field(message, TAG_LAST_QTY, cum_qty - previous_cum))
+            self.position[self._symbol_id[slot]] += int(self._side[slot]) * last_qty
+        elif exec_type == fix.ExecType_REPLACED:
+            previous_qty = int(self._quantity[slot])
+            self._quantity[slot] = int(_float_field(message, TAG_ORDER_QTY, previous_qty))
+            self._price[slot] = _float_field(message, TAG_PRICE, self._price[slot])
+            for handler in self.replace_handlers:
+                handler(int(self._symbol_id[slot]), int(self._side[slot]), previous_qty, int(self._quantity[slot]))
+        self._cum_qty[slot] = cum_qty
+        self._avg_px[slot] = _float_field(message, TAG_AVG_PX, self._avg_px[slot])
+        self._updated_ns[slot] = time.monotonic_ns()
+        if ord_status == fix.OrdStatus_REPLACED:
+            status = STATUS_PARTIALLY_FILLED if cum_qty else STATUS_NEW
+        else:
+            status = _FIX_STATUS.get(ord_status, int(self._status[slot]))
+        self._status[slot] = status
+        if status in TERMINAL_STATUSES:
+            self._close(slot)
+        else:
+            self._set_leaves(slot, int(_float_field(message, TAG_LEAVES_QTY, self._quantity[slot] - cum_qty)))
+
+    def on_cancel_reject(self, message: fix.Message):
+        # The order keeps working; a pending cancel/replace falls back to the
+        # order's fill state
+        try:
+            orig_cl_ord_id = message.getField(TAG_ORIG_CL_ORD_ID)
+        except fix.FieldNotFound:
+            return
+        with self._lock:
+            self.cancel_rejects += 1
+            slot = self._slots.get(orig_cl_ord_id)
+            if slot is None:
+                return
+            if self._status[slot] in (STATUS_PENDING_CANCEL, STATUS_PENDING_REPLACE):
+                self._status[slot] = STATUS_PARTIALLY_FILLED if self._cum_qty[slot] else STATUS_NEW
+            self._updated_ns[slot] = time.monotonic_ns()
+
+    def attach(self, application):
+        # Subscribes to a FixSession's reports
+        application.execution_report_handlers.append(self.on_execution_report)
+        application.cancel_reject_handlers.append(self.on_cancel_reject)
+
+    def get(self, cl_ord_id: str) -> np.void:
+        # Copy of the live record for any ClOrdID of its chain, or None
+        with self._lock:
+            slot = self._slots.get(cl_ord_id)
+            return None if slot is None else self.records[slot].copy()
+
+    def is_open(self, cl_ord_id: str) -> bool:
+        return cl_ord_id in self._slots
+
+    def open_orders(self, symbol: str = None) -> np.ndarray:
+        # Copies of the open records, for one symbol or all of them
+        with self._lock:
+            if symbol is None:
+                slots = [slot for open_slots in self._open_by_symbol.values() for slot in open_slots]
+            else:
+                slots = list(self._open_by_symbol.get(self.symbols.ids.get(symbol, -1), ()))
+            return self.records[np.sort(np.asarray(slots, dtype=np.int64))]
+
+    def exposure(self, symbol_id: int) -> tuple:
+        # (position, open_buy, open_sell) for a SymbolRegistry id; lock-free
+        if symbol_id >= len(self.position):
+            return 0, 0, 0
+        return int(self.position[symbol_id]), int(self.open_buy[symbol_id]), int(self.open_sell[symbol_id])
+
+    def worst_case_position(self) -> np.ndarray:
+        # Per-symbol position if every working order on one side filled:
+        # the larger magnitude of position + open_buy and position - open_sell
+        long = self.position + self.open_buy
+        short = self.position - self.open_sell
+        return np.where(np.abs(long) >= np.abs(short), long, short)
+
+    def archived(self) -> np.ndarray:
+        return self.archive.to_array()
@@ -5,15 +5,78 @@
 #include <mutex>
 #include <condition_variable>
 #include <string>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+
+// Fixed-layout order record, identical to ORDER_DTYPE in python_bindings.py
+struct OrderRecord {
+    uint64_t client_order_id;
+    uint32_t symbol_id;
+    int8_t side;            // 1 buy, -1 sell
+    uint8_t order_type;     // 1 market, 2 limit
+    uint16_t flags;
+    int64_t quantity;
+    int64_t price_ticks;    // price * PRICE_SCALE
+    int64_t created_ns;     // CLOCK_MONOTONIC
+    int64_t enqueued_ns;    // CLOCK_MONOTONIC, when written into the ring
+    int64_t trigger_ns;     // CLOCK_MONOTONIC receive time of the triggering tick, 0 if none
+    int64_t reserved;
+};
+static_assert(sizeof(OrderRecord) == 64, "OrderRecord must match ORDER_DTYPE");
+
+constexpr uint8_t COMPLETION_ACCEPTED = 1;
+constexpr uint8_t COMPLETION_REJECTED = 2;
+
+// Per-order completion published back to Python, identical to
+// COMPLETION_DTYPE in python_bindings.py. All timestamps are CLOCK_MONOTONIC.
+struct CompletionRecord {
+    uint64_t client_order_id;
+    uint32_t symbol_id;
+    uint8_t status;         // COMPLETION_ACCEPTED / COMPLETION_REJECTED
+    int8_t side;
+    uint16_t flags;
+    int64_t trigger_ns;
+    int64_t created_ns;
+    int64_t enqueued_ns;
+    int64_t dequeued_ns;
+    int64_t done_ns;
+    int64_t quantity;
+};
+static_assert(sizeof(CompletionRecord) == 64, "CompletionRecord must match COMPLETION_DTYPE");
+
+// Header of the shared-memory rings created by utils/shm_ring.py. head is
+// stored only by the producer, tail only by the consumer; each has its own
+// cache line. Python produces the order ring and consumes the completion
+// ring.
+struct RingHeader {
+    uint64_t magic;
+    uint64_t capacity;
+    uint64_t record_size;
+    uint64_t pad0[5];
+    uint64_t head;
+    uint64_t pad1[7];
+    uint64_t tail;
+    uint64_t pad2[7];
+};
+static_assert(sizeof(RingHeader) == 192, "RingHeader must match RING_HEADER_SIZE");
+
+constexpr uint64_t RING_MAGIC = 0x31474E4952544648ULL;  // "HFTRING1"
+
+static inline int64_t monotonic_ns() {
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
 
 class OrderExecutor {
 public:
-    OrderExecutor() 
+    OrderExecutor()
         : io_service_(), work_(io_service_), executor_thread_([this]() { io_service_.run(); }) {
         std::cout << "OrderExecutor initialized." << std::endl;
     }
 
     ~OrderExecutor() {
+        detach_ring();
         io_service_.stop();
         if (executor_thread_.joinable()) {
             executor_thread_.join();
@@ -33,10 +96,143 @@ public:
         }
     }
 
+    // completions may be null, in which case no completion records are published
+    bool attach_ring(void* base, void* completions, int idle_spins, int idle_sleep_us) {
+        if (!valid_ring(base, sizeof(OrderRecord))) {
+            std::cerr << "OrderExecutor: shared memory is not an order ring." << std::endl;
+            return false;
+        }
+        if (completions != nullptr && !valid_ring(completions, sizeof(CompletionRecord))) {
+            std::cerr << "OrderExecutor: shared memory is not a completion ring." << std::endl;
+            return false;
+        }
+        detach_ring();
+        ring_ = static_cast<RingHeader*>(base);
+        records_ = reinterpret_cast<OrderRecord*>(static_cast<char*>(base) + sizeof(RingHeader));
+        if (completions != nullptr) {
+            completion_ring_ = static_cast<RingHeader*>(completions);
+            completion_records_ = reinterpret_cast<CompletionRecord*>(
+                static_cast<char*>(completions) + sizeof(RingHeader));
+            completion_head_ = __atomic_load_n(&completion_ring_->head, __ATOMIC_RELAXED);
+        }
+        idle_spins_ = idle_spins;
+        idle_sleep_us_ = idle_sleep_us;
+        polling_.store(true, std::memory_order_relaxed);
+        poll_thread_ = std::thread([this]() { poll(); });
+        return true;
+    }
+
+    void detach_ring() {
+        polling_.store(false, std::memory_order_relaxed);
+        if (poll_thread_.joinable()) {
+            poll_thread_.join();
+        }
+        ring_ = nullptr;
+        records_ = nullptr;
+        completion_ring_ = nullptr;
+        completion_records_ = nullptr;
+    }
+
+    void ring_stats(uint64_t* processed, int64_t* total_latency_ns, int64_t* max_latency_ns,
+                    uint64_t* completions_dropped) const {
+        *processed = processed_.load(std::memory_order_relaxed);
+        *total_latency_ns = total_latency_ns_.load(std::memory_order_relaxed);
+        *max_latency_ns = max_latency_ns_.load(std::memory_order_relaxed);
+        *completions_dropped = completions_dropped_.load(std::memory_order_relaxed);
+    }
+
 private:
+    static bool valid_ring(void* base, uint64_t record_size) {
+        const auto* header = static_cast<const RingHeader*>(base);
+        return header->magic == RING_MAGIC && header->record_size == record_size
+            && header->capacity != 0 && (header->capacity & (header->capacity - 1)) == 0;
+    }
+
+    void poll() {
+        const uint64_t mask = ring_->capacity - 1;
+        uint64_t tail = __atomic_load_n(&ring_->tail, __ATOMIC_RELAXED);
+        int idle = 0;
+        while (polling_.load(std::memory_order_relaxed)) {
+            // Acquire pairs with the producer's store of head after the records
+            const uint64_t head = __atomic_load_n(&ring_->head, __ATOMIC_ACQUIRE);
+            if (head == tail) {
+                if (++idle <= idle_spins_) {
+                    std::this_thread::yield();
+                } else {
+                    std::this_thread::sleep_for(std::chrono::microseconds(idle_sleep_us_));
+                }
+                continue;
+            }
+            idle = 0;
+            const int64_t now = monotonic_ns();
+            for (; tail != head; ++tail) {
+                const OrderRecord& order = records_[tail & mask];
+                const uint8_t status = handle_order(order, now);
+                if (completion_ring_ != nullptr) {
+                    complete(order, status, now);
+                }
+            }
+            // Release the slots only after the records have been read
+            __atomic_store_n(&ring_->tail, tail, __ATOMIC_RELEASE);
+            if (completion_ring_ != nullptr) {
+                // Publish the batch's completions with one release store
+                __atomic_store_n(&completion_ring_->head, completion_head_, __ATOMIC_RELEASE);
+            }
+        }
+    }
+
+    uint8_t handle_order(const OrderRecord& order, int64_t dequeued_ns) {
+        const int64_t latency = dequeued_ns - order.enqueued_ns;
+        processed_.fetch_add(1, std::memory_order_relaxed);
+        total_latency_ns_.fetch_add(latency, std::memory_order_relaxed);
+        if (latency > max_latency_ns_.load(std::memory_order_relaxed)) {
+            max_latency_ns_.store(latency, std::memory_order_relaxed);
+        }
+        const bool valid = order.quantity > 0 && (order.side == 1 || order.side == -1)
+            && (order.order_type == 1 || (order.order_type == 2 && order.price_ticks > 0));
+        return valid ? COMPLETION_ACCEPTED : COMPLETION_REJECTED;
+    }
+
+    void complete(const OrderRecord& order, uint8_t status, int64_t dequeued_ns) {
+        // Never block execution on a slow consumer: a full completion ring
+        // drops the record and counts it
+        const uint64_t capacity = completion_ring_->capacity;
+        if (completion_head_ - __atomic_load_n(&completion_ring_->tail, __ATOMIC_ACQUIRE) >= capacity) {
+            completions_dropped_.fetch_add(1, std::memory_order_relaxed);
+            return;
+        }
+        CompletionRecord& record = completion_records_[completion_head_ & (capacity - 1)];
+        record.client_order_id = order.client_order_id;
+        record.symbol_id = order.symbol_id;
+        record.status = status;
+        record.side = order.side;
+        record.flags = order.flags;
+        record.trigger_ns = order.trigger_ns;
+        record.created_ns = order.created_ns;
+        record.enqueued_ns = order.enqueued_ns;
+        record.dequeued_ns = dequeued_ns;
+        record.done_ns = monotonic_ns();
+        record.quantity = order.quantity;
+        ++completion_head_;
+    }
+
     boost::asio::io_service io_service_;
     boost::asio::io_service::work work_;
     std::thread executor_thread_;
+
+    RingHeader* ring_ = nullptr;
+    OrderRecord* records_ = nullptr;
+    RingHeader* completion_ring_ = nullptr;
+    CompletionRecord* completion_records_ = nullptr;
+    uint64_t completion_head_ = 0;
+    std::thread poll_thread_;
+    std::atomic<bool> polling_{false};
+    int idle_spins_ = 1000;
+    int idle_sleep_us_ = 50;
+    std::atomic<uint64_t> processed_{0};
+    std::atomic<int64_t> total_latency_ns_{0};
+    std::atomic<int64_t> max_latency_ns_{0};
+    std::atomic<uint64_t> completions_dropped_{0};
 };
 
 extern "C" {
@@ -49,5 +245,14 @@ extern "C" {
         }
         executor->execute_bulk_orders(bulk_orders);
     }
+    int OrderExecutor_attach_ring(OrderExecutor* executor, void* base, void* completions, int idle_spins,
+                                  int idle_sleep_us) {
+        return executor->attach_ring(base, completions, idle_spins, idle_sleep_us) ? 1 : 0;
+    }
+    void OrderExecutor_detach_ring(OrderExecutor* executor) { executor->detach_ring(); }
+    void OrderExecutor_ring_stats(OrderExecutor* executor, uint64_t* processed, int64_t* total_latency_ns,
+                                  int64_t* max_latency_ns, uint64_t* completions_dropped) {
+        executor->ring_stats(processed, total_latency_ns, max_latency_ns, completions_dropped);
+    }
     void OrderExecutor_delete(OrderExecutor* executor) { delete executor; }
 }
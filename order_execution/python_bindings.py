@@ -1,15 +1,95 @@
 # order_execution/python_bindings.py
 
+import asyncio
 import ctypes
+import itertools
 import os
 import sys
+import time
+import numpy as np
 from typing import List
-from utils.logger import get_logger
+from data_acquisition.tick_buffer import SymbolRegistry
+from utils.shm_ring import SharedRing
+from utils.latency import LatencyMonitor
+from risk.risk_engine import RiskEngine, RISK_ACCEPTED, RISK_QUANTITY, RISK_RATE
+from utils.logger import LogThrottle, get_logger
 
 logger = get_logger(__name__)
+# Risk rejects can come in floods (e.g. with the kill switch engaged)
+_reject_log = LogThrottle(logger, interval=1.0)
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+ORDER_TYPE_MARKET = 1
+ORDER_TYPE_LIMIT = 2
+PRICE_SCALE = 10_000  # integer price ticks per currency unit
+
+# Binary order ABI, identical to OrderRecord in order_executor.cpp
+ORDER_DTYPE = np.dtype([
+    ('client_order_id', np.uint64),
+    ('symbol_id', np.uint32),
+    ('side', np.int8),
+    ('order_type', np.uint8),
+    ('flags', np.uint16),
+    ('quantity', np.int64),
+    ('price_ticks', np.int64),
+    ('created_ns', np.int64),    # time.monotonic_ns() (CLOCK_MONOTONIC)
+    ('enqueued_ns', np.int64),   # stamped when written into the ring
+    ('trigger_ns', np.int64),    # receive time of the triggering tick, 0 if none
+    ('reserved', np.int64),
+])
+assert ORDER_DTYPE.itemsize == 64
+
+COMPLETION_ACCEPTED = 1
+COMPLETION_REJECTED = 2
+
+# Per-order completion published by the executor, identical to
+# CompletionRecord in order_executor.cpp. All timestamps are CLOCK_MONOTONIC.
+COMPLETION_DTYPE = np.dtype([
+    ('client_order_id', np.uint64),
+    ('symbol_id', np.uint32),
+    ('status', np.uint8),
+    ('side', np.int8),
+    ('flags', np.uint16),
+    ('trigger_ns', np.int64),
+    ('created_ns', np.int64),
+    ('enqueued_ns', np.int64),   # Python submit
+    ('dequeued_ns', np.int64),   # C++ poll thread picked the order up
+    ('done_ns', np.int64),       # C++ finished handling it
+    ('quantity', np.int64),
+])
+assert COMPLETION_DTYPE.itemsize == 64
+
+
+def price_to_ticks(price) -> np.ndarray:
+    return np.rint(np.asarray(price, dtype=np.float64) * PRICE_SCALE).astype(np.int64)
+
+
+def ticks_to_price(ticks) -> np.ndarray:
+    return np.asarray(ticks, dtype=np.float64) / PRICE_SCALE
+
+
+def parse_legacy_order(order: str):
+    # "BUY AAPL 100 @ 150.00" (limit) or "SELL AAPL 100" (market) ->
+    # (symbol, side, quantity, price), or None if malformed
+    parts = order.split()
+    try:
+        side = {'BUY': SIDE_BUY, 'SELL': SIDE_SELL}[parts[0].upper()]
+        if len(parts) == 3:
+            price = 0.0
+        elif len(parts) == 5 and parts[3] == '@':
+            price = float(parts[4])
+        else:
+            return None
+        return parts[1], side, int(parts[2]), price
+    except (KeyError, IndexError, ValueError):
+        return None
+
 
 class OrderExecutor:
-    def __init__(self, library_path: str = None):
+    def __init__(self, library_path: str = None, ring_capacity: int = 1 << 16,
+                 idle_spins: int = 1000, idle_sleep_us: int = 50, completion_capacity: int = 1 << 16,
+                 latency: LatencyMonitor = None, risk: RiskEngine = None):
         if library_path is None:
             library_path = os.path.join(os.path.dirname(__file__), 'cpp', 'liborder_executor.so')
             if sys.platform == 'darwin':
@@ -22,23 +102,243 @@ class OrderExecutor:
         self.lib.OrderExecutor_new.restype = ctypes.c_void_p
         self.lib.OrderExecutor_execute.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
         self.lib.OrderExecutor_execute_bulk.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_char_p), ctypes.c_int]
+        self.lib.OrderExecutor_attach_ring.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+                                                       ctypes.c_int, ctypes.c_int]
+        self.lib.OrderExecutor_attach_ring.restype = ctypes.c_int
+        self.lib.OrderExecutor_detach_ring.argtypes = [ctypes.c_void_p]
+        self.lib.OrderExecutor_ring_stats.argtypes = [ctypes.c_void_p] + [ctypes.POINTER(ctypes.c_uint64)] + \
+            [ctypes.POINTER(ctypes.c_int64)] * 2 + [ctypes.POINTER(ctypes.c_uint64)]
         self.lib.OrderExecutor_delete.argtypes = [ctypes.c_void_p]
         self.executor = self.lib.OrderExecutor_new()
+
+        # Orders go to the executor's polling thread through a shared-memory
+        # ring: submitting is a NumPy copy and a head store, no ctypes call
+        self.ring = SharedRing.create(ring_capacity, ORDER_DTYPE)
+        # ...and report back through a second ring that the polling thread
+        # produces and poll_completions() drains
+        self.completions = SharedRing.create(completion_capacity, COMPLETION_DTYPE)
+        if not self.lib.OrderExecutor_attach_ring(self.executor, self.ring.address, self.completions.address,
+                                                  idle_spins, idle_sleep_us):
+            raise RuntimeError("Order executor rejected the order ring")
+        self.latency = latency if latency is not None else LatencyMonitor()
+        # Pre-trade gate for every submission path; symbol ids are the risk
+        # engine's SymbolRegistry ids. Rejected codes are kept for callers.
+        self.risk = risk
+        # Symbol ids for orders given by name (execute_bulk_orders)
+        self.symbols = risk.symbols if risk is not None else SymbolRegistry()
+        self.last_risk_code = RISK_ACCEPTED
+        self.last_risk_codes = None
+        self.completion_handlers = []
+        self._client_ids = itertools.count(1)
+        self._single = np.zeros(1, dtype=ORDER_DTYPE)
         logger.info("OrderExecutor Python binding initialized.")
 
+    def _check_legacy(self, orders: List[str]) -> np.ndarray:
+        # Malformed orders are rejected as RISK_QUANTITY without touching the
+        # registry; only parsed symbols get ids
+        parsed = [parse_legacy_order(order) for order in orders]
+        valid = np.array([p is not None for p in parsed], dtype=bool)
+        codes = np.full(len(orders), RISK_QUANTITY, dtype=np.uint8)
+        if valid.any():
+            fields = [p for p in parsed if p is not None]
+            get_id = self.risk.symbols.get_id
+            codes[valid] = self.risk.check_batch(np.array([get_id(f[0]) for f in fields], dtype=np.int64),
+                                                 np.array([f[1] for f in fields]), np.array([f[2] for f in fields]),
+                                                 np.array([f[3] for f in fields], dtype=np.float64))
+        self.last_risk_codes = codes
+        return codes
+
     def execute_order(self, order: str):
+        if self.risk is not None and self._check_legacy([order])[0] != RISK_ACCEPTED:
+            _reject_log.warning("Order rejected by risk (%d): %s", int(self.last_risk_codes[0]), order)
+            return
         self.lib.OrderExecutor_execute(self.executor, order.encode('utf-8'))
-        logger.debug(f"Order executed: {order}")
+        logger.debug("Order executed: %s", order)
+
+    def execute_bulk_orders(self, orders: List[str], timeout: float = 1.0) -> int:
+        # Legacy order strings, parsed and sent as one batch through the ring
+        # (submit_orders), waiting for room if it is full. Malformed orders
+        # are skipped and, with a risk engine, coded RISK_QUANTITY in
+        # last_risk_codes, which lines up with `orders`. If the ring frees
+        # no room for `timeout` seconds (polling thread stalled, completions
+        # not drained) or the executor is closed, the rest are not sent and
+        # are coded RISK_RATE. Returns how many were sent.
+        parsed = [parse_legacy_order(order) for order in orders]
+        valid = np.flatnonzero([p is not None for p in parsed])
+        if len(valid) < len(orders):
+            _reject_log.warning("%d of %d bulk orders are malformed.", len(orders) - len(valid), len(orders))
+        codes = np.full(len(orders), RISK_QUANTITY, dtype=np.uint8)
+        records = self.new_orders(len(valid))
+        if len(valid):
+            fields = [parsed[i] for i in valid]
+            get_id = self.symbols.get_id
+            records['symbol_id'] = [get_id(f[0]) for f in fields]
+            records['side'] = [f[1] for f in fields]
+            records['quantity'] = [f[2] for f in fields]
+            prices = np.array([f[3] for f in fields], dtype=np.float64)
+            records['order_type'] = np.where(prices > 0, ORDER_TYPE_LIMIT, ORDER_TYPE_MARKET)
+            records['price_ticks'] = price_to_ticks(prices)
+            records['created_ns'] = time.monotonic_ns()
+        offset = 0
+        deadline = time.monotonic() + timeout
+        while offset < len(records) and self.ring is not None:
+            # No more than fits, so no order is risk checked twice
+            room = self._room()
+            if not room:
+                # The polling thread frees slots as it drains
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0)
+                continue
+            consumed = self.submit_orders(records[offset:offset + room])
+            if self.risk is not None:
+                codes[valid[offset:offset + consumed]] = self.last_risk_codes[:consumed]
+            offset += consumed
+            deadline = time.monotonic() + timeout
+        if offset < len(records):
+            logger.warning("Order ring stalled: %d of %d bulk orders not sent.", len(records) - offset, len(orders))
+            codes[valid[offset:]] = RISK_RATE
+        if self.risk is None:
+            return offset
+        self.last_risk_codes = codes
+        sent = int((codes == RISK_ACCEPTED).sum())
+        if sent < offset:
+            _reject_log.warning("%d of %d bulk orders rejected by risk.", offset - sent, len(orders))
+        return sent
+
+    def new_orders(self, count: int) -> np.ndarray:
+        orders = np.zeros(count, dtype=ORDER_DTYPE)
+        orders['client_order_id'] = [next(self._client_ids) for _ in range(count)]
+        return orders
+
+    def _room(self) -> int:
+        # Orders that can be pushed now. With a risk engine, no more may be
+        # in flight than the completion ring holds: the polling thread drops
+        # completions it has no room for rather than wait, and a dropped
+        # reject would keep its risk reservation for good.
+        room = self.ring.free
+        if self.risk is not None:
+            room = min(room, self.completions.capacity - (self.ring.head - self.completions.tail))
+        return room
+
+    def submit_order(self, symbol_id: int, side: int, quantity: int, price: float = 0.0,
+                     order_type: int = ORDER_TYPE_LIMIT, trigger_ns: int = 0) -> int:
+        # Returns the client order id, or 0 if the ring is full or risk
+        # rejected the order (last_risk_code says which). trigger_ns is the
+        # time.monotonic_ns() at which the tick that caused the order was
+        # received (e.g. DataStream.last_receive_ns); it feeds tick-to-trade.
+        if self.risk is not None:
+            if not self._room():
+                self.last_risk_code = RISK_ACCEPTED
+                return 0
+            self.last_risk_code = self.risk.check_order(symbol_id, side, quantity,
+                                                        price if order_type == ORDER_TYPE_LIMIT else 0.0)
+            if self.last_risk_code != RISK_ACCEPTED:
+                return 0
+        client_order_id = next(self._client_ids)
+        now = time.monotonic_ns()
+        self._single[0] = (client_order_id, symbol_id, side, order_type, 0, quantity,
+                           round(price * PRICE_SCALE), now, now, trigger_ns, 0)
+        if self.ring.push(self._single):
+            return client_order_id
+        if self.risk is not None:
+            self.risk.release(symbol_id, side, quantity)
+        return 0
+
+    def submit_orders(self, orders: np.ndarray) -> int:
+        # Bulk submit: stamps enqueued_ns on `orders` in place and copies them
+        # into the ring in one slice copy (two when wrapping). Returns how
+        # many fit; the rest were not sent. Set orders['trigger_ns'] first to
+        # measure tick-to-trade.
+        #
+        # With a risk engine the orders are checked as a batch first; the
+        # return value then counts orders consumed (sent or rejected, codes
+        # in last_risk_codes), so callers can keep slicing off the front.
+        # Completions must be drained (poll_completions) for room to free up.
+        if self.risk is None:
+            orders['enqueued_ns'] = time.monotonic_ns()
+            return self.ring.push(orders)
+        prices = np.where(orders['order_type'] == ORDER_TYPE_LIMIT, ticks_to_price(orders['price_ticks']), 0.0)
+        codes = self.risk.check_batch(orders['symbol_id'], orders['side'], orders['quantity'], prices)
+        self.last_risk_codes = codes
+        accepted = np.flatnonzero(codes == RISK_ACCEPTED)
+        orders['enqueued_ns'] = time.monotonic_ns()
+        written = self.ring.push(orders[accepted[:self._room()]])
+        if written == len(accepted):
+            return len(orders)
+        unsent = orders[accepted[written:]]
+        self.risk.release_batch(unsent['symbol_id'], unsent['side'], unsent['quantity'])
+        return int(accepted[written])
+
+    def poll_completions(self, max_records: int = None) -> np.ndarray:
+        # Drains completion records (a copy, in order), records their
+        # latencies and hands them to completion_handlers
+        parts = []
+        remaining = max_records
+        while remaining is None or remaining > 0:
+            records = self.completions.pop(remaining)
+            if not len(records):
+                break
+            parts.append(records)
+            if remaining is not None:
+                remaining -= len(records)
+        if not parts:
+            return np.zeros(0, dtype=COMPLETION_DTYPE)
+        completions = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        self.record_latencies(completions)
+        if self.risk is not None:
+            rejected = completions[completions['status'] == COMPLETION_REJECTED]
+            if len(rejected):
+                self.risk.release_batch(rejected['symbol_id'], rejected['side'], rejected['quantity'])
+        for handler in self.completion_handlers:
+            handler(completions)
+        return completions
+
+    def record_latencies(self, completions: np.ndarray):
+        done = completions['done_ns']
+        self.latency.record('submit_to_ack', done - completions['enqueued_ns'])
+        self.latency.record('handling', done - completions['dequeued_ns'])
+        triggered = completions['trigger_ns'] > 0
+        if triggered.any():
+            self.latency.record('tick_to_trade', done[triggered] - completions['trigger_ns'][triggered])
+
+    def latency_summary(self) -> dict:
+        # Rolling percentiles in microseconds per stage, see utils.latency
+        return self.latency.summary()
+
+    async def run_completion_polling(self, interval: float = 0.001):
+        while self.completions is not None:
+            self.poll_completions()
+            await asyncio.sleep(interval)
+
+    def ring_stats(self) -> dict:
+        processed = ctypes.c_uint64()
+        total_latency = ctypes.c_int64()
+        max_latency = ctypes.c_int64()
+        dropped = ctypes.c_uint64()
+        self.lib.OrderExecutor_ring_stats(self.executor, ctypes.byref(processed), ctypes.byref(total_latency),
+                                          ctypes.byref(max_latency), ctypes.byref(dropped))
+        return {
+            'submitted': self.ring.head,
+            'processed': processed.value,
+            'pending': len(self.ring),
+            'mean_dequeue_latency_us': total_latency.value / max(processed.value, 1) / 1e3,
+            'max_dequeue_latency_us': max_latency.value / 1e3,
+            'completions_pending': len(self.completions),
+            'completions_dropped': dropped.value,
+        }
 
-    def execute_bulk_orders(self, orders: List[str]):
-        c_orders = (ctypes.c_char_p * len(orders))()
-        for i, order in enumerate(orders):
-            c_orders[i] = order.encode('utf-8')
-        self.lib.OrderExecutor_execute_bulk(self.executor, c_orders, len(orders))
-        logger.debug(f"Bulk orders executed: {orders}")
+    def close(self):
+        if self.ring is None:
+            return
+        self.lib.OrderExecutor_detach_ring(self.executor)
+        self.ring.unlink()
+        self.completions.unlink()
+        self.ring = self.completions = None
 
     def __del__(self):
         try:
+            self.close()
             self.lib.OrderExecutor_delete(self.executor)
             logger.info("OrderExecutor Python binding terminated.")
         except Exception as e:
@@ -0,0 +1,58 @@
+# predictive_modeling/dataset.py
+
+import numpy as np
+import tensorflow as tf
+from typing import Iterator, Tuple
+from predictive_modeling.utils import PRICE_COLUMN
+
+
+# Batches of (window, next price) built on demand from a 2-D feature array,
+# typically np.load(path, mmap_mode='r') over a day of ticks. Only the rows a
+# batch needs are gathered and normalized with the given stats; sample i is
+# window features[i:i + sequence_length] with target features[i +
+# sequence_length, target_column], for i in [start, end).
+class WindowGenerator:
+    def __init__(self, features: np.ndarray, sequence_length: int, mean: np.ndarray, std: np.ndarray,
+                 start: int = 0, end: int = None, batch_size: int = 64, target_column: int = PRICE_COLUMN,
+                 shuffle: bool = False, seed: int = None):
+        self.features = features
+        self.sequence_length = sequence_length
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.start = start
+        self.end = len(features) - sequence_length if end is None else end
+        self.batch_size = batch_size
+        self.target_column = target_column
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self._offsets = np.arange(sequence_length)
+
+    def __len__(self) -> int:
+        return -(-(self.end - self.start) // self.batch_size)
+
+    def batch(self, starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Read and normalize each row the batch touches once; overlapping
+        # windows then index into that block
+        spans = starts[:, None] + self._offsets
+        rows = np.unique(np.concatenate((spans.ravel(), starts + self.sequence_length)))
+        # Normalize in float64: raw ns timestamps don't survive a float32 cast
+        block = ((self.features[rows] - self.mean) / self.std).astype(np.float32)
+        X = block[np.searchsorted(rows, spans)]
+        y = block[np.searchsorted(rows, starts + self.sequence_length), self.target_column]
+        return X, y
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        starts = np.arange(self.start, self.end)
+        if self.shuffle:
+            self.rng.shuffle(starts)
+        for i in range(0, len(starts), self.batch_size):
+            yield self.batch(starts[i:i + self.batch_size])
+
+    def dataset(self) -> tf.data.Dataset:
+        n_features = self.features.shape[1]
+        signature = (
+            tf.TensorSpec(shape=(None, self.sequence_length, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        )
+        return tf.data.Dataset.from_generator(self.__iter__, output_signature=signature) \
+            .prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,148 @@
+# predictive_modeling/export.py
+#
+# Turns a trained PredictiveModel network into the weight file read by
+# predictive_modeling/runtime.py. BatchNorm layers are folded away: in
+# PredictiveModel a BatchNorm follows the ReLU, so its per-channel affine
+# map is carried through the max-pool (a positive scale commutes with max,
+# a negative one turns it into a min) and folded into the next Conv1D or
+# Dense kernel. Dropout is dropped.
+#
+#   python -m predictive_modeling.export models/predictive_model.h5 models/predictive_model.bin
+
+import argparse
+import os
+import numpy as np
+import tensorflow as tf
+from typing import Dict, List, Optional, Tuple
+from predictive_modeling.runtime import NumpyModel, write_model
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _activation(layer) -> str:
+    name = tf.keras.activations.serialize(layer.activation)
+    if isinstance(name, dict):
+        name = name.get('config', {}).get('name', name.get('class_name'))
+    if name not in ('linear', 'relu'):
+        raise ValueError(f"Layer {layer.name}: activation '{name}' is not supported by the runtime")
+    return name
+
+
+def _fold_input_affine(kernel: np.ndarray, bias: np.ndarray,
+                       affine: Optional[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    # kernel (..., in, out) applied to scale * x + shift
+    if affine is None:
+        return kernel, bias
+    scale, shift = affine
+    folded_bias = bias + np.tensordot(np.broadcast_to(shift, kernel.shape[:-1]), kernel,
+                                      axes=kernel.ndim - 1)
+    return kernel * scale[..., None], folded_bias
+
+
+def fold_model(model: tf.keras.Model) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+    ops: List[Dict] = []
+    arrays: Dict[str, np.ndarray] = {}
+    # Per-channel scale/shift still to be applied to the current activations
+    affine: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def add(name: str, array: np.ndarray) -> str:
+        arrays[name] = np.ascontiguousarray(array, dtype=np.float32)
+        return name
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ('Dropout', 'InputLayer'):
+            continue
+        if kind == 'BatchNormalization':
+            gamma, beta, mean, var = _bn_weights(layer)
+            scale = gamma / np.sqrt(var + layer.epsilon)
+            shift = beta - mean * scale
+            if affine is not None:
+                scale, shift = affine[0] * scale, affine[1] * scale + shift
+            affine = (scale, shift)
+        elif kind == 'Conv1D':
+            if layer.padding != 'valid' or layer.strides != (1,) or layer.dilation_rate != (1,):
+                raise ValueError(f"Layer {layer.name}: only valid, stride-1 Conv1D is supported")
+            kernel, bias = (w.astype(np.float64) for w in layer.get_weights())
+            kernel, bias = _fold_input_affine(kernel, bias, affine)
+            affine = None
+            ops.append({'op': 'conv1d', 'kernel': add(f"{layer.name}/kernel", kernel),
+                        'bias': add(f"{layer.name}/bias", bias), 'activation': _activation(layer)})
+        elif kind == 'MaxPooling1D':
+            if layer.padding != 'valid' or layer.strides != layer.pool_size:
+                raise ValueError(f"Layer {layer.name}: only valid MaxPooling1D with stride == pool size is supported")
+            op = {'op': 'maxpool1d', 'pool_size': int(layer.pool_size[0])}
+            if affine is not None and (affine[0] < 0).any():
+                # scale * max(x) == |scale| * max(sign * x) per channel
+                op['sign'] = add(f"{layer.name}/sign", np.where(affine[0] < 0, -1.0, 1.0))
+                affine = (np.abs(affine[0]), affine[1])
+            ops.append(op)
+        elif kind == 'Flatten':
+            if affine is not None:
+                # Channels-last flatten: feature t * channels + c
+                steps = layer.input_shape[1]
+                affine = (np.tile(affine[0], steps), np.tile(affine[1], steps))
+            ops.append({'op': 'flatten'})
+        elif kind == 'Dense':
+            kernel, bias = (w.astype(np.float64) for w in layer.get_weights())
+            kernel, bias = _fold_input_affine(kernel, bias, affine)
+            affine = None
+            ops.append({'op': 'dense', 'kernel': add(f"{layer.name}/kernel", kernel),
+                        'bias': add(f"{layer.name}/bias", bias), 'activation': _activation(layer)})
+        else:
+            raise ValueError(f"Layer {layer.name}: {kind} is not supported by the runtime")
+
+    if affine is not None:
+        ops.append({'op': 'affine', 'scale': add('output/scale', affine[0]),
+                    'shift': add('output/shift', affine[1])})
+    return ops, arrays
+
+
+def _bn_weights(layer) -> Tuple[np.ndarray, ...]:
+    # BatchNormalization without gamma and/or beta stores only what it uses
+    weights = [w.astype(np.float64) for w in layer.get_weights()]
+    channels = weights[-1].shape[0]
+    gamma = weights.pop(0) if layer.scale else np.ones(channels)
+    beta = weights.pop(0) if layer.center else np.zeros(channels)
+    return gamma, beta, weights[0], weights[1]
+
+
+def export_model(model: tf.keras.Model, path: str, mean: np.ndarray = None, std: np.ndarray = None,
+                 verify: bool = True, atol: float = 1e-4) -> NumpyModel:
+    ops, arrays = fold_model(model)
+    if mean is not None and std is not None:
+        arrays['mean'] = np.asarray(mean, dtype=np.float64)
+        arrays['std'] = np.asarray(std, dtype=np.float64)
+    input_shape = tuple(model.input_shape[1:])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_model(path, ops, arrays, input_shape)
+    runtime = NumpyModel.load(path)
+
+    if verify:
+        sample = np.random.default_rng(0).normal(size=(32,) + input_shape).astype(np.float32)
+        expected = model(sample, training=False).numpy()
+        error = float(np.max(np.abs(runtime.predict(sample) - expected)))
+        scale = float(np.max(np.abs(expected))) or 1.0
+        if error > atol * max(scale, 1.0):
+            raise ValueError(f"Exported model differs from Keras by {error:.3g}")
+        logger.info(f"Exported model verified against Keras (max abs error {error:.3g}).")
+    logger.info(f"Exported {len(ops)} ops to {path} ({os.path.getsize(path)} bytes).")
+    return runtime
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained model for the NumPy runtime")
+    parser.add_argument('model', help="Keras model saved by Trainer.save_model")
+    parser.add_argument('output', help="Weight file to write")
+    args = parser.parse_args()
+    model = tf.keras.models.load_model(args.model)
+    mean = std = None
+    if os.path.exists(f"{args.model}.norm.npz"):
+        stats = np.load(f"{args.model}.norm.npz")
+        mean, std = stats['mean'], stats['std']
+    export_model(model, args.output, mean, std)
+
+
+if __name__ == '__main__':
+    main()
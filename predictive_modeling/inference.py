@@ -0,0 +1,242 @@
+# predictive_modeling/inference.py
+
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from predictive_modeling.windows import FeatureWindows
+from utils.latency import LatencyMonitor
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PREDICTION_DTYPE = np.dtype([
+    ('symbol_id', np.int32),
+    ('timestamp', np.int64),   # timestamp of the newest tick in the scored window
+    ('scored_ns', np.int64),   # wall clock when the forward pass returned
+    ('received_ns', np.int64), # monotonic receive time of the ticks that triggered it, 0 if none
+    ('prediction', np.float32),
+])
+
+
+# Scores many symbols' windows in one forward pass. Requests queue up until
+# max_batch symbols are pending or max_delay_us has passed since the first
+# one, then run through a graph function traced once per batch bucket (1, 4,
+# 16, ... max_batch) with its own preallocated input array, so there is no
+# retracing and no per-call input allocation. Requests for a symbol that is
+# already pending share that slot and its result.
+#
+# Requests from an attached processor's batches carry the batch's receive
+# time into the predictions (`received_ns`), so prediction handlers can pass
+# it on as an order's trigger_ns; the 'inference' and 'tick_to_prediction'
+# stages go to the latency monitor.
+class InferenceEngine:
+    def __init__(self, model: tf.keras.Model, windows: FeatureWindows, max_batch: int = 64,
+                 max_delay_us: float = 200.0, latency_samples: int = 1 << 16, latency: LatencyMonitor = None):
+        self.model = model
+        self.windows = windows
+        self.max_batch = max_batch
+        self.max_delay = max_delay_us / 1e6
+        shape = (windows.sequence_length, windows.n_features)
+
+        self.buckets: List[int] = []
+        size = 1
+        while size < max_batch:
+            self.buckets.append(size)
+            size *= 4
+        self.buckets.append(max_batch)
+        forward = tf.function(lambda x: self.model(x, training=False))
+        self._inputs = {b: np.zeros((b,) + shape, dtype=np.float32) for b in self.buckets}
+        self._forward = {b: forward.get_concrete_function(tf.TensorSpec((b,) + shape, tf.float32))
+                         for b in self.buckets}
+        for b in self.buckets:
+            self._forward[b](tf.constant(self._inputs[b]))  # warm up
+
+        # symbol_id -> (enqueue time ns, receive time ns, futures waiting on it)
+        self._pending: Dict[int, Tuple[int, int, List[asyncio.Future]]] = {}
+        self.latency = latency if latency is not None else LatencyMonitor()
+        self.processor = None
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self.prediction_handlers: List[Callable[[np.ndarray], None]] = []
+        self._latencies = np.zeros(latency_samples, dtype=np.int64)
+        self._latency_count = 0
+        # (weights, normalization stats or None) waiting to be swapped in
+        self._next_weights = None
+        # Held by every forward pass and by the swap: predict_batch scores
+        # on the caller's thread while run() may have a batch in flight on
+        # the executor, and set_weights must not land in the middle of one
+        self._model_lock = threading.Lock()
+        self.batches = 0
+        self.scored = 0
+        self.swaps = 0
+        logger.info(f"Inference engine ready with batch buckets {self.buckets}, "
+                    f"max delay {max_delay_us}us.")
+
+    def predict_batch(self, symbol_ids: np.ndarray) -> np.ndarray:
+        # Synchronous scoring of ready symbols, in chunks of max_batch
+        self._apply_swap()
+        symbol_ids = np.asarray(symbol_ids, dtype=np.int64)
+        results = np.zeros(len(symbol_ids), dtype=PREDICTION_DTYPE)
+        for start in range(0, len(symbol_ids), self.max_batch):
+            chunk = symbol_ids[start:start + self.max_batch]
+            bucket, inputs, scored = self._prepare(chunk)
+            results[start:start + len(chunk)] = self._complete(scored, self._forward_pass(bucket, inputs))
+        return results
+
+    def _prepare(self, symbol_ids: np.ndarray):
+        # On the thread that updates the windows (the event loop): copy the
+        # windows and their timestamps out, so a forward pass elsewhere never
+        # sees update_ticks() move or reallocate them
+        k = len(symbol_ids)
+        bucket = next(b for b in self.buckets if b >= k)
+        inputs = self._inputs[bucket]
+        self.windows.gather(symbol_ids, inputs)
+        results = np.empty(k, dtype=PREDICTION_DTYPE)
+        results['symbol_id'] = symbol_ids
+        results['timestamp'] = self.windows.last_timestamp[symbol_ids]
+        results['received_ns'] = 0
+        return bucket, tf.constant(inputs), results
+
+    def _forward_pass(self, bucket: int, inputs: tf.Tensor) -> np.ndarray:
+        # The only part that may run on the inference thread
+        with self._model_lock:
+            return self._forward[bucket](inputs).numpy()
+
+    def _complete(self, results: np.ndarray, outputs: np.ndarray) -> np.ndarray:
+        k = len(results)
+        results['scored_ns'] = time.time_ns()
+        results['prediction'] = outputs[:k, 0]
+        self.batches += 1
+        self.scored += k
+        return results
+
+    def _request(self, symbol_id: int, future: asyncio.Future = None, received_ns: int = 0):
+        pending = self._pending.get(symbol_id)
+        if pending is None:
+            pending = (time.monotonic_ns(), received_ns, [])
+            self._pending[symbol_id] = pending
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+            self._wakeup.set()
+        if future is not None:
+            pending[2].append(future)
+
+    async def predict(self, symbol_id: int) -> Tuple[float, int]:
+        # (prediction, timestamp of the newest tick in the scored window)
+        if not self.windows.ready(symbol_id):
+            raise ValueError(f"Symbol {symbol_id} has fewer than {self.windows.sequence_length} ticks.")
+        future = asyncio.get_running_loop().create_future()
+        self._request(symbol_id, future)
+        return await future
+
+    def on_ticks(self, ticks: np.ndarray):
+        # Batch handler for DataProcessor: update windows and queue a scoring
+        # request for every ready symbol that moved; results go to
+        # prediction_handlers
+        received_ns = self.processor.batch_received_ns if self.processor is not None else 0
+        for symbol_id in self.windows.update_ticks(ticks).tolist():
+            if self.windows.ready(symbol_id):
+                self._request(symbol_id, received_ns=received_ns)
+
+    def attach(self, processor):
+        self.processor = processor
+        processor.batch_handlers.append(self.on_ticks)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            first = min(pending[0] for pending in self._pending.values())
+            remaining = self.max_delay - (time.monotonic_ns() - first) / 1e9
+            if remaining > 0 and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            self._full.clear()
+
+            # Take at most max_batch symbols; the rest stay queued for the next pass
+            symbols = list(self._pending)[:self.max_batch]
+            batch = [self._pending.pop(s) for s in symbols]
+            if self._pending:
+                self._wakeup.set()
+            # Between batches; a predict_batch call may still be scoring
+            self._apply_swap()
+            try:
+                bucket, inputs, results = self._prepare(np.array(symbols))
+                outputs = await loop.run_in_executor(self._executor, self._forward_pass, bucket, inputs)
+                results = self._complete(results, outputs)
+            except Exception as e:
+                logger.exception(f"Inference batch failed: {e}")
+                for _, _, futures in batch:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+
+            done = time.monotonic_ns()
+            enqueued = np.fromiter((pending[0] for pending in batch), dtype=np.int64, count=len(batch))
+            received = np.fromiter((pending[1] for pending in batch), dtype=np.int64, count=len(batch))
+            results['received_ns'] = received
+            self.latency.record('inference', done - enqueued)
+            triggered = received > 0
+            if triggered.any():
+                self.latency.record('tick_to_prediction', done - received[triggered])
+            for i, (enqueued_ns, _, futures) in enumerate(batch):
+                self._latencies[self._latency_count % len(self._latencies)] = done - enqueued_ns
+                self._latency_count += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_result((float(results['prediction'][i]), int(results['timestamp'][i])))
+            for handler in self.prediction_handlers:
+                handler(results)
+
+    async def reload(self, filepath: str):
+        # Hot-swaps in the weights of a model saved by Trainer.save_model
+        # (same architecture, e.g. a retrained copy). The file is read off the
+        # loop; the weights are assigned in place before the next batch, so
+        # the traced graphs use them without retracing, and the windows are
+        # re-normalized if the model's stats changed.
+        loop = asyncio.get_running_loop()
+        self._next_weights = await loop.run_in_executor(None, _read_weights, filepath)
+
+    def _apply_swap(self):
+        if self._next_weights is None:
+            return
+        with self._model_lock:
+            if self._next_weights is None:
+                return
+            weights, stats = self._next_weights
+            self._next_weights = None
+            self.model.set_weights(weights)
+            if stats is not None:
+                self.windows.set_stats(*stats)
+            self.swaps += 1
+        logger.info("Inference model weights swapped.")
+
+    def latency_percentiles(self, percentiles=(50, 99)) -> Dict[str, float]:
+        # Request-to-result latency in microseconds over the recent samples
+        samples = self._latencies[:min(self._latency_count, len(self._latencies))]
+        if not len(samples):
+            return {}
+        values = np.percentile(samples, percentiles) / 1e3
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _read_weights(filepath: str):
+    weights = tf.keras.models.load_model(filepath, compile=False).get_weights()
+    stats = None
+    if os.path.exists(f"{filepath}.norm.npz"):
+        norm = np.load(f"{filepath}.norm.npz")
+        stats = (norm['mean'], norm['std'])
+    return weights, stats
@@ -0,0 +1,194 @@
+# predictive_modeling/jobs.py
+#
+# Training and evaluation as utils.jobs job functions, and Retrainer, which
+# keeps the live model current without touching the event loop's time
+# budget: it snapshots the newest processed ticks into shared memory,
+# warm-starts training from the current weights in the job pool, and swaps
+# the result into an InferenceEngine.
+#
+# TensorFlow is imported by the job functions, in the pool's workers, so
+# the process scheduling them doesn't load it.
+
+import asyncio
+import glob
+import os
+import shutil
+import time
+from typing import Dict, Tuple
+from utils.jobs import JobCancelled, JobContext, JobScheduler, open_dataset
+from utils.shared_memory import SharedArray
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _close(shared: SharedArray):
+    if shared is None:
+        return
+    try:
+        shared.close()
+    except BufferError:
+        # Still referenced by the finished tf.data pipeline; the mapping
+        # goes with it
+        pass
+
+
+def _staging(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.staging{ext}"
+
+
+def _versions(path: str) -> list:
+    # Published versions of a model path, oldest first
+    root, ext = os.path.splitext(path)
+    versions = {}
+    for candidate in glob.glob(f"{glob.escape(root)}.v*{ext}"):
+        stamp = candidate[len(root) + 2:len(candidate) - len(ext)]
+        if stamp.isdigit():
+            versions[int(stamp)] = candidate
+    return [versions[stamp] for stamp in sorted(versions)]
+
+
+def _publish(trainer, model_path: str, keep: int = 2) -> str:
+    # Saves a new version of model_path (model and .norm.npz), which is never
+    # rewritten, so a reader of it always gets weights and stats that belong
+    # together. model_path itself is then updated for the next warm start or
+    # startup. The newest `keep` versions stay on disk; a reload reads the
+    # one it was given before the next training job publishes.
+    root, ext = os.path.splitext(model_path)
+    version = f"{root}.v{time.time_ns()}{ext}"
+    trainer.save_model(version)
+    staging = _staging(model_path)
+    for suffix in ('', '.norm.npz'):
+        if os.path.exists(f"{version}{suffix}"):
+            shutil.copyfile(f"{version}{suffix}", f"{staging}{suffix}")
+            os.replace(f"{staging}{suffix}", f"{model_path}{suffix}")
+    for old in _versions(model_path)[:-keep]:
+        for suffix in ('', '.norm.npz'):
+            if os.path.exists(f"{old}{suffix}"):
+                os.remove(f"{old}{suffix}")
+    return version
+
+
+def train_model(context: JobContext, dataset, input_shape: Tuple[int, int], model_path: str,
+                warm_start: bool = False, epochs: int = 10, batch_size: int = 64, test_size: float = 0.2,
+                runtime_path: str = None) -> Dict:
+    # dataset: feature matrix as a SharedArray spec or .npy path. With
+    # warm_start and an existing model_path, training resumes from those
+    # weights (and optimizer state) on the model's normalization stats.
+    # The result's published_path is the new model's own version (see
+    # _publish), which is what live reloads should read; files are written
+    # beside their target and renamed over it, so a reader never sees a
+    # partial one. A cancelled job raises JobCancelled out of fit() at the
+    # next batch.
+    from predictive_modeling.model import PredictiveModel
+    from predictive_modeling.trainer import ProgressCallback, Trainer
+    features, shared = open_dataset(dataset)
+    try:
+        trainer = Trainer(PredictiveModel(input_shape=tuple(input_shape)))
+        mean = std = None
+        warm = warm_start and os.path.exists(model_path)
+        if warm:
+            trainer.load_model(model_path)
+            mean, std = trainer.mean, trainer.std
+        trainer.prepare_stream(features, input_shape[0], test_size=test_size, batch_size=batch_size,
+                               mean=mean, std=std)
+        trainer.train(epochs=epochs, callbacks=[ProgressCallback(context.report, epochs)])
+        context.check()
+        evaluation = trainer.evaluate()
+
+        os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+        published_path = _publish(trainer, model_path)
+        if runtime_path:
+            staging = _staging(runtime_path)
+            trainer.export_runtime(staging)
+            os.replace(staging, runtime_path)
+        return {
+            'model_path': model_path,
+            'published_path': published_path,
+            'runtime_path': runtime_path,
+            'warm_start': warm,
+            'rows': len(features),
+            'epochs': len(trainer.history.history['loss']),
+            'evaluation': evaluation,
+        }
+    finally:
+        features = None
+        _close(shared)
+
+
+def evaluate_model(context: JobContext, dataset, model_path: str, sequence_length: int,
+                   test_size: float = 0.2, batch_size: int = 64) -> Dict:
+    # Scores a saved model on the most recent test_size of the dataset's windows
+    from predictive_modeling.model import PredictiveModel
+    from predictive_modeling.trainer import Trainer
+    features, shared = open_dataset(dataset)
+    try:
+        trainer = Trainer(PredictiveModel(input_shape=(sequence_length, features.shape[1])))
+        trainer.load_model(model_path)
+        trainer.prepare_stream(features, sequence_length, test_size=test_size, batch_size=batch_size,
+                               mean=trainer.mean, std=trainer.std)
+        context.check()
+        return trainer.evaluate()
+    finally:
+        features = None
+        _close(shared)
+
+
+# Periodic warm-start retraining on the newest `rows` processed ticks. Only
+# one training job is in flight at a time; the snapshot is the only work on
+# the loop (a copy of the rows into shared memory). With an InferenceEngine,
+# each finished model is hot-swapped into it.
+class Retrainer:
+    def __init__(self, scheduler: JobScheduler, processor, input_shape: Tuple[int, int], model_path: str,
+                 engine=None, runtime_path: str = None, rows: int = 200_000, epochs: int = 5,
+                 batch_size: int = 64):
+        self.scheduler = scheduler
+        self.processor = processor
+        self.input_shape = tuple(input_shape)
+        self.model_path = model_path
+        self.engine = engine
+        self.runtime_path = runtime_path
+        self.rows = rows
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.job = None
+        self.last_result: Dict = None
+
+    async def train(self, warm_start: bool = True, epochs: int = None) -> Dict:
+        # Result of the training job, or None if there was too little data
+        # or the job was cancelled
+        if self.job is not None and not self.job.future.done():
+            logger.info("Training job already running; skipping this round.")
+            return None
+        features = self.processor.get_feature_matrix(self.rows)
+        if len(features) < self.input_shape[0] + 2:
+            logger.info(f"Only {len(features)} processed ticks; not training yet.")
+            return None
+        with SharedArray.from_array(features) as shared:
+            del features
+            self.job = self.scheduler.submit(
+                train_model, shared.spec, self.input_shape, self.model_path, warm_start=warm_start,
+                epochs=epochs or self.epochs, batch_size=self.batch_size, runtime_path=self.runtime_path,
+                name='retrain' if warm_start else 'train')
+            try:
+                result = await self.job.wait()
+            except JobCancelled:
+                return None
+            except asyncio.CancelledError:
+                self.job.cancel()
+                raise
+        logger.info(f"Trained on {result['rows']} ticks ({result['epochs']} epochs, "
+                    f"warm start: {result['warm_start']}): {result['evaluation']}")
+        if self.engine is not None:
+            await self.engine.reload(result['published_path'])
+        self.last_result = result
+        return result
+
+    async def run_periodic(self, interval: float = 3600.0):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.train(warm_start=True)
+            except Exception as e:
+                logger.exception(f"Retraining failed: {e}")
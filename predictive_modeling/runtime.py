@@ -0,0 +1,113 @@
+# predictive_modeling/runtime.py
+#
+# TensorFlow-free forward pass for networks exported by
+# predictive_modeling/export.py. Only NumPy is imported, and the weight file
+# is memory-mapped, so loading takes milliseconds and the weights are shared
+# between processes through the page cache.
+
+import json
+import struct
+import numpy as np
+from typing import Dict, List
+
+MODEL_MAGIC = b'HFTMODL1'
+MODEL_VERSION = 1
+# magic, version, JSON header length; arrays follow the header, each
+# starting on an ALIGNMENT-byte boundary
+_HEADER = struct.Struct('<8sII')
+ALIGNMENT = 64
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+_ACTIVATIONS = {'linear': lambda x: x, 'relu': _relu}
+
+
+class NumpyModel:
+    def __init__(self, ops: List[Dict], arrays: Dict[str, np.ndarray], input_shape: tuple,
+                 mean: np.ndarray = None, std: np.ndarray = None):
+        self.ops = ops
+        self.arrays = arrays
+        self.input_shape = tuple(input_shape)
+        # Training normalization stats, for FeatureWindows(mean=..., std=...)
+        self.mean = mean
+        self.std = std
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyModel':
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, header_len = _HEADER.unpack(raw[:_HEADER.size].tobytes())
+        if magic != MODEL_MAGIC or version != MODEL_VERSION:
+            raise ValueError(f"{path} is not a version {MODEL_VERSION} model file")
+        header = json.loads(raw[_HEADER.size:_HEADER.size + header_len].tobytes())
+        data_start = _align(_HEADER.size + header_len)
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            count = int(np.prod(spec['shape']))
+            arrays[name] = np.frombuffer(raw, dtype=spec['dtype'], count=count,
+                                         offset=data_start + spec['offset']).reshape(spec['shape'])
+        return cls(header['ops'], arrays, header['input_shape'], arrays.get('mean'), arrays.get('std'))
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        # x: (batch, *input_shape) normalized windows; returns (batch, outputs)
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == len(self.input_shape):
+            x = x[None]
+        for op in self.ops:
+            kind = op['op']
+            if kind == 'conv1d':
+                kernel = self.arrays[op['kernel']]
+                batch, length, channels = x.shape
+                steps = length - kernel.shape[0] + 1
+                # Valid, stride-1 convolution: one 2-D matmul per kernel tap
+                # over every time step, then the taps are summed shifted
+                flat = np.ascontiguousarray(x).reshape(batch * length, channels)
+                taps = [(flat @ kernel[k]).reshape(batch, length, -1) for k in range(kernel.shape[0])]
+                y = taps[0][:, :steps]
+                for k in range(1, len(taps)):
+                    y += taps[k][:, k:k + steps]
+                y += self.arrays[op['bias']]
+                x = _ACTIVATIONS[op['activation']](y)
+            elif kind == 'dense':
+                y = x @ self.arrays[op['kernel']]
+                y += self.arrays[op['bias']]
+                x = _ACTIVATIONS[op['activation']](y)
+            elif kind == 'maxpool1d':
+                if 'sign' in op:
+                    # Channels whose folded BatchNorm scale is negative pool
+                    # on the negated values (a min-pool)
+                    x = x * self.arrays[op['sign']]
+                size = op['pool_size']
+                steps = x.shape[1] // size
+                x = x[:, :steps * size].reshape(x.shape[0], steps, size, x.shape[2]).max(axis=2)
+            elif kind == 'flatten':
+                x = x.reshape(x.shape[0], -1)
+            elif kind == 'affine':
+                x = x * self.arrays[op['scale']] + self.arrays[op['shift']]
+            else:
+                raise ValueError(f"Unknown op '{kind}' in model file")
+        return x
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_model(path: str, ops: List[Dict], arrays: Dict[str, np.ndarray], input_shape: tuple):
+    # Array offsets are relative to the data section, which starts at the
+    # first aligned position after the JSON header
+    header = {'input_shape': list(input_shape), 'ops': ops, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+        offset = _align(offset + array.nbytes)
+    payload = json.dumps(header).encode()
+    data_start = _align(_HEADER.size + len(payload))
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, len(payload)))
+        f.write(payload)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
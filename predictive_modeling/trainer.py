@@ -1,51 +1,140 @@
 # predictive_modeling/trainer.py
 
+import os
 import numpy as np
 import tensorflow as tf
-from model import PredictiveModel
+from typing import Callable
+from predictive_modeling.model import PredictiveModel
+from predictive_modeling.dataset import WindowGenerator
+from predictive_modeling.export import export_model
+from predictive_modeling.utils import PRICE_COLUMN, normalization_stats, time_split
 from utils.logger import get_logger
-from sklearn.model_selection import train_test_split
 
 logger = get_logger(__name__)
 
+
+# Reports fractional epochs to `report` after every batch (e.g. a job's
+# JobContext.report); an exception from it aborts fit()
+class ProgressCallback(tf.keras.callbacks.Callback):
+    def __init__(self, report: Callable[[float], None], epochs: int):
+        super().__init__()
+        self.report = report
+        self.epochs = epochs
+        self.epoch = 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+
+    def on_train_batch_end(self, batch, logs=None):
+        steps = self.params.get('steps')
+        fraction = min((batch + 1) / steps, 1.0) if steps else 0.0
+        self.report((self.epoch + fraction) / self.epochs)
+
+
 class Trainer:
     def __init__(self, model: PredictiveModel):
         self.model = model
         self.history = None
+        self.train_data = None
+        self.val_data = None
+        self.mean = None
+        self.std = None
         logger.info("Trainer initialized.")
 
     def prepare_data(self, X: np.ndarray, y: np.ndarray, test_size: float = 0.2, random_state: int = 42):
-        self.X_train, self.X_val, self.y_train, self.y_val = train_test_split(
-            X, y, test_size=test_size, random_state=random_state
-        )
+        # Time-ordered split: the last test_size of samples validates, so the
+        # model is never scored on windows that precede its training data.
+        # The slices are views of X/y. random_state is accepted for callers
+        # of the old shuffled split and has no effect: nothing is random.
+        split = time_split(len(X), test_size)
+        # Replaces any prepare_stream() datasets, which train/evaluate prefer
+        self.train_data = self.val_data = None
+        self.X_train, self.X_val = X[:split], X[split:]
+        self.y_train, self.y_val = y[:split], y[split:]
         logger.info(f"Data split into training and validation sets with test size {test_size}.")
 
-    def train(self, epochs: int = 50, batch_size: int = 32):
-        if not hasattr(self, 'X_train'):
-            raise AttributeError("Data not prepared. Call prepare_data() before training.")
-        self.history = self.model.get_model().fit(
-            self.X_train, self.y_train,
-            epochs=epochs,
-            batch_size=batch_size,
-            validation_data=(self.X_val, self.y_val),
-            callbacks=[
-                tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
-                tf.keras.callbacks.ModelCheckpoint(filepath='best_model.h5', monitor='val_loss', save_best_only=True)
-            ],
-            verbose=1
-        )
+    def prepare_stream(self, features: np.ndarray, sequence_length: int, test_size: float = 0.2,
+                       batch_size: int = 64, target_column: int = PRICE_COLUMN, seed: int = None,
+                       mean: np.ndarray = None, std: np.ndarray = None):
+        # Streaming alternative to prepare_data for feature arrays too large
+        # to window in memory (e.g. np.load(path, mmap_mode='r')). Sample i is
+        # the window starting at row i; normalization stats come only from the
+        # rows the training samples cover, unless given (a warm start keeps
+        # the loaded model's stats, which its weights were fitted to).
+        samples = len(features) - sequence_length
+        if samples < 2:
+            raise ValueError(f"Need more than {sequence_length + 1} rows to build training windows.")
+        split = time_split(samples, test_size)
+        if mean is None or std is None:
+            mean, std = normalization_stats(features[:split + sequence_length])
+        self.mean, self.std = mean, std
+        self.train_data = WindowGenerator(features, sequence_length, self.mean, self.std, 0, split,
+                                          batch_size, target_column, shuffle=True, seed=seed).dataset()
+        self.val_data = WindowGenerator(features, sequence_length, self.mean, self.std, split, samples,
+                                        batch_size, target_column).dataset()
+        logger.info(f"Streaming {split} training and {samples - split} validation windows "
+                    f"of length {sequence_length}.")
+
+    def _callbacks(self) -> list:
+        return [
+            tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+            tf.keras.callbacks.ModelCheckpoint(filepath='best_model.h5', monitor='val_loss', save_best_only=True)
+        ]
+
+    def train(self, epochs: int = 50, batch_size: int = 32, callbacks: list = None):
+        # callbacks are added to the early stopping and checkpoint ones
+        callbacks = self._callbacks() + (callbacks or [])
+        if self.train_data is not None:
+            # Batch size was fixed by prepare_stream
+            self.history = self.model.get_model().fit(
+                self.train_data,
+                epochs=epochs,
+                validation_data=self.val_data,
+                callbacks=callbacks,
+                verbose=1
+            )
+        elif hasattr(self, 'X_train'):
+            self.history = self.model.get_model().fit(
+                self.X_train, self.y_train,
+                epochs=epochs,
+                batch_size=batch_size,
+                validation_data=(self.X_val, self.y_val),
+                callbacks=callbacks,
+                verbose=1
+            )
+        else:
+            raise AttributeError("Data not prepared. Call prepare_data() or prepare_stream() before training.")
         logger.info(f"Model training completed for {epochs} epochs.")
 
-    def evaluate(self, X_test: np.ndarray, y_test: np.ndarray) -> dict:
-        results = self.model.get_model().evaluate(X_test, y_test, verbose=0)
+    def evaluate(self, X_test: np.ndarray = None, y_test: np.ndarray = None) -> dict:
+        # Without arguments, scores the validation split of prepare_stream()
+        # or prepare_data()
+        if X_test is None and self.val_data is not None:
+            results = self.model.get_model().evaluate(self.val_data, verbose=0)
+        elif X_test is None:
+            if not hasattr(self, 'X_val'):
+                raise AttributeError("Data not prepared. Call prepare_data() or prepare_stream() before evaluating.")
+            results = self.model.get_model().evaluate(self.X_val, self.y_val, verbose=0)
+        else:
+            results = self.model.get_model().evaluate(X_test, y_test, verbose=0)
         evaluation = {metric: value for metric, value in zip(self.model.get_model().metrics_names, results)}
         logger.info(f"Model evaluation results: {evaluation}")
         return evaluation
 
     def save_model(self, filepath: str):
         self.model.get_model().save(filepath)
+        if self.mean is not None:
+            # Inference has to normalize with the training split's stats
+            np.savez(f"{filepath}.norm.npz", mean=self.mean, std=self.std)
         logger.info(f"Model saved to {filepath}.")
 
+    def export_runtime(self, filepath: str):
+        # TensorFlow-free weight file for predictive_modeling.runtime.NumpyModel
+        export_model(self.model.get_model(), filepath, self.mean, self.std)
+
     def load_model(self, filepath: str):
         self.model.model = tf.keras.models.load_model(filepath)
+        if os.path.exists(f"{filepath}.norm.npz"):
+            stats = np.load(f"{filepath}.norm.npz")
+            self.mean, self.std = stats['mean'], stats['std']
         logger.info(f"Model loaded from {filepath}.")
@@ -1,15 +1,52 @@
 # predictive_modeling/utils.py
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Tuple
 
-def normalize_data(data: np.ndarray) -> np.ndarray:
-    mean = np.mean(data, axis=0)
-    std = np.std(data, axis=0) + 1e-8  # Avoid division by zero
+PRICE_COLUMN = 1  # feature matrix columns: timestamp, price, volume, bid, ask
+
+
+def normalization_stats(data: np.ndarray, chunk_size: int = 1 << 20) -> Tuple[np.ndarray, np.ndarray]:
+    # Per-column mean/std, accumulated chunk by chunk (Chan et al. merge) so a
+    # memory-mapped array is never loaded whole and large offsets such as
+    # ns timestamps don't cancel out
+    count = 0
+    mean = np.zeros(data.shape[1], dtype=np.float64)
+    m2 = np.zeros(data.shape[1], dtype=np.float64)
+    for start in range(0, len(data), chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size], dtype=np.float64)
+        n = len(chunk)
+        chunk_mean = chunk.mean(axis=0)
+        chunk_m2 = ((chunk - chunk_mean) ** 2).sum(axis=0)
+        delta = chunk_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += chunk_m2 + delta ** 2 * count * n / total
+        count = total
+    std = np.sqrt(m2 / max(count, 1)) + 1e-8  # Avoid division by zero
+    return mean, std
+
+
+def normalize_data(data: np.ndarray, mean: np.ndarray = None, std: np.ndarray = None) -> np.ndarray:
+    # Pass the training split's stats to normalize validation/live data with them
+    if mean is None or std is None:
+        mean, std = normalization_stats(data)
     normalized = (data - mean) / std
     return normalized
 
+
 def create_sequences(data: np.ndarray, sequence_length: int = 100) -> np.ndarray:
-    sequences = []
-    for i in range(len(data) - sequence_length):
-        sequences.append(data[i:i+sequence_length])
-    return np.array(sequences)
\ No newline at end of file
+    # Read-only strided view of shape (len - sequence_length, sequence_length,
+    # features); window i is data[i:i + sequence_length] and data[i +
+    # sequence_length] is the row that follows it. Nothing is copied.
+    if len(data) <= sequence_length:
+        return np.empty((0, sequence_length) + data.shape[1:], dtype=data.dtype)
+    windows = sliding_window_view(data, sequence_length, axis=0).swapaxes(1, 2)
+    return windows[:len(data) - sequence_length]
+
+
+def time_split(samples: int, test_size: float = 0.2) -> int:
+    # Index of the first validation sample; everything before it trains
+    split = int(round(samples * (1.0 - test_size)))
+    return min(max(split, 1), samples - 1) if samples > 1 else samples
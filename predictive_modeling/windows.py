@@ -0,0 +1,111 @@
+# predictive_modeling/windows.py
+
+import numpy as np
+
+
+# Latest `sequence_length` normalized feature rows per symbol, updated in
+# place as ticks arrive. Each symbol has a buffer twice the window length and
+# every row is written at slot p and p + sequence_length, so the current window
+# is always the contiguous slice [pos, pos + sequence_length), oldest first.
+# Rows are the feature matrix columns: timestamp, price, volume, bid, ask.
+class FeatureWindows:
+    def __init__(self, sequence_length: int = 100, n_features: int = 5, mean: np.ndarray = None,
+                 std: np.ndarray = None, max_symbols: int = 1024):
+        self.sequence_length = sequence_length
+        self.n_features = n_features
+        # Same stats as training (Trainer.mean/std); identity if not given
+        self.mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.std = np.ones(n_features) if std is None else np.asarray(std, dtype=np.float64)
+        self._offsets = np.arange(sequence_length)
+        self._allocate(max_symbols)
+
+    def _allocate(self, size: int):
+        buffers = np.zeros((size, 2 * self.sequence_length, self.n_features), dtype=np.float32)
+        pos = np.zeros(size, dtype=np.int64)
+        count = np.zeros(size, dtype=np.int64)
+        last_timestamp = np.zeros(size, dtype=np.int64)
+        if hasattr(self, 'buffers'):
+            n = len(self.pos)
+            buffers[:n] = self.buffers
+            pos[:n] = self.pos
+            count[:n] = self.count
+            last_timestamp[:n] = self.last_timestamp
+        self.buffers = buffers
+        self.pos = pos
+        self.count = count
+        self.last_timestamp = last_timestamp
+
+    def _ensure(self, symbols: int):
+        if symbols > len(self.pos):
+            size = len(self.pos)
+            while size < symbols:
+                size *= 2
+            self._allocate(size)
+
+    def _normalize(self, rows: np.ndarray) -> np.ndarray:
+        # float64 first: raw ns timestamps don't survive a float32 cast
+        return ((rows - self.mean) / self.std).astype(np.float32)
+
+    def update(self, symbol_id: int, timestamp: int, price: float, volume: float,
+               bid: float = 0.0, ask: float = 0.0):
+        self._ensure(symbol_id + 1)
+        row = self._normalize(np.array([timestamp, price, volume, bid, ask], dtype=np.float64))
+        p = self.pos[symbol_id]
+        self.buffers[symbol_id, p] = row
+        self.buffers[symbol_id, p + self.sequence_length] = row
+        self.pos[symbol_id] = (p + 1) % self.sequence_length
+        self.count[symbol_id] += 1
+        self.last_timestamp[symbol_id] = timestamp
+
+    def update_ticks(self, ticks: np.ndarray) -> np.ndarray:
+        # Vectorized update from TICK_DTYPE records; returns the symbol ids
+        # that changed. Only each symbol's last sequence_length rows in the
+        # batch are written.
+        n = len(ticks)
+        if n == 0:
+            return np.empty(0, dtype=np.int32)
+        L = self.sequence_length
+        symbol_ids = ticks['symbol_id']
+        self._ensure(int(symbol_ids.max()) + 1)
+        order = np.argsort(symbol_ids, kind='stable')
+        sorted_ids = symbol_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        counts = np.diff(np.r_[starts, n])
+        symbols = sorted_ids[starts]
+        rank = np.arange(n) - np.repeat(starts, counts)
+        keep = rank >= np.repeat(counts, counts) - L
+
+        kept = order[keep]
+        rows = self._normalize(np.column_stack((
+            ticks['timestamp'][kept].astype(np.float64), ticks['price'][kept],
+            ticks['volume'][kept].astype(np.float64), ticks['bid'][kept], ticks['ask'][kept],
+        )))
+        kept_ids = sorted_ids[keep]
+        slots = (self.pos[kept_ids] + rank[keep]) % L
+        self.buffers[kept_ids, slots] = rows
+        self.buffers[kept_ids, slots + L] = rows
+        self.pos[symbols] = (self.pos[symbols] + counts) % L
+        self.count[symbols] += counts
+        self.last_timestamp[symbols] = ticks['timestamp'][order[starts + counts - 1]]
+        return symbols
+
+    def set_stats(self, mean: np.ndarray, std: np.ndarray):
+        # Re-express the stored rows under new normalization stats (a swapped
+        # model trained on other stats) without needing the raw ticks
+        mean = np.asarray(mean, dtype=np.float64)
+        std = np.asarray(std, dtype=np.float64)
+        self.buffers *= (self.std / std).astype(np.float32)
+        self.buffers += ((self.mean - mean) / std).astype(np.float32)
+        self.mean, self.std = mean, std
+
+    def ready(self, symbol_id: int) -> bool:
+        return symbol_id < len(self.count) and self.count[symbol_id] >= self.sequence_length
+
+    def window(self, symbol_id: int) -> np.ndarray:
+        p = self.pos[symbol_id]
+        return self.buffers[symbol_id, p:p + self.sequence_length]
+
+    def gather(self, symbol_ids: np.ndarray, out: np.ndarray):
+        # Copy the windows of symbol_ids into the first len(symbol_ids) rows of out
+        k = len(symbol_ids)
+        out[:k] = self.buffers[symbol_ids[:, None], self.pos[symbol_ids][:, None] + self._offsets]
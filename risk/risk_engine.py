@@ -0,0 +1,415 @@
+# risk/risk_engine.py
+
+import threading
+import time
+import numpy as np
+from typing import Dict
+from data_acquisition.tick_buffer import SymbolRegistry
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RISK_ACCEPTED = 0
+RISK_KILL_SWITCH = 1
+RISK_UNKNOWN_SYMBOL = 2
+RISK_QUANTITY = 3          # non-positive or above the fat-finger cap
+RISK_NO_PRICE = 4          # market order with no last trade to value it
+RISK_PRICE_BAND = 5
+RISK_ORDER_NOTIONAL = 6
+RISK_POSITION = 7
+RISK_GROSS_POSITION = 8
+RISK_NOTIONAL = 9
+RISK_GROSS_NOTIONAL = 10
+RISK_RATE = 11
+
+REJECT_REASONS = {
+    RISK_ACCEPTED: 'accepted', RISK_KILL_SWITCH: 'kill switch', RISK_UNKNOWN_SYMBOL: 'unknown symbol',
+    RISK_QUANTITY: 'quantity', RISK_NO_PRICE: 'no reference price', RISK_PRICE_BAND: 'price band',
+    RISK_ORDER_NOTIONAL: 'order notional', RISK_POSITION: 'position limit',
+    RISK_GROSS_POSITION: 'gross position limit', RISK_NOTIONAL: 'notional limit',
+    RISK_GROSS_NOTIONAL: 'gross notional limit', RISK_RATE: 'order rate',
+}
+
+# Per-symbol limits, overridable per symbol (config 'risk.symbols')
+DEFAULT_LIMITS = {
+    'max_order_qty': 10_000,          # fat-finger cap, shares per order
+    'max_order_notional': 1_000_000.0,
+    'max_position': 50_000,           # |projected position|, shares
+    'max_notional': 5_000_000.0,      # |projected position| * price
+    'price_band': 0.05,               # max |limit - last trade| / last trade
+    'orders_per_sec': 100.0,          # token bucket refill rate
+    'burst': 20.0,                    # token bucket depth
+}
+
+# Account-wide limits
+DEFAULT_GLOBAL_LIMITS = {
+    'max_gross_position': 500_000,
+    'max_gross_notional': 50_000_000.0,
+    'orders_per_sec': 2_000.0,
+    'burst': 200.0,
+}
+
+_INT_LIMITS = ('max_order_qty', 'max_position')
+# Below this size check_batch walks the orders with the scalar checks: the
+# vectorized form has a fixed cost of a few dozen array operations
+_SCALAR_BATCH = 48
+_PER_SYMBOL_ARRAYS = tuple(DEFAULT_LIMITS) + ('position', 'last_price', 'notional', 'tokens', 'refill_ns')
+
+
+def _group_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # Inclusive cumulative sum restarting wherever starts is True
+    totals = np.cumsum(values)
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(values)), 0))
+    return totals - (totals - values)[first]
+
+
+# Pre-trade risk gate. Limits and state are preallocated arrays indexed by
+# SymbolRegistry id, so a check is a fixed number of array reads plus a
+# commit on acceptance; check_batch applies the same checks to whole order
+# arrays. Accepted quantity is added to the projected position straight
+# away and given back with release() when an order ends unfilled (cancel,
+# reject, expire), so limits bound the position the account would hold if
+# every working order filled.
+#
+# Gross notional is kept incrementally: each symbol's |position| * price is
+# refreshed when that symbol's position changes, so it uses the last price
+# seen for the symbol at that moment.
+class RiskEngine:
+    def __init__(self, symbols: SymbolRegistry = None, max_symbols: int = 1024, limits: dict = None,
+                 global_limits: dict = None):
+        self.symbols = symbols or SymbolRegistry()
+        self.max_symbols = max_symbols
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._default_limits = limits
+        for name, value in limits.items():
+            dtype = np.int64 if name in _INT_LIMITS else np.float64
+            setattr(self, name, np.full(max_symbols, value, dtype=dtype))
+        global_limits = {**DEFAULT_GLOBAL_LIMITS, **(global_limits or {})}
+        self.max_gross_position = int(global_limits['max_gross_position'])
+        self.max_gross_notional = float(global_limits['max_gross_notional'])
+        self.global_rate = float(global_limits['orders_per_sec'])
+        self.global_burst = float(global_limits['burst'])
+
+        self.position = np.zeros(max_symbols, dtype=np.int64)        # projected, signed
+        self.last_price = np.zeros(max_symbols, dtype=np.float64)    # last trade
+        self.notional = np.zeros(max_symbols, dtype=np.float64)      # |position| * price
+        self.tokens = self.burst.copy()
+        self.refill_ns = np.full(max_symbols, time.monotonic_ns(), dtype=np.int64)
+        self.gross_position = 0
+        self.gross_notional = 0.0
+        self.global_tokens = self.global_burst
+        self.global_refill_ns = time.monotonic_ns()
+
+        self.killed = False
+        self.kill_reason = ''
+        self.checks = 0
+        self.rejects = np.zeros(len(REJECT_REASONS), dtype=np.int64)
+        self._lock = threading.Lock()
+        # The single-order path reads and writes through memoryviews of the
+        # same arrays: indexing one yields Python scalars, which is several
+        # times cheaper than NumPy scalar indexing and arithmetic. Arrays
+        # are therefore only ever updated in place, and replaced together
+        # with their views when _ensure_capacity grows them.
+        for name in _PER_SYMBOL_ARRAYS:
+            setattr(self, f'_{name}', memoryview(getattr(self, name)))
+
+    def _ensure_capacity(self, max_symbol_id: int):
+        # Ids come from a SymbolRegistry shared with the rest of the
+        # pipeline, so max_symbols is only the initial size: the arrays
+        # double until max_symbol_id fits, new symbols taking the default
+        # limits. Callers must not hold _lock.
+        if max_symbol_id < self.max_symbols:
+            return
+        with self._lock:
+            capacity = max(self.max_symbols, 1)
+            while capacity <= max_symbol_id:
+                capacity *= 2
+            if capacity == self.max_symbols:
+                return
+            fills = {**self._default_limits, 'position': 0, 'last_price': 0.0, 'notional': 0.0,
+                     'tokens': self._default_limits['burst'], 'refill_ns': time.monotonic_ns()}
+            for name in _PER_SYMBOL_ARRAYS:
+                old = getattr(self, name)
+                grown = np.full(capacity, fills[name], dtype=old.dtype)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+                setattr(self, f'_{name}', memoryview(grown))
+            self.max_symbols = capacity
+
+    @classmethod
+    def from_config(cls, config: dict, symbols: SymbolRegistry = None) -> 'RiskEngine':
+        # config: the 'risk' section of config.yaml
+        config = config or {}
+        engine = cls(symbols, config.get('max_symbols', 1024), config.get('limits'), config.get('global'))
+        for symbol, overrides in (config.get('symbols') or {}).items():
+            engine.set_limits(symbol, **overrides)
+        return engine
+
+    def set_limits(self, symbol: str, **limits):
+        symbol_id = self.symbols.get_id(symbol)
+        self._ensure_capacity(symbol_id)
+        for name, value in limits.items():
+            if name not in DEFAULT_LIMITS:
+                raise ValueError(f"Unknown risk limit: {name}")
+            getattr(self, name)[symbol_id] = value
+        self.tokens[symbol_id] = min(self.tokens[symbol_id], self.burst[symbol_id])
+
+    def kill(self, reason: str = 'manual'):
+        # Rejects every order until reset_kill_switch()
+        self.killed = True
+        self.kill_reason = reason
+        logger.warning(f"Risk kill switch engaged: {reason}")
+
+    def reset_kill_switch(self):
+        self.killed = False
+        self.kill_reason = ''
+        logger.warning("Risk kill switch reset.")
+
+    def on_ticks(self, records: np.ndarray):
+        # DataProcessor tick handler: last trade price per symbol. Later
+        # ticks of the batch overwrite earlier ones.
+        ids = records['symbol_id']
+        if len(ids):
+            self._ensure_capacity(int(ids.max()))
+        self.last_price[ids] = records['price']
+
+    def _set_position(self, symbol_id: int, position: int, price: float):
+        old = self._position[symbol_id]
+        notional = abs(position) * price
+        self.gross_position += abs(position) - abs(old)
+        self.gross_notional += notional - self._notional[symbol_id]
+        self._position[symbol_id] = position
+        self._notional[symbol_id] = notional
+
+    def check_order(self, symbol_id: int, side: int, quantity: int, price: float = 0.0) -> int:
+        # side 1 buy / -1 sell; price 0 for market orders. Returns
+        # RISK_ACCEPTED (0) and reserves the quantity, or a reject code.
+        if symbol_id >= self.max_symbols:
+            self._ensure_capacity(symbol_id)
+        with self._lock:
+            code = self._check(symbol_id, side, quantity, price)
+            self.checks += 1
+            if code:
+                self.rejects[code] += 1
+            return code
+
+    def check_replace(self, symbol_id: int, side: int, quantity: int, price: float, previous_quantity: int) -> int:
+        # Cancel/replace to `quantity` at `price`: the static and rate checks
+        # apply to the new order, the position limits to the increase only
+        if symbol_id >= self.max_symbols:
+            self._ensure_capacity(symbol_id)
+        with self._lock:
+            code = self._check(symbol_id, side, quantity, price, max(quantity - previous_quantity, 0))
+            self.checks += 1
+            if code:
+                self.rejects[code] += 1
+            return code
+
+    def _check(self, symbol_id: int, side: int, quantity: int, price: float, reserve: int = None) -> int:
+        # Static checks, then the rate buckets, then the limits that depend
+        # on the running position. An order that gets as far as the position
+        # checks has used a token whether or not it passes them.
+        if self.killed:
+            return RISK_KILL_SWITCH
+        if symbol_id < 0:
+            return RISK_UNKNOWN_SYMBOL
+        if quantity <= 0 or quantity > self._max_order_qty[symbol_id]:
+            return RISK_QUANTITY
+        reference = self._last_price[symbol_id]
+        if price > 0:
+            if reference > 0 and abs(price - reference) > self._price_band[symbol_id] * reference:
+                return RISK_PRICE_BAND
+        elif reference > 0:
+            price = reference
+        else:
+            return RISK_NO_PRICE
+        if price * quantity > self._max_order_notional[symbol_id]:
+            return RISK_ORDER_NOTIONAL
+        now = time.monotonic_ns()
+        tokens = min(self._burst[symbol_id], self._tokens[symbol_id]
+                     + (now - self._refill_ns[symbol_id]) * 1e-9 * self._orders_per_sec[symbol_id])
+        global_tokens = min(self.global_burst,
+                            self.global_tokens + (now - self.global_refill_ns) * 1e-9 * self.global_rate)
+        if tokens < 1.0 or global_tokens < 1.0:
+            return RISK_RATE
+        self._tokens[symbol_id] = tokens - 1.0
+        self._refill_ns[symbol_id] = now
+        self.global_tokens = global_tokens - 1.0
+        self.global_refill_ns = now
+        return self._reserve(symbol_id, side * (quantity if reserve is None else reserve), price)
+
+    def _reserve(self, symbol_id: int, signed_quantity: int, price: float) -> int:
+        current = self._position[symbol_id]
+        position = current + signed_quantity
+        if abs(position) > self._max_position[symbol_id]:
+            return RISK_POSITION
+        if self.gross_position + abs(position) - abs(current) > self.max_gross_position:
+            return RISK_GROSS_POSITION
+        notional = abs(position) * price
+        if notional > self._max_notional[symbol_id]:
+            return RISK_NOTIONAL
+        previous_notional = self._notional[symbol_id]
+        if self.gross_notional + notional - previous_notional > self.max_gross_notional:
+            return RISK_GROSS_NOTIONAL
+        self.gross_position += abs(position) - abs(current)
+        self.gross_notional += notional - previous_notional
+        self._position[symbol_id] = position
+        self._notional[symbol_id] = notional
+        return RISK_ACCEPTED
+
+    def check_batch(self, symbol_ids: np.ndarray, sides: np.ndarray, quantities: np.ndarray,
+                    prices: np.ndarray) -> np.ndarray:
+        # check_order over arrays in submission order, with the same result
+        # as checking them one by one; returns a uint8 code per order and
+        # reserves the accepted ones. Static and rate checks are vectorized;
+        # the position limits are checked on running per-symbol totals, and
+        # only a batch that would breach one is walked order by order.
+        symbol_ids = np.asarray(symbol_ids, dtype=np.int64)
+        sides = np.asarray(sides, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(symbol_ids)
+        codes = np.zeros(n, dtype=np.uint8)
+        if n:
+            self._ensure_capacity(int(symbol_ids.max()))
+        with self._lock:
+            self.checks += n
+            if n == 0:
+                return codes
+            if self.killed:
+                codes[:] = RISK_KILL_SWITCH
+                self.rejects[RISK_KILL_SWITCH] += n
+                return codes
+            if n < _SCALAR_BATCH:
+                check = self._check
+                for i, (symbol_id, side, quantity, price) in enumerate(zip(symbol_ids.tolist(), sides.tolist(),
+                                                                           quantities.tolist(), prices.tolist())):
+                    code = check(symbol_id, side, quantity, price)
+                    if code:
+                        codes[i] = code
+                        self.rejects[code] += 1
+                return codes
+            unknown = symbol_ids < 0
+            codes[unknown] = RISK_UNKNOWN_SYMBOL
+            ids = np.where(unknown, 0, symbol_ids)
+
+            reference = self.last_price[ids]
+            codes[(codes == 0) & ((quantities <= 0) | (quantities > self.max_order_qty[ids]))] = RISK_QUANTITY
+            market = prices <= 0
+            codes[(codes == 0) & market & (reference <= 0)] = RISK_NO_PRICE
+            codes[(codes == 0) & ~market & (reference > 0)
+                  & (np.abs(prices - reference) > self.price_band[ids] * reference)] = RISK_PRICE_BAND
+            value_price = np.where(market, reference, prices)
+            codes[(codes == 0) & (value_price * quantities > self.max_order_notional[ids])] = RISK_ORDER_NOTIONAL
+
+            # Token buckets: the first floor(tokens) surviving orders of each
+            # symbol, and of the batch, pass
+            order = np.argsort(ids, kind='stable')
+            sorted_ids = ids[order]
+            starts = np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]
+            ok = codes == 0
+            now = time.monotonic_ns()
+            tokens = np.minimum(self.burst, self.tokens + (now - self.refill_ns) * 1e-9 * self.orders_per_sec)
+            global_tokens = min(self.global_burst,
+                                self.global_tokens + (now - self.global_refill_ns) * 1e-9 * self.global_rate)
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = _group_cumsum(ok[order].astype(np.int64), starts)
+            limited = ok & (rank > np.floor(tokens[ids]))
+            limited |= ok & (np.cumsum(ok & ~limited) > np.floor(global_tokens))
+            codes[limited] = RISK_RATE
+            ok = codes == 0
+            if not ok.any():
+                self.rejects += np.bincount(codes, minlength=len(self.rejects))
+                self.rejects[RISK_ACCEPTED] = 0
+                return codes
+            counts = np.bincount(ids[ok], minlength=self.max_symbols)
+            self.tokens[:] = np.where(counts > 0, tokens - counts, self.tokens)
+            self.refill_ns[counts > 0] = now
+            self.global_tokens = global_tokens - int(ok.sum())
+            self.global_refill_ns = now
+
+            # Running projected position per symbol over the orders still in
+            signed = np.where(ok, sides * quantities, 0)
+            running = _group_cumsum(signed[order], starts)
+            projected = np.empty(n, dtype=np.int64)
+            projected[order] = self.position[sorted_ids] + running
+            previous = projected - signed
+            notional = np.abs(projected) * value_price
+            breach = (np.abs(projected) > self.max_position[ids]) | (notional > self.max_notional[ids])
+            breach |= self.gross_position + np.cumsum(np.where(ok, np.abs(projected) - np.abs(previous), 0)) \
+                > self.max_gross_position
+            # Gross notional moves as _reserve moves it: by the order's notional
+            # less the symbol's stored one, which is that of its previous
+            # accepted order in the batch, else self.notional
+            ok_sorted = ok[order]
+            notional_sorted = notional[order]
+            position_index = np.arange(n)
+            group_start = np.maximum.accumulate(np.where(starts, position_index, 0))
+            last_ok = np.maximum.accumulate(np.where(ok_sorted, position_index, -1))
+            prior = np.r_[-1, last_ok[:-1]]
+            in_group = prior >= group_start
+            stored = np.where(in_group, notional_sorted[np.maximum(prior, 0)], self.notional[sorted_ids])
+            change = np.zeros(n)
+            change[order] = np.where(ok_sorted, notional_sorted - stored, 0.0)
+            breach |= self.gross_notional + np.cumsum(change) > self.max_gross_notional
+            if (ok & breach).any():
+                for i in np.flatnonzero(ok):
+                    codes[i] = self._reserve(int(ids[i]), int(signed[i]), float(value_price[i]))
+                ok = codes == 0
+            elif ok.any():
+                self._apply_fills(ids[ok], signed[ok], value_price[ok])
+            self.rejects += np.bincount(codes, minlength=len(self.rejects))
+            self.rejects[RISK_ACCEPTED] = 0
+            return codes
+
+    def _apply_fills(self, ids: np.ndarray, signed: np.ndarray, prices: np.ndarray):
+        touched = np.unique(ids)
+        old = self.position[touched]
+        np.add.at(self.position, ids, signed)
+        marks = self.notional[touched] / np.maximum(np.abs(old), 1)
+        marks[old == 0] = 0.0
+        latest = np.zeros(self.max_symbols, dtype=np.float64)
+        latest[ids] = prices
+        marks = np.where(latest[touched] > 0, latest[touched], marks)
+        new = self.position[touched]
+        notional = np.abs(new) * marks
+        self.gross_position += int(np.abs(new).sum() - np.abs(old).sum())
+        self.gross_notional += float(notional.sum() - self.notional[touched].sum())
+        self.notional[touched] = notional
+
+    def release(self, symbol_id: int, side: int, quantity: int):
+        # Gives back quantity that will not fill (cancelled, rejected or
+        # expired remainder of an accepted order)
+        if quantity <= 0 or symbol_id >= self.max_symbols:
+            return
+        with self._lock:
+            current = self._position[symbol_id]
+            price = self._last_price[symbol_id] or self._notional[symbol_id] / max(abs(current), 1)
+            self._set_position(symbol_id, current - side * quantity, price)
+
+    def release_batch(self, symbol_ids: np.ndarray, sides: np.ndarray, quantities: np.ndarray):
+        keep = (np.asarray(quantities) > 0) & (np.asarray(symbol_ids) < self.max_symbols)
+        if not keep.any():
+            return
+        ids = np.asarray(symbol_ids, dtype=np.int64)[keep]
+        with self._lock:
+            self._apply_fills(ids, -(np.asarray(sides, dtype=np.int64)[keep] *
+                                     np.asarray(quantities, dtype=np.int64)[keep]), self.last_price[ids])
+
+    def on_orders_closed(self, records: np.ndarray):
+        # OrderStore archive handler: releases the unfilled remainder of
+        # terminal orders (the store must share this engine's SymbolRegistry)
+        self.release_batch(records['symbol_id'], records['side'], records['quantity'] - records['cum_qty'])
+
+    def on_order_replaced(self, symbol_id: int, side: int, previous_quantity: int, quantity: int):
+        # OrderStore replace handler: check_replace reserved only increases,
+        # so a confirmed reduction is given back here
+        if quantity < previous_quantity:
+            self.release(symbol_id, side, previous_quantity - quantity)
+
+    def summary(self) -> Dict[str, int]:
+        summary = {'checks': self.checks}
+        for code, count in enumerate(self.rejects):
+            if count:
+                summary[REJECT_REASONS[code]] = int(count)
+        return summary
@@ -0,0 +1,62 @@
+# tests/test_order_book.py
+#
+# apply_quotes_columns against update(): the same random quote stream,
+# applied in batches to one book and quote by quote to another, must leave
+# identical ladders, windows and tops. The stream mixes small moves inside
+# the window with jumps that re-centre it, one-sided and empty quotes, and
+# repeated quotes of a symbol within a batch.
+
+import numpy as np
+import pytest
+from data_acquisition.order_book import OrderBook
+
+SYMBOLS = 12
+LEVELS = 32
+
+
+def make_quotes(rng: np.random.Generator, mids: np.ndarray, n: int):
+    symbol_ids = rng.integers(0, SYMBOLS, n)
+    steps = rng.integers(-3, 4, n).astype(np.float64)
+    jumps = rng.random(n) < 0.03
+    steps[jumps] = rng.integers(-40, 41, int(jumps.sum()))
+    bids = np.empty(n)
+    asks = np.empty(n)
+    for i, symbol_id in enumerate(symbol_ids):
+        mids[symbol_id] = max(mids[symbol_id] + steps[i], 50)
+        half = rng.integers(1, 4)
+        bids[i] = (mids[symbol_id] - half) * 0.01
+        asks[i] = (mids[symbol_id] + half) * 0.01
+    side = rng.random(n)
+    bids[side < 0.05] = 0.0                      # ask only
+    asks[(side >= 0.05) & (side < 0.10)] = 0.0   # bid only
+    empty = side > 0.98
+    bids[empty] = asks[empty] = 0.0
+    timestamps = np.arange(n, dtype=np.int64) + rng.integers(0, 1 << 40)
+    return (symbol_ids, timestamps, bids, rng.integers(0, 500, n), asks, rng.integers(0, 500, n))
+
+
+def assert_same_book(batch: OrderBook, scalar: OrderBook):
+    np.testing.assert_array_equal(batch.base, scalar.base)
+    np.testing.assert_array_equal(batch.bid_ladder, scalar.bid_ladder)
+    np.testing.assert_array_equal(batch.ask_ladder, scalar.ask_ladder)
+    for name in ('timestamp', 'bid', 'ask', 'bid_size', 'ask_size'):
+        np.testing.assert_array_equal(batch.top[name], scalar.top[name], err_msg=name)
+    for name in ('mid', 'spread', 'microprice', 'imbalance'):
+        np.testing.assert_allclose(batch.top[name], scalar.top[name], rtol=1e-12, equal_nan=True, err_msg=name)
+    assert batch.updates == scalar.updates
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_apply_quotes_columns_matches_update(seed):
+    rng = np.random.default_rng(seed)
+    batch = OrderBook(levels=LEVELS, max_symbols=4)
+    scalar = OrderBook(levels=LEVELS, max_symbols=4)
+    mids = rng.integers(5_000, 20_000, SYMBOLS).astype(np.float64)
+    for _ in range(20):
+        n = int(rng.choice([1, 5, 50, 400]))
+        symbol_ids, timestamps, bids, bid_sizes, asks, ask_sizes = make_quotes(rng, mids, n)
+        batch.apply_quotes_columns(symbol_ids, timestamps, bids, bid_sizes, asks, ask_sizes)
+        for i in range(n):
+            scalar.update(int(symbol_ids[i]), int(timestamps[i]), float(bids[i]), int(bid_sizes[i]),
+                          float(asks[i]), int(ask_sizes[i]))
+        assert_same_book(batch, scalar)
@@ -0,0 +1,132 @@
+# tests/test_risk_engine.py
+#
+# check_batch against the scalar _check it vectorizes: the same random order
+# stream, checked as batches on one engine and order by order on another,
+# must give the same codes and leave the same state. Token refill is turned
+# off so the rate checks don't depend on the clock.
+
+import numpy as np
+import pytest
+from risk.risk_engine import RiskEngine, RISK_RATE, _SCALAR_BATCH
+
+SYMBOLS = 16
+
+
+def make_engine(rng: np.random.Generator) -> RiskEngine:
+    # Tight limits, so every reject reason turns up
+    engine = RiskEngine(max_symbols=SYMBOLS,
+                        limits={'max_order_qty': 800, 'max_position': 3_000, 'max_notional': 250_000.0,
+                                'max_order_notional': 60_000.0, 'price_band': 0.02, 'orders_per_sec': 0.0,
+                                'burst': 40.0},
+                        global_limits={'max_gross_position': 20_000, 'max_gross_notional': 1_500_000.0,
+                                       'orders_per_sec': 0.0, 'burst': 1_000.0})
+    engine.burst[:] = rng.integers(5, 60, SYMBOLS)
+    engine.tokens[:] = engine.burst
+    engine.max_position[:] = rng.integers(500, 4_000, SYMBOLS)
+    # Some symbols have no last trade yet: market orders there have no price
+    engine.last_price[:] = np.where(rng.random(SYMBOLS) < 0.2, 0.0, rng.uniform(20, 120, SYMBOLS))
+    return engine
+
+
+def make_orders(engine: RiskEngine, rng: np.random.Generator, n: int):
+    symbol_ids = rng.integers(-1, SYMBOLS + 2, n)   # a few unknown ids
+    sides = rng.choice([1, -1], n)
+    quantities = rng.integers(-10, 1_000, n)
+    reference = engine.last_price[np.clip(symbol_ids, 0, SYMBOLS - 1)]
+    prices = np.where(rng.random(n) < 0.3, 0.0, reference * rng.uniform(0.97, 1.03, n))
+    prices[(prices == 0) & (rng.random(n) < 0.5)] = rng.uniform(20, 120)
+    return symbol_ids, sides, quantities, prices
+
+
+def assert_same_state(batch: RiskEngine, scalar: RiskEngine):
+    np.testing.assert_array_equal(batch.position, scalar.position)
+    np.testing.assert_allclose(batch.notional, scalar.notional, rtol=1e-9)
+    np.testing.assert_allclose(batch.tokens, scalar.tokens, rtol=1e-9)
+    assert batch.gross_position == scalar.gross_position
+    assert batch.gross_notional == pytest.approx(scalar.gross_notional, rel=1e-9)
+    assert batch.global_tokens == pytest.approx(scalar.global_tokens, rel=1e-9)
+    np.testing.assert_array_equal(batch.rejects, scalar.rejects)
+    assert batch.checks == scalar.checks
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_check_batch_matches_scalar_checks(seed):
+    rng = np.random.default_rng(seed)
+    batch = make_engine(rng)
+    scalar = make_engine(np.random.default_rng(seed))
+    codes_seen = set()
+    for _ in range(12):
+        # Sizes on both sides of the scalar fallback
+        n = int(rng.choice([1, _SCALAR_BATCH - 1, _SCALAR_BATCH, 200, 1_000]))
+        symbol_ids, sides, quantities, prices = make_orders(batch, rng, n)
+        codes = batch.check_batch(symbol_ids, sides, quantities, prices)
+        expected = [scalar.check_order(int(s), int(d), int(q), float(p))
+                    for s, d, q, p in zip(symbol_ids, sides, quantities, prices)]
+        np.testing.assert_array_equal(codes, expected)
+        assert_same_state(batch, scalar)
+        codes_seen.update(codes.tolist())
+        # Unfilled remainders come back between batches, as order closes do
+        release = rng.random(SYMBOLS) < 0.5
+        ids = np.flatnonzero(release)
+        for engine in (batch, scalar):
+            engine.release_batch(ids, np.sign(engine.position[ids]), np.abs(engine.position[ids]) // 2)
+    assert RISK_RATE in codes_seen and len(codes_seen) >= 6
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_check_batch_gross_notional_with_rising_prices(seed):
+    # Few symbols, prices climbing through each batch and a gross notional
+    # limit just under where the whole batch would take it: only the last
+    # few orders should be refused, and an estimate that reprices positions
+    # at the wrong price lets them through
+    rng = np.random.default_rng(seed)
+    engines = []
+    for _ in range(2):
+        engine = RiskEngine(max_symbols=SYMBOLS,
+                            limits={'price_band': 1.0, 'orders_per_sec': 0.0, 'burst': 10_000.0},
+                            global_limits={'max_gross_notional': 1e12, 'orders_per_sec': 0.0, 'burst': 1e6})
+        engine.last_price[:3] = 100.0
+        engines.append(engine)
+    batch, scalar = engines
+    for _ in range(10):
+        n = int(rng.choice([_SCALAR_BATCH, 100, 300]))
+        symbol_ids = rng.integers(0, 3, n)
+        sides = np.where(rng.random(n) < 0.8, 1, -1)
+        quantities = rng.integers(1, 40, n)
+        prices = 100.0 * np.cumprod(1 + rng.uniform(0, 0.002, n))
+        final = batch.position.copy()
+        np.add.at(final, symbol_ids, sides * quantities)
+        last = batch.notional / np.maximum(np.abs(batch.position), 1)
+        last[symbol_ids] = prices
+        full = float((np.abs(final) * last).sum())
+        limit = full - rng.uniform(0.0, 0.01) * (full - batch.gross_notional)
+        for engine in engines:
+            engine.max_gross_notional = limit
+        codes = batch.check_batch(symbol_ids, sides, quantities, prices)
+        expected = [scalar.check_order(int(s), int(d), int(q), float(p))
+                    for s, d, q, p in zip(symbol_ids, sides, quantities, prices)]
+        np.testing.assert_array_equal(codes, expected)
+        assert_same_state(batch, scalar)
+
+
+def test_ids_beyond_initial_capacity_grow_the_engine():
+    engine = RiskEngine(max_symbols=4, limits={'orders_per_sec': 0.0})
+    ticks = np.zeros(2, dtype=[('symbol_id', np.int64), ('price', np.float64)])
+    ticks['symbol_id'] = [2, 9]
+    ticks['price'] = [50.0, 100.0]
+    engine.on_ticks(ticks)
+    assert engine.max_symbols == 16 and engine.last_price[9] == 100.0 and engine.last_price[2] == 50.0
+    # The scalar path reads through the rebound views
+    assert engine.check_order(9, 1, 10) == 0 and engine.position[9] == 10
+    assert engine.check_order(40, 1, 10, 20.0) == 0 and engine.max_symbols == 64
+    assert engine.tokens[40] == engine.burst[40] - 1
+    codes = engine.check_batch(np.arange(_SCALAR_BATCH) + 100, np.ones(_SCALAR_BATCH), np.full(_SCALAR_BATCH, 5),
+                               np.full(_SCALAR_BATCH, 10.0))
+    assert not codes.any() and engine.max_symbols == 256
+    assert engine.gross_position == 20 + 5 * _SCALAR_BATCH
+    for i in range(300):
+        engine.symbols.get_id(f'S{i}')
+    engine.set_limits('LATE', max_position=3)
+    assert engine.max_symbols == 512 and engine.max_position[300] == 3
+    assert engine.check_order(engine.symbols.get_id('LATE'), 1, 5, 10.0) != 0
+    assert engine.check_order(-1, 1, 5, 10.0) == 2
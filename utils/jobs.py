@@ -0,0 +1,231 @@
+# utils/jobs.py
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Deque, Dict, List
+from utils.shared_memory import SharedArray
+from utils.logger import configure_logging, get_logger, worker_log_queue
+
+logger = get_logger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+# One row per job slot, shared with the pool so progress and cancellation
+# need no messages: the worker writes progress, the scheduler writes cancel
+JOB_SLOT_DTYPE = np.dtype([
+    ('progress', np.float64),   # 0..1, as reported by the job
+    ('cancel', np.int64),       # set by Job.cancel(), polled by JobContext.check()
+    ('started_ns', np.int64),   # time.monotonic_ns() when a worker picked the job up
+    ('pid', np.int64),
+])
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Per-worker state, set up once by _init_worker
+_slots: SharedArray = None
+
+
+def _init_worker(slots_spec, log_queue):
+    global _slots
+    configure_logging(log_queue=log_queue)
+    _slots = SharedArray.attach(slots_spec)
+
+
+# What a job function gets as its first argument: report() progress as it
+# goes and call check() at safe points to honour cancellation
+class JobContext:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self._row = _slots.array[slot:slot + 1]
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self._row['cancel'][0])
+
+    def check(self):
+        if self._row['cancel'][0]:
+            raise JobCancelled()
+
+    def report(self, progress: float):
+        self._row['progress'] = min(max(progress, 0.0), 1.0)
+        self.check()
+
+
+def _run_job(slot: int, fn: Callable, args: tuple, kwargs: Dict):
+    context = JobContext(slot)
+    row = context._row
+    row['started_ns'] = time.monotonic_ns()
+    row['pid'] = os.getpid()
+    context.check()
+    result = fn(context, *args, **kwargs)
+    row['progress'] = 1.0
+    return result
+
+
+def open_dataset(source):
+    # A job's input array from a SharedArray spec or an .npy path (memory
+    # mapped); returns (array, SharedArray to close or None)
+    if isinstance(source, str):
+        return np.load(source, mmap_mode='r'), None
+    shared = SharedArray.attach(source)
+    return shared.array, shared
+
+
+class Job:
+    def __init__(self, job_id: int, name: str, slot: int, future: Future, scheduler: 'JobScheduler'):
+        self.id = job_id
+        self.name = name
+        self.slot = slot
+        self.future = future
+        self.submitted_ns = time.monotonic_ns()
+        self.finished_ns = 0
+        # Progress when the job finished; its slot is reused after that
+        self.final_progress = 0.0
+        self._scheduler = scheduler
+
+    def _row(self) -> np.ndarray:
+        return self._scheduler._slots.array[self.slot]
+
+    @property
+    def status(self) -> str:
+        future = self.future
+        if future.cancelled():
+            return JOB_CANCELLED
+        if future.done():
+            error = future.exception()
+            if error is None:
+                return JOB_DONE
+            return JOB_CANCELLED if isinstance(error, JobCancelled) else JOB_FAILED
+        if self.finished_ns == 0 and self._row()['started_ns']:
+            return JOB_RUNNING
+        return JOB_PENDING
+
+    @property
+    def progress(self) -> float:
+        if self.future.done():
+            return 1.0 if self.status == JOB_DONE else self.final_progress
+        return float(self._row()['progress'])
+
+    def cancel(self) -> bool:
+        # Queued jobs never start; running ones stop at their next check()
+        if self.future.done():
+            return False
+        if not self.future.cancel():
+            self._scheduler._slots.array[self.slot]['cancel'] = 1
+        return True
+
+    def result(self, timeout: float = None):
+        return self.future.result(timeout)
+
+    async def wait(self):
+        # Result (or exception) without blocking the event loop
+        return await asyncio.wrap_future(self.future)
+
+    def summary(self) -> Dict:
+        return {'id': self.id, 'name': self.name, 'status': self.status, 'progress': self.progress}
+
+
+# Runs backtests, training and evaluation in a process pool so the trading
+# event loop never waits on them. Job functions are module-level callables
+# taking a JobContext first; large inputs go in as SharedArray specs or
+# .npy paths (opened with mmap_mode='r'), not as pickled arrays. The pool
+# uses spawn by default: TensorFlow is not fork-safe.
+#
+# completion_handlers are called with each finished Job, on the event loop
+# the job was submitted from when there is one. After that the job stays in
+# `jobs` until `history` newer jobs have finished.
+class JobScheduler:
+    def __init__(self, workers: int = 1, max_jobs: int = 64, start_method: str = 'spawn', history: int = 256):
+        self.workers = workers or os.cpu_count() or 1
+        self._slots = SharedArray.create((max_jobs,), JOB_SLOT_DTYPE)
+        self._slots.array[:] = np.zeros(1, dtype=JOB_SLOT_DTYPE)
+        self._free: List[int] = list(range(max_jobs))
+        self._ids = itertools.count(1)
+        self.history = history
+        self.jobs: Dict[int, Job] = {}
+        # Ids of finished jobs still in `jobs`, oldest first
+        self._finished: Deque[int] = deque()
+        self.completion_handlers: List[Callable[[Job], None]] = []
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        mp_context=multiprocessing.get_context(start_method),
+                                        initializer=_init_worker,
+                                        initargs=(self._slots.spec, worker_log_queue()))
+        logger.info(f"Job scheduler started with {self.workers} workers.")
+
+    def submit(self, fn: Callable, *args, name: str = None, **kwargs) -> Job:
+        if not self._free:
+            raise RuntimeError(f"Too many jobs in flight ({len(self._slots.array)})")
+        slot = self._free.pop()
+        self._slots.array[slot] = np.zeros(1, dtype=JOB_SLOT_DTYPE)[0]
+        job_id = next(self._ids)
+        future = self.pool.submit(_run_job, slot, fn, args, kwargs)
+        job = Job(job_id, name or getattr(fn, '__name__', 'job'), slot, future, self)
+        self.jobs[job_id] = job
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        # Done callbacks fire on the pool's manager thread
+        if loop is None:
+            future.add_done_callback(lambda _: self._finish(job))
+        else:
+            future.add_done_callback(lambda _: self._dispatch(loop, job))
+        logger.info(f"Submitted job {job_id} ({job.name}).")
+        return job
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop, job: Job):
+        try:
+            loop.call_soon_threadsafe(self._finish, job)
+        except RuntimeError:
+            # The loop is gone (shutdown); nothing else can be touching jobs
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        if job.finished_ns:
+            return
+        job.finished_ns = time.monotonic_ns()
+        job.final_progress = float(self._slots.array[job.slot]['progress'])
+        self._free.append(job.slot)
+        status = job.status
+        if status == JOB_FAILED:
+            logger.error(f"Job {job.id} ({job.name}) failed: {job.future.exception()!r}")
+        else:
+            logger.info(f"Job {job.id} ({job.name}) {status} in {(job.finished_ns - job.submitted_ns) / 1e9:.1f}s.")
+        for handler in self.completion_handlers:
+            try:
+                handler(job)
+            except Exception as e:
+                logger.exception(f"Job completion handler failed: {e}")
+        self._finished.append(job.id)
+        while len(self._finished) > self.history:
+            del self.jobs[self._finished.popleft()]
+
+    def cancel_all(self):
+        for job in self.jobs.values():
+            job.cancel()
+
+    def summary(self) -> List[Dict]:
+        return [job.summary() for job in self.jobs.values()]
+
+    def close(self, cancel: bool = True):
+        if self._slots is None:
+            return
+        if cancel:
+            self.cancel_all()
+        self.pool.shutdown(wait=True, cancel_futures=cancel)
+        self._slots.unlink()
+        self._slots = None
+        logger.info("Job scheduler stopped.")
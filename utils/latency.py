@@ -0,0 +1,235 @@
+# utils/latency.py
+
+import asyncio
+import json
+import os
+import time
+import numpy as np
+from typing import Dict, Iterable
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+# HDR-style log-linear histogram of nanosecond latencies. Values below
+# 2**significant_bits land in exact one-nanosecond buckets; above that every
+# power of two is split into 2**(significant_bits - 1) equal buckets, so the
+# relative error stays under 2**-(significant_bits - 1) (1.6% at the default)
+# across the whole range with a few thousand int64 counters. Recording a
+# whole completion batch is one bincount; a single value (a per-message or
+# per-batch stage timing) is a few integer operations and one counter bump.
+class LatencyHistogram:
+    def __init__(self, significant_bits: int = 7, highest_ns: int = 1 << 40):
+        self.significant_bits = significant_bits
+        self.highest_ns = highest_ns
+        self._sub_count = 1 << significant_bits
+        self._half = self._sub_count >> 1
+        top_shift = max(int(highest_ns).bit_length() - significant_bits, 0)
+        self.counts = np.zeros(self._sub_count + top_shift * self._half, dtype=np.int64)
+        self.total = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def _indices(self, values: np.ndarray) -> np.ndarray:
+        values = np.clip(values, 0, self.highest_ns).astype(np.int64)
+        # frexp's exponent is the bit length for integers below 2**53
+        shift = np.maximum(np.frexp(values.astype(np.float64))[1] - self.significant_bits, 0)
+        return np.where(shift == 0, values,
+                        self._sub_count + (shift - 1) * self._half + (values >> shift) - self._half)
+
+    def _bucket_values(self) -> np.ndarray:
+        # Midpoint of every bucket, used when reporting percentiles
+        index = np.arange(len(self.counts), dtype=np.int64)
+        upper = np.maximum(index - self._sub_count, 0)
+        shift = np.where(index < self._sub_count, 0, upper // self._half + 1)
+        low = np.where(index < self._sub_count, index, (upper % self._half + self._half) << shift)
+        return low + ((1 << shift) - 1) / 2
+
+    def _index(self, value: int) -> int:
+        # Scalar _indices, without the NumPy call overhead
+        shift = value.bit_length() - self.significant_bits
+        if shift <= 0:
+            return value
+        return self._sub_count + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def record(self, value_ns: int):
+        value_ns = min(max(int(value_ns), 0), self.highest_ns)
+        self.counts[self._index(value_ns)] += 1
+        self.total += 1
+        self.sum_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def record_many(self, values_ns: np.ndarray):
+        values_ns = np.asarray(values_ns, dtype=np.int64)
+        if not len(values_ns):
+            return
+        if len(values_ns) < 16:
+            # Below this the NumPy call overhead outweighs the work
+            for value in values_ns.tolist():
+                self.record(value)
+            return
+        self.counts += np.bincount(self._indices(values_ns), minlength=len(self.counts))
+        self.total += len(values_ns)
+        self.sum_ns += int(values_ns.sum())
+        self.max_ns = max(self.max_ns, int(values_ns.max()))
+
+    def merge(self, other: 'LatencyHistogram'):
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self.counts += other.counts
+        self.total += other.total
+        self.sum_ns += other.sum_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = self.sum_ns = self.max_ns = 0
+
+    def percentile(self, percentile: float) -> float:
+        return self.percentiles((percentile,))[percentile]
+
+    def percentiles(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        # Nanoseconds; empty histograms report 0
+        percentiles = tuple(percentiles)
+        if self.total == 0:
+            return {p: 0.0 for p in percentiles}
+        ranks = np.maximum(np.ceil(np.asarray(percentiles) / 100 * self.total), 1)
+        buckets = np.searchsorted(np.cumsum(self.counts), ranks)
+        values = np.minimum(self._bucket_values()[buckets], self.max_ns)
+        return {p: float(v) for p, v in zip(percentiles, values)}
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> dict:
+        # Microseconds, for logs and monitoring
+        summary = {'count': self.total,
+                   'mean_us': self.sum_ns / self.total / 1e3 if self.total else 0.0,
+                   'max_us': self.max_ns / 1e3}
+        for p, value in self.percentiles(percentiles).items():
+            summary[f"p{p:g}_us"] = value / 1e3
+        return summary
+
+
+# Latencies over the last window_s seconds: a ring of per-slot histograms,
+# rotated on the monotonic clock as samples arrive. Reads merge the live
+# slots, so the window slides in steps of window_s / slots.
+class RollingLatencyHistogram:
+    def __init__(self, window_s: float = 60.0, slots: int = 6, significant_bits: int = 7,
+                 highest_ns: int = 1 << 40):
+        self.window_s = window_s
+        self.slot_ns = int(window_s * 1e9 / slots)
+        self.slots = [LatencyHistogram(significant_bits, highest_ns) for _ in range(slots)]
+        self._epoch = time.monotonic_ns() // self.slot_ns
+
+    def _rotate(self):
+        epoch = time.monotonic_ns() // self.slot_ns
+        elapsed = epoch - self._epoch
+        if elapsed <= 0:
+            return
+        for step in range(1, min(elapsed, len(self.slots)) + 1):
+            self.slots[(self._epoch + step) % len(self.slots)].reset()
+        self._epoch = epoch
+
+    def record(self, value_ns: int):
+        self._rotate()
+        self.slots[self._epoch % len(self.slots)].record(value_ns)
+
+    def record_many(self, values_ns: np.ndarray):
+        self._rotate()
+        self.slots[self._epoch % len(self.slots)].record_many(values_ns)
+
+    def snapshot(self) -> LatencyHistogram:
+        self._rotate()
+        merged = LatencyHistogram(self.slots[0].significant_bits, self.slots[0].highest_ns)
+        for slot in self.slots:
+            merged.merge(slot)
+        return merged
+
+    def percentiles(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        return self.snapshot().percentiles(percentiles)
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> dict:
+        return self.snapshot().summary(percentiles)
+
+    def reset(self):
+        for slot in self.slots:
+            slot.reset()
+
+
+# Named rolling histograms, one per pipeline stage, shared by the components
+# a tick passes through. Stages are measured on time.monotonic_ns() from the
+# socket receive time carried along with the data, so they read as
+# cumulative latency:
+#
+#   decode              frame received -> events decoded (DataStream)
+#   dispatch            frame received -> ticks handed to the processor
+#   batch_age           frame received -> its batch starts processing
+#   batch_processing    indicators and batch handlers for one batch
+#   inference           scoring request -> prediction (InferenceEngine)
+#   tick_to_prediction  frame received -> prediction
+#   submit_to_ack       order enqueued -> executor completion
+#   handling            executor dequeue -> completion
+#   tick_to_trade       frame received -> executor completion
+#   tick_to_fix_send    frame received -> NewOrderSingle handed to QuickFIX
+#   loop_lag            how late the event loop wakes a sleeping task
+#
+# summary() is the API; log_summary() and dump() are what the periodic task
+# writes.
+class LatencyMonitor:
+    def __init__(self, window_s: float = 60.0, slots: int = 6):
+        self.window_s = window_s
+        self.slots = slots
+        self.histograms: Dict[str, RollingLatencyHistogram] = {}
+
+    def histogram(self, name: str) -> RollingLatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingLatencyHistogram(self.window_s, self.slots)
+        return histogram
+
+    def record(self, name: str, values_ns: np.ndarray):
+        self.histogram(name).record_many(values_ns)
+
+    def record_value(self, name: str, value_ns: int):
+        # One sample, for per-message and per-batch stages
+        self.histogram(name).record(value_ns)
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, dict]:
+        return {name: histogram.summary(percentiles) for name, histogram in self.histograms.items()}
+
+    def log_summary(self):
+        for name, summary in self.summary().items():
+            if summary['count']:
+                stats = ' '.join(f"{key[:-3]}={value:.1f}" for key, value in summary.items()
+                                 if key.endswith('_us'))
+                logger.info(f"Latency {name} (last {self.window_s:g}s, n={summary['count']}, us): {stats}")
+
+    def dump(self, path: str):
+        # The current summary as JSON, replaced atomically so a reader never
+        # sees a partial file
+        report = {'time': time.time(), 'window_s': self.window_s, 'stages': self.summary()}
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp, path)
+
+    async def run_periodic_log(self, interval: float = 10.0, dump_path: str = None):
+        while True:
+            await asyncio.sleep(interval)
+            self.log_summary()
+            if dump_path:
+                try:
+                    self.dump(dump_path)
+                except OSError as e:
+                    logger.error(f"Could not write latency dump to {dump_path}: {e}")
+
+    async def run_loop_lag_probe(self, interval: float = 0.01):
+        # Sleeps `interval` and records how late it wakes: the time some
+        # callback held the loop (a long batch, a blocking call)
+        interval_ns = int(interval * 1e9)
+        histogram = self.histogram('loop_lag')
+        while True:
+            start = time.monotonic_ns()
+            await asyncio.sleep(interval)
+            histogram.record(time.monotonic_ns() - start - interval_ns)
@@ -1,16 +1,211 @@
 # utils/logger.py
+#
+# Logging is configured once, from config.yaml's `logging` section, on the
+# first get_logger() call. The handlers it configures on the root logger are
+# then moved behind a queue: a logging call on the trading thread only
+# builds the LogRecord and puts it on an in-process queue, and a
+# QueueListener thread formats and writes it.
+#
+# Only the main process writes the log file. Child processes (processing
+# shards, job and sweep workers) leave file handlers out of the config, and
+# those given the parent's worker_log_queue() send their records to the
+# parent's handlers instead.
 
+import atexit
 import logging
 import logging.config
-import yaml
+import multiprocessing
 import os
+import queue
+import threading
+import time
+import yaml
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Tuple
+
+# Records waiting for the writer thread beyond this are dropped (and counted)
+# rather than letting a log storm grow memory without bound
+MAX_PENDING = 100_000
+
+# Argument types that can't change between the call and the writer thread
+# formatting the message
+_IMMUTABLE = frozenset((str, int, float, bool, bytes, type(None)))
+
+_lock = threading.Lock()
+_configured = False
+_handler: 'DeferredQueueHandler' = None
+_listener: QueueListener = None
+_worker_queue = None
+_worker_listener: QueueListener = None
+_forwarding = None
+
+
+# QueueHandler that leaves message formatting to the writer thread. The
+# stock one formats in prepare(), on the caller's thread, because arguments
+# might be mutated (or freed, for wrapped C++ objects such as quickfix
+# messages) before the writer gets to them; here that only happens when an
+# argument isn't an immutable primitive.
+class DeferredQueueHandler(QueueHandler):
+    def __init__(self, records: queue.SimpleQueue, max_pending: int = MAX_PENDING):
+        super().__init__(records)
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if type(record.msg) is not str or (args and not all(
+                type(arg) in _IMMUTABLE for arg in (args if type(args) is tuple else (args,)))):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+def queue_handlers(handlers: List[logging.Handler],
+                   max_pending: int = MAX_PENDING) -> Tuple[DeferredQueueHandler, QueueListener]:
+    # A DeferredQueueHandler feeding `handlers` from a started writer thread
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return DeferredQueueHandler(records, max_pending), listener
+
+
+def _without_file_handlers(settings: dict) -> dict:
+    # The logging config minus handlers that write files (those configured
+    # with a filename), for child processes
+    files = {name for name, handler in settings.get('handlers', {}).items() if 'filename' in handler}
+    if not files:
+        return settings
+    settings = dict(settings)
+    settings['handlers'] = {name: handler for name, handler in settings['handlers'].items() if name not in files}
+    if 'root' in settings:
+        settings['root'] = {**settings['root'],
+                            'handlers': [h for h in settings['root'].get('handlers', []) if h not in files]}
+    if 'loggers' in settings:
+        settings['loggers'] = {name: {**logger, 'handlers': [h for h in logger.get('handlers', []) if h not in files]}
+                               for name, logger in settings['loggers'].items()}
+    return settings
+
+
+def configure_logging(config: dict = None, max_pending: int = MAX_PENDING, log_queue=None):
+    # Idempotent; get_logger() calls it with the config file's settings.
+    # log_queue (a child process's copy of the parent's worker_log_queue())
+    # then replaces the local handlers, and may be passed after that call.
+    global _configured, _handler, _listener, _worker_queue, _worker_listener, _forwarding
+    with _lock:
+        if not _configured:
+            if config is None:
+                config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
+                with open(config_path, 'r') as f:
+                    config = yaml.safe_load(f.read())
+            if 'logging' in config:
+                settings = config['logging']
+                if multiprocessing.parent_process() is not None:
+                    settings = _without_file_handlers(settings)
+                # Loggers created before this call (at import time) stay enabled
+                logging.config.dictConfig({'disable_existing_loggers': False, **settings})
+            else:
+                logging.basicConfig(level=logging.INFO)
+            root = logging.getLogger()
+            handlers = root.handlers[:]
+            for handler in handlers:
+                root.removeHandler(handler)
+            _handler, _listener = queue_handlers(handlers, max_pending)
+            root.addHandler(_handler)
+            atexit.register(shutdown_logging)
+            _configured = True
+        if log_queue is not None and log_queue is not _forwarding:
+            # The stock QueueHandler formats on this side, so records pickle
+            root = logging.getLogger()
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            root.addHandler(QueueHandler(log_queue))
+            if _listener is not None:
+                _listener.stop()
+                _listener = None
+            _handler = None
+            # Grandchildren log through the same queue; a listener inherited
+            # through fork belongs to the parent
+            _forwarding = _worker_queue = log_queue
+            _worker_listener = None
+
+
+def worker_log_queue():
+    # A queue for child processes to pass to configure_logging(log_queue=...);
+    # records put on it go to this process's handlers
+    global _worker_queue, _worker_listener
+    if not _configured:
+        configure_logging()
+    with _lock:
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.get_context('spawn').Queue()
+            _worker_listener = QueueListener(_worker_queue, *_listener.handlers, respect_handler_level=True)
+            _worker_listener.start()
+        return _worker_queue
+
+
+def shutdown_logging():
+    # Writes out whatever is still queued; logging calls after this go nowhere
+    global _listener, _worker_listener
+    with _lock:
+        for listener in (_worker_listener, _listener):
+            if listener is not None:
+                listener.stop()
+        _listener = _worker_listener = None
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
+
 
 def get_logger(name: str) -> logging.Logger:
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f.read())
-    if 'logging' in config:
-        logging.config.dictConfig(config['logging'])
-    else:
-        logging.basicConfig(level=logging.INFO)
+    if not _configured:
+        configure_logging()
     return logging.getLogger(name)
+
+
+# Rate limit for one hot-path call site: at most one record per `interval`
+# seconds and, with `every`, only every nth call is considered. The record
+# that gets through carries the count suppressed since the previous one.
+#
+#   _batch_log = LogThrottle(logger, interval=1.0)
+#   _batch_log.info("Processed batch of %d ticks.", n)
+class LogThrottle:
+    def __init__(self, logger: logging.Logger, interval: float = 1.0, every: int = None):
+        self.logger = logger
+        self.interval = interval
+        self.every = every
+        self.calls = 0
+        self.suppressed = 0
+        self._next = 0.0
+
+    def log(self, level: int, msg: str, *args, stacklevel: int = 2):
+        if not self.logger.isEnabledFor(level):
+            return
+        self.calls += 1
+        if self.every and self.calls % self.every:
+            self.suppressed += 1
+            return
+        now = time.monotonic()
+        if now < self._next:
+            self.suppressed += 1
+            return
+        self._next = now + self.interval
+        if self.suppressed:
+            msg = f"{msg} [{self.suppressed} suppressed]"
+            self.suppressed = 0
+        self.logger.log(level, msg, *args, stacklevel=stacklevel)
+
+    def debug(self, msg: str, *args):
+        self.log(logging.DEBUG, msg, *args, stacklevel=3)
+
+    def info(self, msg: str, *args):
+        self.log(logging.INFO, msg, *args, stacklevel=3)
+
+    def warning(self, msg: str, *args):
+        self.log(logging.WARNING, msg, *args, stacklevel=3)
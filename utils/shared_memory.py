@@ -0,0 +1,53 @@
+# utils/shared_memory.py
+
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Tuple
+
+
+# A NumPy array living in a named shared-memory block. The owner creates it
+# once; worker processes attach by (name, shape, dtype) instead of receiving a
+# pickled copy. Only the owner should unlink().
+class SharedArray:
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: np.dtype, owner: bool):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape: Tuple[int, ...], dtype: np.dtype = np.float64) -> 'SharedArray':
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return cls(shared_memory.SharedMemory(create=True, size=size), shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'SharedArray':
+        shared = cls.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, Tuple[int, ...], str]) -> 'SharedArray':
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self) -> Tuple[str, Tuple[int, ...], str]:
+        # Picklable handle for attach(); descr round-trips structured dtypes
+        return self.shm.name, self.shape, self.dtype.descr if self.dtype.names else self.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.unlink()
@@ -0,0 +1,122 @@
+# utils/shm_ring.py
+
+import numpy as np
+from typing import Tuple
+from utils.shared_memory import SharedArray
+
+# Shared layout, also read by order_execution/order_executor.cpp:
+#   [0, 64)    magic, capacity, record size
+#   [64, 128)  head: total records written, stored only by the producer
+#   [128, 192) tail: total records consumed, stored only by the consumer
+#   [192, ...) capacity records
+# head and tail sit on their own cache lines so producer and consumer don't
+# false-share.
+RING_MAGIC = 0x31474E4952544648  # b'HFTRING1' little-endian
+RING_HEADER_SIZE = 192
+_HEAD_OFFSET = 64
+_TAIL_OFFSET = 128
+
+
+# Single-producer/single-consumer ring of structured records in shared
+# memory, with the same head/tail/peek/advance semantics as TickRingBuffer.
+# There are no locks: the producer writes records and then publishes them by
+# storing head, the consumer reads records and then releases them by storing
+# tail. NumPy stores are plain 8-byte aligned stores, which x86-64 never
+# reorders with earlier stores, so a consumer that loads head with acquire
+# semantics (the C++ executor does) sees the records before the new head.
+class SharedRing:
+    def __init__(self, shared: SharedArray, dtype: np.dtype):
+        self.shared = shared
+        self.dtype = np.dtype(dtype)
+        buffer = shared.shm.buf
+        header = np.ndarray((3,), dtype=np.uint64, buffer=buffer)
+        if int(header[0]) != RING_MAGIC or int(header[2]) != self.dtype.itemsize:
+            raise ValueError("Shared memory block is not a ring of this record type")
+        self.capacity = int(header[1])
+        self._mask = self.capacity - 1
+        self._head = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=_HEAD_OFFSET)
+        self._tail = np.ndarray((1,), dtype=np.uint64, buffer=buffer, offset=_TAIL_OFFSET)
+        self._data = np.ndarray((self.capacity,), dtype=self.dtype, buffer=buffer, offset=RING_HEADER_SIZE)
+
+    @classmethod
+    def create(cls, capacity: int, dtype: np.dtype) -> 'SharedRing':
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError(f"Ring capacity must be a power of two, got {capacity}")
+        dtype = np.dtype(dtype)
+        shared = SharedArray.create((RING_HEADER_SIZE + capacity * dtype.itemsize,), np.uint8)
+        shared.array[:] = 0
+        np.ndarray((3,), dtype=np.uint64, buffer=shared.shm.buf)[:] = (RING_MAGIC, capacity, dtype.itemsize)
+        return cls(shared, dtype)
+
+    @classmethod
+    def attach(cls, spec: Tuple, dtype: np.dtype) -> 'SharedRing':
+        return cls(SharedArray.attach(spec), dtype)
+
+    @property
+    def spec(self) -> Tuple:
+        return self.shared.spec
+
+    @property
+    def head(self) -> int:
+        return int(self._head[0])
+
+    @property
+    def tail(self) -> int:
+        return int(self._tail[0])
+
+    @property
+    def address(self) -> int:
+        # Base address of the shared block in this process, for native consumers
+        return self.shared.array.ctypes.data
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    @property
+    def free(self) -> int:
+        return self.capacity - (self.head - self.tail)
+
+    def push(self, records: np.ndarray) -> int:
+        # Producer side. Copies as many records as fit (at most two slice
+        # copies around the wrap) and publishes them with one head store;
+        # returns the number written.
+        head = self.head
+        n = min(len(records), self.capacity - (head - self.tail))
+        if n <= 0:
+            return 0
+        start = head & self._mask
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = records[:first]
+        if first < n:
+            self._data[:n - first] = records[first:n]
+        self._head[0] = head + n
+        return n
+
+    def peek(self, max_records: int = None) -> np.ndarray:
+        # Consumer side: zero-copy view of the contiguous run up to the
+        # physical end of the buffer
+        tail = self.tail
+        available = self.head - tail
+        if max_records is not None:
+            available = min(available, max_records)
+        start = tail & self._mask
+        return self._data[start:min(start + available, self.capacity)]
+
+    def advance(self, count: int):
+        tail = self.tail
+        if count > self.head - tail:
+            raise ValueError(f"Cannot advance {count} records, only {self.head - tail} available")
+        self._tail[0] = tail + count
+
+    def pop(self, max_records: int = None) -> np.ndarray:
+        records = self.peek(max_records).copy()
+        self.advance(len(records))
+        return records
+
+    def close(self):
+        self._head = self._tail = self._data = None
+        self.shared.close()
+
+    def unlink(self):
+        self._head = self._tail = self._data = None
+        self.shared.unlink()
@@ -0,0 +1,57 @@
+# utils/startup.py
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Wall time per startup step, measured from the profiler's creation (the top
+# of the entry point). Import steps also count the modules they pulled in.
+# Steps may run concurrently on threads; `start_s` places each on the
+# timeline. mark() records a point in time, such as the first tick.
+class StartupProfiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.steps: List[Dict] = []
+        self.marks: Dict[str, float] = {}
+
+    @contextmanager
+    def step(self, name: str, kind: str = 'init'):
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            entry = {'name': name, 'kind': kind, 'start_s': start - self.origin, 'seconds': end - start,
+                     'thread': threading.current_thread().name}
+            if kind == 'import':
+                entry['modules'] = len(sys.modules) - modules
+            self.steps.append(entry)
+
+    def mark(self, name: str) -> float:
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+        return self.marks[name]
+
+    def summary(self) -> Dict:
+        return {'steps': list(self.steps), 'marks': dict(self.marks),
+                'elapsed_s': time.perf_counter() - self.origin}
+
+    def log_summary(self):
+        for entry in sorted(self.steps, key=lambda e: e['start_s']):
+            modules = f", {entry['modules']} modules" if 'modules' in entry else ''
+            logger.info(f"Startup {entry['kind']} {entry['name']}: {entry['seconds'] * 1e3:.1f}ms "
+                        f"at +{entry['start_s'] * 1e3:.0f}ms ({entry['thread']}{modules})")
+        for name, at in self.marks.items():
+            logger.info(f"Startup {name} at +{at * 1e3:.0f}ms")
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)